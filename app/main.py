@@ -1,7 +1,7 @@
 from fastapi import FastAPI, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-import spacy
 import json
+from functools import lru_cache
 from typing import Dict, List
 from pydantic import BaseModel
 
@@ -16,8 +16,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Load spaCy model
-nlp = spacy.load("en_core_web_sm")
+@lru_cache(maxsize=1)
+def get_nlp():
+    """Load the spaCy model on first use; importing spaCy and the model takes seconds."""
+    import spacy
+    return spacy.load("en_core_web_sm")
 
 class CVText(BaseModel):
     text: str
@@ -30,7 +33,7 @@ async def read_root():
 async def analyze_cv(cv_data: CVText):
     try:
         # Process the text with spaCy
-        doc = nlp(cv_data.text)
+        doc = get_nlp()(cv_data.text)
         
         # Extract named entities
         entities = []
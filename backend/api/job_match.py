@@ -0,0 +1,413 @@
+"""Match a parsed résumé against the scraped jobs by their skills.
+
+Every job is a row of a sparse job x skill matrix built from the scraper's
+job_skills table (see backend/webscraping/skill_tagger.py). A job scores
+the TF-IDF cosine similarity between its skills and the résumé's: a skill
+weighs log((jobs + 1) / (jobs asking for it + 1)) + 1, so "Kubernetes" in
+common counts for more than "Communication".
+
+The matrix lives on disk under MATCH_INDEX as segments: directories of
+.npy files holding a CSR matrix (indptr, indices) and, per row, the job's
+jobs.search_rowid (unlike jobs.rowid, never renumbered), its skills_seq and
+a city code. A segment is named after the range of jobs.skills_seq it
+covers, and is memory-mapped when loaded, so startup reads no matrix data.
+A refresh appends a segment with the jobs tagged since the newest one; a
+job tagged again counts in the row with its highest skills_seq only. More
+than MAX_SEGMENTS are merged into one.
+
+Only the IDF weights and the row norms are computed when segments are
+loaded, in a few vectorized passes. A query is one sparse matrix-vector
+product per segment and an argpartition for the top k.
+"""
+
+import json
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+
+from .job_search import get_jobs_db
+from .text_index import TextIndex
+
+_WEBSCRAPING = Path(__file__).resolve().parent.parent / "webscraping"
+MATCH_INDEX = os.environ.get("JOB_MATCH_INDEX", str(_WEBSCRAPING / "match_index"))
+# Extra spellings of skills ("K8s"), shared with the scraper's tagger
+SKILL_RULES = _WEBSCRAPING / "skill_rules.json"
+
+MAX_SEGMENTS = 8
+REFRESH_SECONDS = 60
+MAX_LIMIT = 100
+# Text matches fetched per requested result when filtering by city
+TEXT_CITY_FACTOR = 10
+
+_SEGMENT_RE = re.compile(r'^seg-(\d+)-(\d+)$')
+_ARRAYS = ("search_rowids", "seqs", "cities", "indptr", "indices")
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+
+class ResumeMatchRequest(BaseModel):
+    # The "skills" of a ParsedResume; other résumé fields are ignored
+    skills: List[str] = []
+    # The résumé text, searched when none of the skills are in the taxonomy
+    text: Optional[str] = None
+    city: Optional[str] = None
+    limit: int = Field(20, ge=1, le=MAX_LIMIT)
+
+
+class JobMatch(BaseModel):
+    job_id: str
+    title: str
+    company: Optional[str] = None
+    city: Optional[str] = None
+    country: Optional[str] = None
+    job_link: Optional[str] = None
+    scraped_date: Optional[str] = None
+    score: float
+    matched_skills: List[str]
+
+
+class JobMatchResponse(BaseModel):
+    # Résumé skills found in the taxonomy, and the rest
+    skills: List[str]
+    unknown_skills: List[str]
+    # "skills", or "text" for the BM25 fallback
+    method: str
+    results: List[JobMatch]
+
+
+def write_segment(directory, first_seq, last_seq, rowids, seqs, cities, indptr, indices, city_names):
+    """Write a segment of len(rowids) rows and return its path.
+
+    cities are codes into city_names. The files are written to a temporary
+    directory and renamed into place, so readers never see half a segment.
+    """
+    name = f"seg-{first_seq:010d}-{last_seq:010d}"
+    path = os.path.join(directory, name)
+    tmp_path = os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    arrays = {"search_rowids": (rowids, np.int64), "seqs": (seqs, np.int64), "cities": (cities, np.int32),
+              "indptr": (indptr, np.int32), "indices": (indices, np.int32)}
+    for key, (values, dtype) in arrays.items():
+        np.save(os.path.join(tmp_path, key + ".npy"), np.asarray(values, dtype=dtype))
+    with open(os.path.join(tmp_path, "cities.json"), "w", encoding="utf-8") as f:
+        json.dump(list(city_names), f)
+    try:
+        os.rename(tmp_path, path)
+    except OSError:
+        # Already written, from the same snapshot, by another process
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    return path
+
+
+class Segment:
+    def __init__(self, path):
+        match = _SEGMENT_RE.match(os.path.basename(path))
+        self.path = path
+        self.first_seq, self.last_seq = int(match.group(1)), int(match.group(2))
+        for key in _ARRAYS:
+            setattr(self, key, np.load(os.path.join(path, key + ".npy"), mmap_mode="r"))
+        with open(os.path.join(path, "cities.json"), encoding="utf-8") as f:
+            self.city_names = json.load(f)
+        self.columns = int(self.indices.max()) + 1 if len(self.indices) else 0
+
+    def __len__(self):
+        return len(self.search_rowids)
+
+    def matrix(self, columns):
+        # A 0/1 matrix over the memory-mapped index arrays; only the ones are in memory.
+        # scipy is imported here to keep it out of the API's start-up
+        from scipy.sparse import csr_matrix
+
+        data = np.ones(len(self.indices), dtype=np.float32)
+        return csr_matrix((data, self.indices, self.indptr), shape=(len(self), columns), copy=False)
+
+
+def _list_segments(directory):
+    """Paths of the segments to load; ones covered by a merged segment are left out."""
+    found = []
+    for name in os.listdir(directory):
+        match = _SEGMENT_RE.match(name)
+        if match:
+            found.append((int(match.group(1)), int(match.group(2)), os.path.join(directory, name)))
+    found.sort(key=lambda item: (item[0], -item[1]))
+    kept, covered = [], -1
+    for first, last, path in found:
+        if last > covered:
+            kept.append(path)
+            covered = last
+    return kept, [path for _, _, path in found if path not in kept]
+
+
+class _View:
+    """The loaded segments with the statistics a query needs; never changed once built."""
+
+    def __init__(self, segments):
+        self.segments = segments
+        self.last_seq = max((segment.last_seq for segment in segments), default=None)
+        self.columns = max((segment.columns for segment in segments), default=0)
+        self.matrices = [segment.matrix(self.columns) for segment in segments]
+        self.offsets = np.cumsum([0] + [len(segment) for segment in segments])
+        rowids = np.concatenate([segment.search_rowids for segment in segments]) if segments else np.zeros(0, np.int64)
+        seqs = np.concatenate([segment.seqs for segment in segments]) if segments else np.zeros(0, np.int64)
+        self.rowids = rowids
+
+        # A job tagged several times counts in its newest row only
+        order = np.lexsort((seqs, rowids))
+        newest = np.ones(len(order), dtype=bool)
+        newest[:-1] = rowids[order[:-1]] != rowids[order[1:]]
+        live = np.zeros(len(rowids), dtype=bool)
+        live[order[newest]] = True
+
+        # One city vocabulary across segments
+        self.city_codes = {}
+        cities = []
+        for segment in segments:
+            remap = np.array([self.city_codes.setdefault(name, len(self.city_codes))
+                              for name in segment.city_names] or [0], dtype=np.int32)
+            cities.append(remap[segment.cities])
+        self.cities = np.concatenate(cities) if cities else np.zeros(0, np.int32)
+
+        # Document frequencies over the live rows, then the IDF weights and row norms
+        df = np.zeros(self.columns, dtype=np.float64)
+        for matrix, start, end in zip(self.matrices, self.offsets[:-1], self.offsets[1:]):
+            df += matrix.T @ live[start:end].astype(np.float32)
+        self.jobs = int(live.sum())
+        self.idf = (np.log((self.jobs + 1) / (df + 1)) + 1).astype(np.float32)
+        squares = self.idf ** 2
+        norms = np.concatenate([matrix @ squares for matrix in self.matrices]) if segments else np.zeros(0)
+        norms = np.sqrt(norms, dtype=np.float32)
+        # Each row's score is multiplied by this: 1 / norm, or 0 for dead and skill-less rows
+        self.weight = np.divide(1.0, norms, out=np.zeros(len(norms), dtype=np.float32), where=live & (norms > 0))
+
+    def locate(self, position):
+        """(segment index, row) of a position in the concatenated rows."""
+        index = int(np.searchsorted(self.offsets, position, side="right")) - 1
+        return index, position - int(self.offsets[index])
+
+
+class JobMatchIndex:
+    """The on-disk match index of one jobs database; safe to share between threads."""
+
+    def __init__(self, directory=MATCH_INDEX):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._refreshed = None
+        os.makedirs(directory, exist_ok=True)
+        self.view = self._load()
+
+    def _load(self):
+        paths, covered = _list_segments(self.directory)
+        # Merged away; processes that still map them keep their pages
+        for path in covered:
+            shutil.rmtree(path, ignore_errors=True)
+        return _View([Segment(path) for path in paths])
+
+    def refresh(self, conn, min_interval=REFRESH_SECONDS):
+        """Append the jobs tagged since the newest segment, at most once per min_interval seconds."""
+        now = time.monotonic()
+        if self._refreshed is not None and now - self._refreshed < min_interval:
+            return
+        with self._lock:
+            if self._refreshed is not None and now - self._refreshed < min_interval:
+                return
+            self._refreshed = now
+            view = self.view
+            conn.execute("BEGIN")
+            try:
+                (max_seq,) = conn.execute('SELECT COALESCE(MAX(skills_seq), 0) FROM jobs').fetchone()
+                if view.last_seq is None:
+                    # The first build also takes jobs tagged before skills_seq existed
+                    first_seq, where, params = 0, "jobs.skills_version IS NOT NULL", ()
+                elif max_seq > view.last_seq:
+                    first_seq, where, params = view.last_seq + 1, "jobs.skills_seq > ?", (view.last_seq,)
+                else:
+                    return
+                segment = self._write_from_database(conn, first_seq, max_seq, where, params)
+            finally:
+                conn.rollback()
+            if segment is None:
+                return
+            segments = view.segments + [Segment(segment)]
+            if len(segments) > MAX_SEGMENTS:
+                segments = [Segment(self._merge(_View(segments)))]
+            self.view = self._load() if len(segments) == 1 else _View(segments)
+
+    def _write_from_database(self, conn, first_seq, last_seq, where, params):
+        rowids, seqs, city_of_row = array("q"), array("q"), []
+        for rowid, seq, city in conn.execute(f'''
+            SELECT jobs.search_rowid, COALESCE(jobs.skills_seq, 0), LOWER(COALESCE(jobs.city, ''))
+            FROM jobs WHERE ({where}) AND jobs.search_rowid IS NOT NULL ORDER BY jobs.search_rowid
+        ''', params):
+            rowids.append(rowid)
+            seqs.append(seq)
+            city_of_row.append(city)
+        if not rowids:
+            return None
+        skill_rowids, indices = array("q"), array("l")
+        for rowid, skill_id in conn.execute(f'''
+            SELECT jobs.search_rowid, job_skills.skill_id
+            FROM jobs JOIN job_skills ON job_skills.job_id = jobs.job_id
+            WHERE ({where}) AND jobs.search_rowid IS NOT NULL ORDER BY jobs.search_rowid
+        ''', params):
+            skill_rowids.append(rowid)
+            indices.append(skill_id)
+        row_starts = np.searchsorted(np.frombuffer(skill_rowids, dtype=np.int64), np.frombuffer(rowids, dtype=np.int64))
+        city_names = sorted(set(city_of_row))
+        codes = {name: code for code, name in enumerate(city_names)}
+        return write_segment(self.directory, first_seq, last_seq, rowids, seqs, [codes[city] for city in city_of_row],
+                             np.append(row_starts, len(indices)), indices, city_names)
+
+    def _merge(self, view):
+        """Write the live rows of every segment as one and return its path."""
+        rowids, seqs, cities, lengths, indices = [], [], [], [], []
+        for segment, start, end in zip(view.segments, view.offsets[:-1], view.offsets[1:]):
+            keep = view.weight[start:end] > 0
+            row_lengths = np.diff(segment.indptr)
+            rowids.append(view.rowids[start:end][keep])
+            seqs.append(np.asarray(segment.seqs)[keep])
+            cities.append(view.cities[start:end][keep])
+            lengths.append(row_lengths[keep])
+            indices.append(np.asarray(segment.indices)[np.repeat(keep, row_lengths)])
+        names = {code: name for name, code in view.city_codes.items()}
+        return write_segment(self.directory, 0, view.last_seq, np.concatenate(rowids), np.concatenate(seqs),
+                             np.concatenate(cities), np.append(0, np.cumsum(np.concatenate(lengths))),
+                             np.concatenate(indices), [names[code] for code in range(len(names))])
+
+    def search(self, skill_ids, city=None, limit=20):
+        """Top (search_rowid, score, matched skill_ids) for a set of skill_ids, best first."""
+        view = self.view
+        query = np.array(sorted({skill_id for skill_id in skill_ids if 0 <= skill_id < view.columns}), dtype=np.int64)
+        if not len(query) or not view.jobs:
+            return []
+        vector = np.zeros(view.columns, dtype=np.float32)
+        vector[query] = view.idf[query] ** 2
+        scores = np.concatenate([matrix @ vector for matrix in view.matrices])
+        scores *= view.weight
+        scores /= np.sqrt(vector.sum())
+        if city is not None:
+            code = view.city_codes.get(city.lower())
+            if code is None:
+                return []
+            scores[view.cities != code] = 0
+        limit = min(limit, len(scores))
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        results = []
+        for position in top:
+            if scores[position] <= 0:
+                break
+            index, row = view.locate(position)
+            segment = view.segments[index]
+            skills = np.intersect1d(segment.indices[segment.indptr[row]:segment.indptr[row + 1]], query)
+            results.append((int(view.rowids[position]), float(scores[position]), [int(s) for s in skills]))
+        return results
+
+
+def load_skill_names(conn):
+    """({lowercased name or alias: skill_id}, {skill_id: name}) from the skills table and skill rules."""
+    names = dict(conn.execute('SELECT skill_id, name FROM skills'))
+    lookup = {name.lower(): skill_id for skill_id, name in names.items()}
+    try:
+        with open(SKILL_RULES, encoding="utf-8") as f:
+            aliases = json.load(f).get("aliases", {})
+    except FileNotFoundError:
+        aliases = {}
+    for name, spellings in aliases.items():
+        if name.lower() in lookup:
+            for spelling in spellings:
+                lookup.setdefault(spelling.lower(), lookup[name.lower()])
+    return lookup, names
+
+
+def _job_details(conn, rowids):
+    placeholders = ",".join("?" * len(rowids))
+    rows = conn.execute(f'''
+        SELECT search_rowid, job_id, title, company, city, country, job_link, scraped_date
+        FROM jobs WHERE search_rowid IN ({placeholders})
+    ''', rowids).fetchall()
+    keys = ("job_id", "title", "company", "city", "country", "job_link", "scraped_date")
+    return {row[0]: dict(zip(keys, row[1:])) for row in rows}
+
+
+def match_jobs(conn, index, skills, city=None, limit=20, text=None, text_index=None):
+    """Jobs best matching a résumé's skills, or its text if none are known, as a response dict."""
+    lookup, names = load_skill_names(conn)
+    known = [skill for skill in skills if skill.strip().lower() in lookup]
+    unknown = [skill for skill in skills if skill.strip().lower() not in lookup]
+    if not known and text and text_index is not None:
+        return {"skills": known, "unknown_skills": unknown, "method": "text",
+                "results": match_text(conn, text_index, text, city, limit)}
+    index.refresh(conn)
+    found = index.search([lookup[skill.strip().lower()] for skill in known], city, limit)
+    results = []
+    if found:
+        details = _job_details(conn, [rowid for rowid, _, _ in found])
+        results = [{**details[rowid], "score": score, "matched_skills": [names[s] for s in skill_ids]}
+                   for rowid, score, skill_ids in found if rowid in details]
+    return {"skills": known, "unknown_skills": unknown, "method": "skills", "results": results}
+
+
+def match_text(conn, text_index, text, city=None, limit=20):
+    """Jobs whose descriptions best match free text, by BM25."""
+    text_index.refresh(conn)
+    # The text index knows nothing of cities, so over-fetch and filter here
+    found = text_index.search(text, limit * TEXT_CITY_FACTOR if city else limit)
+    if not found:
+        return []
+    details = _job_details(conn, [rowid for rowid, _ in found])
+    results = [{**details[rowid], "score": score, "matched_skills": []}
+               for rowid, score in found if rowid in details]
+    if city:
+        results = [job for job in results if (job["city"] or "").lower() == city.lower()]
+    return results[:limit]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_match_index():
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = JobMatchIndex()
+    return _index
+
+
+_text_index = None
+
+
+def get_text_index():
+    global _text_index
+    with _index_lock:
+        if _text_index is None:
+            _text_index = TextIndex()
+    return _text_index
+
+
+@router.post("/match", response_model=JobMatchResponse)
+def match(
+    request: ResumeMatchRequest,
+    conn: sqlite3.Connection = Depends(get_jobs_db),
+    index: JobMatchIndex = Depends(get_match_index),
+    text_index: TextIndex = Depends(get_text_index),
+):
+    has_text = bool(request.text and request.text.strip())
+    if not has_text and not any(skill.strip() for skill in request.skills):
+        raise HTTPException(status_code=400, detail="The résumé has no skills or text to match.")
+    try:
+        return match_jobs(conn, index, request.skills, request.city, request.limit,
+                          request.text if has_text else None, text_index)
+    except sqlite3.OperationalError as e:
+        raise HTTPException(status_code=503, detail=f"Job matching is unavailable: {e}")
@@ -0,0 +1,170 @@
+"""Full-text search over the scraped jobs.
+
+Reads the SQLite database the scraper writes (backend/webscraping), through
+the jobs_fts index kept up to date by its JobWriter. Set JOBS_DB to point at
+a different file.
+"""
+
+import os
+import re
+import sqlite3
+from datetime import date
+from pathlib import Path
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+
+JOBS_DB = os.environ.get("JOBS_DB", str(Path(__file__).resolve().parent.parent / "webscraping" / "linkedin_jobs.db"))
+
+MAX_LIMIT = 100
+
+# bm25 ranks at most this many matches, the newest ones (see search_jobs)
+CANDIDATE_WINDOW = 2000
+SNIPPET_TOKENS = 24
+HIGHLIGHT_OPEN = "<mark>"
+HIGHLIGHT_CLOSE = "</mark>"
+
+# Words of the query, each optionally ending in * for a prefix search
+_TERM_RE = re.compile(r'\w+\*?')
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+
+class JobSearchResult(BaseModel):
+    job_id: str
+    title: str
+    company: Optional[str] = None
+    city: Optional[str] = None
+    country: Optional[str] = None
+    job_link: Optional[str] = None
+    scraped_date: Optional[str] = None
+    duplicate_of: Optional[str] = None
+    title_highlight: str
+    snippet: str
+    score: float
+
+
+class JobSearchResponse(BaseModel):
+    query: str
+    limit: int
+    offset: int
+    results: List[JobSearchResult]
+
+
+def get_jobs_db():
+    # Read-only: the scraper is the only writer, and WAL lets us read while it writes
+    conn = sqlite3.connect(f"file:{JOBS_DB}?mode=ro", uri=True, check_same_thread=False)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def match_expression(text):
+    """Turn free text into an FTS5 query that matches all of its words.
+
+    Every word is quoted, so input like 'C++ AND (' can't be a syntax error.
+    """
+    terms = []
+    for term in _TERM_RE.findall(text):
+        prefix = term.endswith("*")
+        terms.append(f'"{term.rstrip("*")}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+def _location_filter(column, value):
+    return f'{column} : "{value.replace(chr(34), " ")}"'
+
+
+def search_jobs(conn, text, city=None, country=None, scraped_from=None, scraped_to=None, limit=20, offset=0):
+    """Best-ranked jobs matching text, as a list of result dicts.
+
+    Scoring a match with bm25 costs a little for every matching job, so a
+    word found in most postings would be slow to rank on a large table.
+    Instead the index is walked newest job first (rowid order, which costs
+    nothing extra) and only the first CANDIDATE_WINDOW matches are ranked.
+    A query with fewer matches than that is ranked exactly; a very broad one
+    gets the best matches among the newest jobs, which is also what a job
+    seeker wants to see first.
+
+    City and country are added to the MATCH expression, so the index only
+    yields jobs in that place. An exact comparison against the stored
+    column then drops partial matches like "York" for "New York". snippet() and
+    highlight() only run on the page that is returned.
+    """
+    match = match_expression(text)
+    if not match:
+        return []
+    clauses, params = [], []
+    if city:
+        match = f"({match}) AND {_location_filter('city', city)}"
+        clauses.append("jobs_fts.city = ? COLLATE NOCASE")
+        params.append(city)
+    if country:
+        match = f"({match}) AND {_location_filter('country', country)}"
+        clauses.append("jobs_fts.country = ? COLLATE NOCASE")
+        params.append(country)
+    if scraped_from:
+        clauses.append("jobs.scraped_date >= ?")
+        params.append(scraped_from.isoformat())
+    if scraped_to:
+        clauses.append("jobs.scraped_date < date(?, '+1 day')")
+        params.append(scraped_to.isoformat())
+    where = "".join(f" AND {clause}" for clause in clauses)
+    # Reading jobs for every candidate costs as much as ranking it, so only join when filtering on it
+    join = "JOIN jobs ON jobs.job_id = jobs_fts.job_id" if scraped_from or scraped_to else ""
+
+    # One read transaction, so the details come from the same snapshot the ranking saw
+    # even if the scraper commits in between
+    conn.execute("BEGIN")
+    try:
+        ranked = conn.execute(f'''
+            SELECT rowid, rank FROM (
+                SELECT jobs_fts.rowid AS rowid, jobs_fts.rank AS rank
+                FROM jobs_fts {join}
+                WHERE jobs_fts MATCH ?{where}
+                ORDER BY jobs_fts.rowid DESC LIMIT ?
+            )
+            ORDER BY rank LIMIT ? OFFSET ?
+        ''', (match, *params, CANDIDATE_WINDOW, limit, offset)).fetchall()
+        if not ranked:
+            return []
+        placeholders = ",".join(f":rowid{i}" for i in range(len(ranked)))
+        # No ORDER BY rank here: FTS5 would rank every match again to answer it
+        rows = conn.execute(f'''
+            SELECT jobs_fts.rowid, jobs.job_id, jobs.title, jobs.company, jobs.city, jobs.country, jobs.job_link,
+                   jobs.scraped_date, jobs.duplicate_of,
+                   highlight(jobs_fts, 0, :open, :close),
+                   snippet(jobs_fts, 2, :open, :close, '…', :tokens)
+            FROM jobs_fts JOIN jobs ON jobs.job_id = jobs_fts.job_id
+            WHERE jobs_fts MATCH :match AND jobs_fts.rowid IN ({placeholders})
+        ''', {"match": match, "open": HIGHLIGHT_OPEN, "close": HIGHLIGHT_CLOSE, "tokens": SNIPPET_TOKENS,
+              **{f"rowid{i}": rowid for i, (rowid, _) in enumerate(ranked)}}).fetchall()
+    finally:
+        conn.commit()
+    keys = ("job_id", "title", "company", "city", "country", "job_link", "scraped_date", "duplicate_of",
+            "title_highlight", "snippet")
+    details = {row[0]: dict(zip(keys, row[1:])) for row in rows}
+    # bm25 is more negative for better matches
+    return [{**details[rowid], "score": -rank} for rowid, rank in ranked]
+
+
+@router.get("/search", response_model=JobSearchResponse)
+def search(
+    q: str = Query(..., min_length=1, description="words to find in the title, company or description; word* matches a prefix"),
+    city: Optional[str] = None,
+    country: Optional[str] = None,
+    scraped_from: Optional[date] = None,
+    scraped_to: Optional[date] = None,
+    limit: int = Query(20, ge=1, le=MAX_LIMIT),
+    offset: int = Query(0, ge=0, le=CANDIDATE_WINDOW - MAX_LIMIT),
+    conn: sqlite3.Connection = Depends(get_jobs_db),
+):
+    if not match_expression(q):
+        raise HTTPException(status_code=400, detail="The query has no searchable words.")
+    try:
+        results = search_jobs(conn, q, city, country, scraped_from, scraped_to, limit, offset)
+    except sqlite3.OperationalError as e:
+        raise HTTPException(status_code=503, detail=f"Job search is unavailable: {e}")
+    return {"query": q, "limit": limit, "offset": offset, "results": results}
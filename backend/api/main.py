@@ -4,6 +4,9 @@ from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
 from .resume_parser import parse_resume, Experience as ResumeExperience
+from .job_match import router as job_match_router
+from .job_search import router as job_search_router
+from .skill_demand import router as skill_demand_router
 
 app = FastAPI()
 
@@ -16,6 +19,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.include_router(job_search_router)
+app.include_router(job_match_router)
+app.include_router(skill_demand_router)
+
 class Experience(BaseModel):
     job_title: str
     company: str
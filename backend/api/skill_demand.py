@@ -0,0 +1,142 @@
+"""Skill demand over time, by city and by the search a job was found with.
+
+Reads the rollup tables that the scraper's triggers keep current (see
+backend/webscraping/skill_demand.py), so a request sums a few hundred
+pre-counted rows instead of scanning every tagged job.
+"""
+
+import sqlite3
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+
+from .job_search import get_jobs_db
+
+MAX_SKILLS = 100
+
+# Monday of the week of a date, as stored in skill_demand_weekly.week_start
+_WEEK_START = "date(?, 'weekday 0', '-6 days')"
+
+router = APIRouter(prefix="/api/skills/demand", tags=["skills"])
+
+
+class SkillTrend(BaseModel):
+    skill: str
+    total: int
+    # Jobs per week, aligned with WeeklyDemandResponse.weeks
+    weekly: List[int]
+
+
+class WeeklyDemandResponse(BaseModel):
+    # ISO weeks ("2026-W07") that have any tagged job, oldest first
+    weeks: List[str]
+    skills: List[SkillTrend]
+
+
+class TitleDemand(BaseModel):
+    search_title: str
+    skill: str
+    jobs: int
+
+
+def iso_week(week_start):
+    year, week, _ = date.fromisoformat(week_start).isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def weekly_demand(conn, start=None, end=None, city=None, country=None, skills=None, limit=20):
+    """The most demanded skills in the range, with their jobs per week.
+
+    Weeks are whole ISO weeks: start and end select the weeks they fall in.
+    """
+    clauses, params = [], []
+    if start:
+        clauses.append(f"week_start >= {_WEEK_START}")
+        params.append(start.isoformat())
+    if end:
+        clauses.append(f"week_start <= {_WEEK_START}")
+        params.append(end.isoformat())
+    if city:
+        clauses.append("city = ? COLLATE NOCASE")
+        params.append(city)
+    if country:
+        clauses.append("country = ? COLLATE NOCASE")
+        params.append(country)
+    if skills:
+        clauses.append(f"skills.name COLLATE NOCASE IN ({','.join('?' * len(skills))})")
+        params.extend(skills)
+    where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+
+    top = conn.execute(f'''
+        SELECT skill_id, skills.name, SUM(jobs) FROM skill_demand_weekly JOIN skills USING (skill_id)
+        {where}
+        GROUP BY skill_id ORDER BY 3 DESC, 2 LIMIT ?
+    ''', (*params, limit)).fetchall()
+    if not top:
+        return {"weeks": [], "skills": []}
+    placeholders = ",".join("?" * len(top))
+    counts = conn.execute(f'''
+        SELECT skill_id, week_start, SUM(jobs) FROM skill_demand_weekly JOIN skills USING (skill_id)
+        {where}{" AND" if where else "WHERE"} skill_id IN ({placeholders})
+        GROUP BY skill_id, week_start
+    ''', (*params, *(skill_id for skill_id, _, _ in top))).fetchall()
+    weeks = sorted({week_start for _, week_start, _ in counts})
+    column = {week_start: i for i, week_start in enumerate(weeks)}
+    weekly = {skill_id: [0] * len(weeks) for skill_id, _, _ in top}
+    for skill_id, week_start, jobs in counts:
+        weekly[skill_id][column[week_start]] = jobs
+    return {
+        "weeks": [iso_week(week_start) for week_start in weeks],
+        "skills": [{"skill": name, "total": total, "weekly": weekly[skill_id]} for skill_id, name, total in top],
+    }
+
+
+def title_demand(conn, search_title=None, limit=20):
+    """The most demanded skills for each search title, or for one of them."""
+    where, params = "", []
+    if search_title:
+        where = "WHERE search_title = ? COLLATE NOCASE"
+        params.append(search_title)
+    rows = conn.execute(f'''
+        SELECT search_title, name, jobs FROM (
+            SELECT search_title, skills.name AS name, jobs,
+                   ROW_NUMBER() OVER (PARTITION BY search_title ORDER BY jobs DESC, skills.name) AS place
+            FROM skill_demand_by_title JOIN skills USING (skill_id)
+            {where}
+        )
+        WHERE place <= ?
+        ORDER BY search_title, place
+    ''', (*params, limit)).fetchall()
+    return [{"search_title": title, "skill": name, "jobs": jobs} for title, name, jobs in rows]
+
+
+@router.get("/weekly", response_model=WeeklyDemandResponse)
+def get_weekly_demand(
+    start: Optional[date] = Query(None, description="first day of the range; counts its whole ISO week"),
+    end: Optional[date] = Query(None, description="last day of the range; counts its whole ISO week"),
+    city: Optional[str] = None,
+    country: Optional[str] = None,
+    skill: Optional[List[str]] = Query(None, description="only these skills; repeat for several"),
+    limit: int = Query(20, ge=1, le=MAX_SKILLS),
+    conn: sqlite3.Connection = Depends(get_jobs_db),
+):
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end.")
+    try:
+        return weekly_demand(conn, start, end, city, country, skill, limit)
+    except sqlite3.OperationalError as e:
+        raise HTTPException(status_code=503, detail=f"Skill demand is unavailable: {e}")
+
+
+@router.get("/titles", response_model=List[TitleDemand])
+def get_title_demand(
+    search_title: Optional[str] = Query(None, description="e.g. Data Engineer; all titles if omitted"),
+    limit: int = Query(20, ge=1, le=MAX_SKILLS, description="skills per title"),
+    conn: sqlite3.Connection = Depends(get_jobs_db),
+):
+    try:
+        return title_demand(conn, search_title, limit)
+    except sqlite3.OperationalError as e:
+        raise HTTPException(status_code=503, detail=f"Skill demand is unavailable: {e}")
@@ -0,0 +1,493 @@
+"""BM25 search of job descriptions for long free-text queries, such as a whole résumé.
+
+Résumés without a clean SKILLS section give parse_resume() no skills, so
+job_match.py falls back to this: the résumé text is the query, and jobs are
+ranked by Okapi BM25 (k1 = 1.2, b = 0.75) over their stored descriptions.
+
+The index is an inverted index on disk under TEXT_INDEX, in segments like
+the skill match index: each a directory of .npy files, memory-mapped when
+loaded, named after the range of jobs.description_seq it covers and a
+generation. A segment has
+
+    search_rowids, seqs, lengths
+                            per document: the job's jobs.search_rowid, its description_seq,
+                            its length in words
+    terms                   the sorted vocabulary, as fixed-width UTF-8
+    df, max_tf, min_length  per term: documents, and the bounds of its BM25 score
+    dense_rows, dense       the commonest terms, those in at least 1 / DENSE_FRACTION
+                            of the documents: their term frequency in every document,
+                            one byte each, instead of postings
+    term_blocks             per term: its first block
+    block_last, block_bytes, block_postings
+                            per block of BLOCK_SIZE postings: its last document,
+                            and where its postings start
+    postings                document numbers, delta-encoded as varints; the
+                            first of each block is absolute, so a block
+                            decodes on its own
+    tfs                     term frequencies, one byte each
+
+Queries use MaxScore. Terms are taken in order of their highest possible
+contribution. Postings are decoded in full, a batch of terms at a time, only
+while the terms still to come could lift an unseen job into the top k.
+After that, the remaining terms only look up the jobs already in the
+running: block_last finds the blocks that can hold them, and only those
+blocks are decoded; a dense term is read at those jobs directly. The common
+words of a long résumé ("experience", "team") are never read in full.
+
+A refresh appends a segment with the jobs whose description was stored or
+changed since the newest one (the scraper's writer gives them the next
+description_seq); a job counts in its newest document only. A job's older
+documents are superseded, and they still count in df until their segment
+is rebuilt from the database, which only returns the jobs whose
+description_seq is still in the segment's range. That happens to a segment
+once COMPACT_FRACTION of its documents are superseded, under the next
+generation of the same name, and to the small segments at the end once
+MERGE_AT of them pile up, as one segment over their combined range. The
+first build writes segments of SEGMENT_DOCS jobs, so building never holds
+more than that in memory.
+"""
+
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+from array import array
+from collections import Counter
+from itertools import chain, islice, repeat
+from pathlib import Path
+
+import numpy as np
+
+# The scraper's modules are top-level modules in their own directory
+_WEBSCRAPING = Path(__file__).resolve().parent.parent / "webscraping"
+if str(_WEBSCRAPING) not in sys.path:
+    sys.path.append(str(_WEBSCRAPING))
+from descriptions import decompress  # noqa: E402
+
+TEXT_INDEX = os.environ.get("JOB_TEXT_INDEX", str(_WEBSCRAPING / "text_index"))
+
+K1 = 1.2
+B = 0.75
+BLOCK_SIZE = 128
+SEGMENT_DOCS = 100_000
+# A term in at least 1 / DENSE_FRACTION of a segment's documents is stored
+# as a column of term frequencies rather than as postings
+DENSE_FRACTION = 8
+# Query terms decoded in the first batch; each batch after is twice the size
+FIRST_BATCH = 4
+MERGE_AT = 8
+# A segment is rebuilt without its superseded documents once this share of them is superseded
+COMPACT_FRACTION = 0.25
+REFRESH_SECONDS = 60
+# Longer words are dropped, so every term fits the fixed-width vocabulary
+MAX_TERM_BYTES = 32
+_TERM_DTYPE = f"S{MAX_TERM_BYTES}"
+
+_WORD_RE = re.compile(r'\w+')
+_SEGMENT_RE = re.compile(r'^seg-(\d+)-(\d+)-(\d+)$')
+_ARRAYS = ("search_rowids", "seqs", "lengths", "terms", "df", "max_tf", "min_length", "dense_rows", "dense",
+           "term_blocks", "block_last", "block_bytes", "block_postings", "postings", "tfs")
+
+def tokenize(text):
+    return [word for word in _WORD_RE.findall(text.lower())
+            if 1 < len(word) <= MAX_TERM_BYTES and not word.isdigit()
+            and (word.isascii() or len(word.encode("utf-8")) <= MAX_TERM_BYTES)]
+
+
+def encode_varints(values):
+    """LEB128: seven bits per byte, high bit set on all but a value's last byte."""
+    values = np.asarray(values, dtype=np.uint64)
+    sizes = np.ones(len(values), dtype=np.int64)
+    for bits in (7, 14, 21, 28):
+        sizes += values >= (1 << bits)
+    starts = np.cumsum(sizes) - sizes
+    encoded = np.empty(int(sizes.sum()), dtype=np.uint8)
+    for k in range(5):
+        has = sizes > k
+        more = (sizes[has] > k + 1).astype(np.uint64) << 7
+        encoded[starts[has] + k] = ((values[has] >> (7 * k)) & 0x7F) | more
+    return encoded, sizes
+
+
+def decode_varints(encoded):
+    encoded = np.asarray(encoded)
+    last = encoded < 0x80
+    low = (encoded & 0x7F).astype(np.int64)
+    if last.all():
+        # Every gap under 128, as in the lists of common words
+        return low
+    starts = np.flatnonzero(np.concatenate(([True], last[:-1])))
+    values = low[starts]
+    # Only the few longer values take more passes, one per extra byte
+    longer = np.flatnonzero(~last[starts])
+    for k in range(1, 5):
+        if not len(longer):
+            break
+        positions = starts[longer] + k
+        values[longer] |= low[positions] << (7 * k)
+        longer = longer[~last[positions]]
+    return values
+
+
+def _ranges(starts, ends):
+    """Concatenated aranges [start, end) for each pair."""
+    lengths = ends - starts
+    return np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+
+
+def write_segment(directory, first_seq, last_seq, generation, docs):
+    """Index docs, (rowid, seq, text) tuples, as a segment; returns its path or None if they have no terms.
+
+    first_seq and last_seq default to the lowest and highest seq of the docs.
+    """
+    rowids, seqs, lengths = array("q"), array("q"), array("l")
+    term_ids, doc_ids, tfs = array("l"), array("l"), array("l")
+    vocabulary = {}
+    for doc, (rowid, seq, text) in enumerate(docs):
+        words = tokenize(text)
+        counts = Counter(words)
+        rowids.append(rowid)
+        seqs.append(seq)
+        lengths.append(len(words))
+        term_ids.extend([vocabulary.setdefault(word, len(vocabulary)) for word in counts])
+        doc_ids.extend(repeat(doc, len(counts)))
+        tfs.extend(counts.values())
+    if not vocabulary:
+        # Only empty descriptions, say from failed fetches; they stay for the next refresh
+        return None
+    first_seq = min(seqs) if first_seq is None else first_seq
+    last_seq = max(seqs) if last_seq is None else last_seq
+
+    terms = np.array([word.encode("utf-8") for word in vocabulary], dtype=_TERM_DTYPE)
+    term_order = np.argsort(terms)
+    rank = np.empty_like(term_order)
+    rank[term_order] = np.arange(len(term_order))
+    term_ids = rank[np.frombuffer(term_ids, dtype=np.int64)]
+    # Documents were numbered in order, so a stable sort by term leaves each list sorted
+    order = np.argsort(term_ids, kind="stable")
+    term_ids = term_ids[order]
+    docs_sorted = np.frombuffer(doc_ids, dtype=np.int64)[order]
+    tfs = np.minimum(np.frombuffer(tfs, dtype=np.int64)[order], 255).astype(np.uint8)
+    lengths = np.frombuffer(lengths, dtype=np.int64)
+
+    df = np.bincount(term_ids, minlength=len(terms))
+    term_starts = np.concatenate(([0], np.cumsum(df)))
+    max_tf = np.maximum.reduceat(tfs, term_starts[:-1])
+    min_length = np.minimum.reduceat(lengths[docs_sorted], term_starts[:-1]).astype(np.uint32)
+
+    # The commonest terms get a column of term frequencies instead of postings
+    dense_terms = np.flatnonzero(df * DENSE_FRACTION >= len(lengths))
+    dense_rows = np.full(len(terms), -1, dtype=np.int32)
+    dense_rows[dense_terms] = np.arange(len(dense_terms))
+    dense = np.zeros((len(dense_terms), len(lengths)), dtype=np.uint8)
+    in_dense = dense_rows[term_ids] >= 0
+    dense[dense_rows[term_ids[in_dense]], docs_sorted[in_dense]] = tfs[in_dense]
+    term_ids, docs_sorted, tfs = term_ids[~in_dense], docs_sorted[~in_dense], tfs[~in_dense]
+
+    listed = np.bincount(term_ids, minlength=len(terms))
+    term_starts = np.concatenate(([0], np.cumsum(listed)))
+    position = np.arange(len(term_ids)) - np.repeat(term_starts[:-1], listed)
+    block_firsts = np.flatnonzero(position % BLOCK_SIZE == 0)
+    block_postings = np.append(block_firsts, len(term_ids))
+    gaps = np.diff(docs_sorted, prepend=0)
+    gaps[block_firsts] = docs_sorted[block_firsts]
+    postings, sizes = encode_varints(gaps)
+    byte_offsets = np.concatenate(([0], np.cumsum(sizes)))
+
+    arrays = {
+        "search_rowids": np.frombuffer(rowids, dtype=np.int64),
+        "seqs": np.frombuffer(seqs, dtype=np.int64),
+        "lengths": lengths.astype(np.uint32),
+        "terms": terms[term_order],
+        "df": df.astype(np.uint32),
+        "max_tf": max_tf,
+        "min_length": min_length,
+        "dense_rows": dense_rows,
+        "dense": dense,
+        "term_blocks": np.concatenate(([0], np.cumsum((listed + BLOCK_SIZE - 1) // BLOCK_SIZE))),
+        "block_last": docs_sorted[block_postings[1:] - 1].astype(np.uint32),
+        "block_bytes": byte_offsets[block_postings],
+        "block_postings": block_postings,
+        "postings": postings,
+        "tfs": tfs,
+    }
+    name = f"seg-{first_seq:010d}-{last_seq:010d}-{generation:04d}"
+    path = os.path.join(directory, name)
+    tmp_path = os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for key, values in arrays.items():
+        np.save(os.path.join(tmp_path, key + ".npy"), values)
+    try:
+        os.rename(tmp_path, path)
+    except OSError:
+        # Already written, from the same snapshot, by another process
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    return path
+
+
+class Segment:
+    def __init__(self, path):
+        match = _SEGMENT_RE.match(os.path.basename(path))
+        self.path = path
+        self.first_seq, self.last_seq, self.generation = (int(group) for group in match.groups())
+        for key in _ARRAYS:
+            setattr(self, key, np.load(os.path.join(path, key + ".npy"), mmap_mode="r"))
+
+    def __len__(self):
+        return len(self.search_rowids)
+
+    def find(self, keys):
+        """Term numbers of keys (sorted, encoded terms) in this segment, -1 where absent."""
+        positions = np.minimum(np.searchsorted(self.terms, keys), len(self.terms) - 1)
+        return np.where(self.terms[positions] == keys, positions, -1)
+
+    def decode(self, blocks):
+        """(documents, term frequencies) of the postings in the given blocks, in order."""
+        if len(blocks) == 1 or (len(blocks) and blocks[-1] - blocks[0] == len(blocks) - 1):
+            # A contiguous run, which is how a whole term is read
+            encoded = self.postings[self.block_bytes[blocks[0]]:self.block_bytes[blocks[-1] + 1]]
+            tfs = self.tfs[self.block_postings[blocks[0]]:self.block_postings[blocks[-1] + 1]]
+        else:
+            encoded = self.postings[_ranges(self.block_bytes[blocks], self.block_bytes[blocks + 1])]
+            tfs = self.tfs[_ranges(self.block_postings[blocks], self.block_postings[blocks + 1])]
+        values = decode_varints(encoded)
+        counts = self.block_postings[blocks + 1] - self.block_postings[blocks]
+        # Undo the deltas block by block; each block starts from an absolute document
+        totals = np.cumsum(values)
+        firsts = np.cumsum(counts) - counts
+        docs = totals - np.repeat(totals[firsts] - values[firsts], counts)
+        return docs, np.asarray(tfs, dtype=np.float32)
+
+
+def _list_segments(directory):
+    """Paths of the segments to load, and those covered by a merged or compacted segment."""
+    found = []
+    for name in os.listdir(directory):
+        match = _SEGMENT_RE.match(name)
+        if match:
+            found.append((*(int(group) for group in match.groups()), os.path.join(directory, name)))
+    covered = [path for first, last, generation, path in found
+               if any(f <= first and last <= l and ((f, l) != (first, last) or g > generation)
+                      for f, l, g, _ in found)]
+    kept = sorted(item for item in found if item[3] not in covered)
+    return [item[3] for item in kept], covered
+
+
+class _View:
+    """The loaded segments with the collection statistics BM25 needs; never changed once built."""
+
+    def __init__(self, segments):
+        self.segments = segments
+        self.last_seq = max((segment.last_seq for segment in segments), default=None)
+        rowids = np.concatenate([segment.search_rowids for segment in segments]) if segments else np.zeros(0, np.int64)
+        seqs = np.concatenate([segment.seqs for segment in segments]) if segments else np.zeros(0, np.int64)
+        # A job indexed several times counts in its newest document only
+        order = np.lexsort((seqs, rowids))
+        newest = np.ones(len(order), dtype=bool)
+        newest[:-1] = rowids[order[:-1]] != rowids[order[1:]]
+        live = np.zeros(len(rowids), dtype=bool)
+        live[order[newest]] = True
+        offsets = np.cumsum([0] + [len(segment) for segment in segments])
+        self.live = [live[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+        self.jobs = int(live.sum())
+        total_length = sum(float(np.asarray(segment.lengths)[alive].sum())
+                           for segment, alive in zip(segments, self.live))
+        self.average_length = total_length / self.jobs if self.jobs else 1.0
+        # The length part of BM25's denominator, per document
+        self.length_norms = [(K1 * (1 - B + B * np.asarray(segment.lengths, dtype=np.float32) / self.average_length))
+                             .astype(np.float32) for segment in segments]
+
+
+class TextIndex:
+    """The on-disk BM25 index of one jobs database; safe to share between threads."""
+
+    def __init__(self, directory=TEXT_INDEX):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._refreshed = None
+        os.makedirs(directory, exist_ok=True)
+        self.view = self._load()
+
+    def _load(self):
+        paths, covered = _list_segments(self.directory)
+        # Merged away; processes that still map them keep their pages
+        for path in covered:
+            shutil.rmtree(path, ignore_errors=True)
+        return _View([Segment(path) for path in paths])
+
+    def refresh(self, conn, min_interval=REFRESH_SECONDS):
+        """Index the jobs described since the newest segment, at most once per min_interval seconds."""
+        now = time.monotonic()
+        if self._refreshed is not None and now - self._refreshed < min_interval:
+            return
+        with self._lock:
+            if self._refreshed is not None and now - self._refreshed < min_interval:
+                return
+            self._refreshed = now
+            view = self.view
+            conn.execute("BEGIN")
+            try:
+                (max_seq,) = conn.execute('SELECT COALESCE(MAX(description_seq), 0) FROM jobs').fetchone()
+                if view.last_seq is None:
+                    added = self._write_from_database(conn, "1", ())
+                elif max_seq > view.last_seq:
+                    added = self._write_from_database(conn, "jobs.description_seq > ?", (view.last_seq,))
+                else:
+                    return
+                view = _View(view.segments + [Segment(path) for path in added])
+                # Small segments appended by refreshes, newest last
+                tail = []
+                for segment in reversed(view.segments):
+                    if len(segment) + sum(map(len, tail)) > SEGMENT_DOCS:
+                        break
+                    tail.append(segment)
+                merged = tail if len(tail) >= MERGE_AT else []
+                rebuild = [merged] if merged else []
+                # Segments with many superseded documents, wherever they are
+                rebuild += [[segment] for segment, live in zip(view.segments, view.live)
+                            if all(segment is not other for other in merged)
+                            and len(segment) - live.sum() >= COMPACT_FRACTION * len(segment)]
+                for segments in rebuild:
+                    self._rebuild(conn, segments)
+            finally:
+                conn.rollback()
+            self.view = self._load() if rebuild else view
+
+    def _rebuild(self, conn, segments):
+        """Rebuild the range of segments from the database as one segment that supersedes them."""
+        first, last = min(segment.first_seq for segment in segments), max(segment.last_seq for segment in segments)
+        generation = max(segment.generation for segment in segments) + 1
+        if not self._write_from_database(conn, "jobs.description_seq BETWEEN ? AND ?", (first, last),
+                                         first, last, generation):
+            # None of their jobs is still described in that range with any words
+            for segment in segments:
+                shutil.rmtree(segment.path, ignore_errors=True)
+
+    def _write_from_database(self, conn, where, params, first_seq=None, last_seq=None, generation=0):
+        cursor = conn.execute(f'''
+            SELECT jobs.search_rowid, jobs.description_seq, jobs.description, descriptions.codec, descriptions.body
+            FROM jobs LEFT JOIN descriptions ON descriptions.hash = jobs.description_hash
+            WHERE ({where}) AND jobs.search_rowid IS NOT NULL ORDER BY jobs.description_seq
+        ''', params)
+        # jobs.description is only set on rows older than the descriptions table
+        docs = ((rowid, seq, text if text is not None else decompress(codec, body) or "")
+                for rowid, seq, text, codec, body in cursor)
+        paths = []
+        while True:
+            chunk = islice(docs, SEGMENT_DOCS)
+            first = next(chunk, None)
+            if first is None:
+                return paths
+            path = write_segment(self.directory, first_seq, last_seq, generation, chain([first], chunk))
+            if path is not None:
+                paths.append(path)
+
+    def search(self, text, limit=20):
+        """Top (search_rowid, score) for a free-text query, best first."""
+        view = self.view
+        words = sorted({word.encode("utf-8") for word in tokenize(text)})
+        if not words or not view.jobs:
+            return []
+        keys = np.array(words, dtype=_TERM_DTYPE)
+        term_numbers = [segment.find(keys) for segment in view.segments]
+
+        # Collection statistics of each query term, and the most it can add to a score
+        df = np.zeros(len(keys))
+        max_tf = np.zeros(len(keys))
+        min_length = np.full(len(keys), np.inf)
+        for segment, numbers in zip(view.segments, term_numbers):
+            found = numbers >= 0
+            df[found] += segment.df[numbers[found]]
+            max_tf[found] = np.maximum(max_tf[found], segment.max_tf[numbers[found]])
+            min_length[found] = np.minimum(min_length[found], segment.min_length[numbers[found]])
+        present = df > 0
+        if not present.any():
+            return []
+        # Superseded documents still count in df until their segment is rebuilt
+        df = np.minimum(df, view.jobs)
+        idf = np.log(1 + (view.jobs - df + 0.5) / (df + 0.5))
+        bounds = np.where(present, idf * max_tf * (K1 + 1) / (
+            max_tf + K1 * (1 - B + B * np.where(present, min_length, 0) / view.average_length)), 0)
+        order = np.argsort(-bounds, kind="stable")[:int(present.sum())]
+        # What the terms from each position on can add at most
+        remaining = np.cumsum(bounds[order][::-1])[::-1]
+
+        remaining = np.append(remaining, 0)
+
+        best_scores, best_rowids = np.zeros(0, np.float32), np.zeros(0, np.int64)
+        threshold = 0.0
+        # Largest segment first, so the threshold is high for the others
+        for index in sorted(range(len(view.segments)), key=lambda i: -len(view.segments[i])):
+            segment, numbers = view.segments[index], term_numbers[index]
+            live, length_norms = view.live[index], view.length_norms[index]
+            scores = np.zeros(len(segment), dtype=np.float32)
+
+            position, batch = 0, FIRST_BATCH
+            # Decode whole lists while an unseen document could still make the top k.
+            # Terms go in batches of doubling size, each one vectorized pass; the
+            # threshold is brought up to date between batches.
+            while remaining[position] > threshold:
+                end = position + 1
+                while end < len(order) and end - position < batch and remaining[end] > threshold:
+                    end += 1
+                terms = order[position:end]
+                terms = terms[numbers[terms] >= 0]
+                position, batch = end, batch * 2
+                rows = segment.dense_rows[numbers[terms]]
+                for term, row in zip(terms[rows >= 0], rows[rows >= 0]):
+                    tfs = segment.dense[row].astype(np.float32)
+                    scores += idf[term] * tfs * (K1 + 1) / (tfs + length_norms) * live
+                terms = terms[rows < 0]
+                if not len(terms):
+                    continue
+                firsts = segment.term_blocks[numbers[terms]]
+                docs, tfs = segment.decode(_ranges(firsts, segment.term_blocks[numbers[terms] + 1]))
+                weights = np.repeat(idf[terms].astype(np.float32), segment.df[numbers[terms]])
+                contributions = weights * tfs * (K1 + 1) / (tfs + length_norms[docs]) * live[docs]
+                scores += np.bincount(docs, contributions, minlength=len(segment)).astype(np.float32)
+                if len(scores) >= limit:
+                    threshold = max(threshold, float(np.partition(scores, len(scores) - limit)[len(scores) - limit]))
+
+            # The rest only add to documents already in the running
+            candidates = np.flatnonzero((scores > 0) & (scores + remaining[position] >= threshold))
+            while position < len(order) and len(candidates):
+                term, number = order[position], numbers[order[position]]
+                position += 1
+                if number < 0:
+                    pass
+                elif segment.dense_rows[number] >= 0 and len(candidates) * DENSE_FRACTION < len(segment):
+                    # A common term: read its frequency in each candidate
+                    docs = candidates
+                    tfs = segment.dense[segment.dense_rows[number], docs].astype(np.float32)
+                    scores[docs] += idf[term] * tfs * (K1 + 1) / (tfs + length_norms[docs]) * live[docs]
+                elif segment.dense_rows[number] >= 0:
+                    # With this many candidates a pass over the whole column is cheaper;
+                    # what it adds to the others makes no difference
+                    tfs = segment.dense[segment.dense_rows[number]].astype(np.float32)
+                    scores += idf[term] * tfs * (K1 + 1) / (tfs + length_norms) * live
+                else:
+                    first_block = segment.term_blocks[number]
+                    last_docs = segment.block_last[first_block:segment.term_blocks[number + 1]]
+                    blocks = np.unique(np.searchsorted(last_docs, candidates))
+                    blocks = blocks[blocks < len(last_docs)] + first_block
+                    docs, tfs = segment.decode(blocks)
+                    hits = np.isin(docs, candidates, assume_unique=True)
+                    docs, tfs = docs[hits], tfs[hits]
+                    scores[docs] += idf[term] * tfs * (K1 + 1) / (tfs + length_norms[docs]) * live[docs]
+                if len(candidates) >= limit:
+                    top = scores[candidates]
+                    threshold = max(threshold, float(np.partition(top, len(top) - limit)[len(top) - limit]))
+                candidates = candidates[scores[candidates] + remaining[position] >= threshold]
+
+            best_scores = np.concatenate([best_scores, scores[candidates]])
+            best_rowids = np.concatenate([best_rowids, segment.search_rowids[candidates]])
+            if len(best_scores) > limit:
+                keep = np.argpartition(-best_scores, limit - 1)[:limit]
+                best_scores, best_rowids = best_scores[keep], best_rowids[keep]
+                threshold = max(threshold, float(best_scores.min()))
+        ranked = np.argsort(-best_scores, kind="stable")
+        return [(int(best_rowids[i]), float(best_scores[i])) for i in ranked]
@@ -0,0 +1,8 @@
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The scrapers import each other as top-level modules, run from their own
+# directory; the API is imported as the api package from backend/
+sys.path[:0] = [os.path.join(BACKEND_DIR, "webscraping"), BACKEND_DIR]
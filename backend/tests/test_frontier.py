@@ -0,0 +1,100 @@
+"""Leases, reclaims and give-ups in the shared crawl frontier."""
+
+import multiprocessing
+import time
+
+from frontier import Frontier
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _frontier(tmp_path, clock, **options):
+    return Frontier(str(tmp_path / "frontier.db"), lease_seconds=60, clock=clock, **options)
+
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    clock = FakeClock()
+    frontier = _frontier(tmp_path, clock)
+    frontier.seed([("Data Analyst", "Sydney", 100)])
+    item = frontier.claim("a")
+    assert (item.job_title, item.city, item.page, item.attempts) == ("Data Analyst", "Sydney", 0, 1)
+    assert frontier.claim("b") is None
+    clock.now += 61
+    reclaimed = frontier.claim("b")
+    assert reclaimed.page == 0 and reclaimed.attempts == 2
+
+
+def test_lost_lease_cannot_be_renewed_or_completed(tmp_path):
+    clock = FakeClock()
+    frontier = _frontier(tmp_path, clock)
+    frontier.seed([("Data Analyst", "Sydney", 100)])
+    item = frontier.claim("a")
+    assert frontier.renew(item, "a")
+    clock.now += 61
+    reclaimed = frontier.claim("b")
+    assert not frontier.renew(item, "a")
+    assert not frontier.complete(item, "a", next_max_jobs=75)
+    assert frontier.status_counts() == {"leased": 1}
+    assert frontier.complete(reclaimed, "b", next_max_jobs=75)
+    assert frontier.claim("b").page == 1
+
+
+def test_gives_up_after_max_attempts(tmp_path):
+    clock = FakeClock()
+    frontier = _frontier(tmp_path, clock, max_attempts=2)
+    frontier.seed([("Data Analyst", "Sydney", 100)])
+    assert frontier.claim("a").attempts == 1
+    clock.now += 61
+    assert frontier.claim("b").attempts == 2
+    clock.now += 61
+    assert frontier.claim("c") is None
+    assert frontier.status_counts() == {"failed": 1}
+    assert not frontier.has_open_work()
+
+
+def test_release_after_max_attempts(tmp_path):
+    frontier = _frontier(tmp_path, FakeClock(), max_attempts=1)
+    frontier.seed([("Data Analyst", "Sydney", 100)])
+    frontier.release(frontier.claim("a"), "a")
+    assert frontier.status_counts() == {"failed": 1}
+
+
+def _claim_all(db_name, owner, start, results):
+    frontier = Frontier(db_name)
+    start.wait()
+    claimed = []
+    while (item := frontier.claim(owner)) is not None:
+        claimed.append((item.job_title, item.city, item.page))
+        # Fetching the page, which leaves the write lock free for the other worker
+        time.sleep(0.001)
+        frontier.complete(item, owner)
+    frontier.close()
+    results.put(claimed)
+
+
+def test_two_processes_never_claim_the_same_item(tmp_path):
+    db_name = str(tmp_path / "frontier.db")
+    searches = [(f"title {i}", city, 100) for i in range(100) for city in ("Sydney", "Melbourne")]
+    frontier = Frontier(db_name)
+    frontier.seed(searches)
+    frontier.close()
+
+    context = multiprocessing.get_context("spawn")
+    # Both start claiming at once, so their claims interleave
+    start, results = context.Barrier(2), context.Queue()
+    workers = [context.Process(target=_claim_all, args=(db_name, f"worker {i}", start, results)) for i in range(2)]
+    for worker in workers:
+        worker.start()
+    claimed = [results.get(timeout=60) for _ in workers]
+    for worker in workers:
+        worker.join()
+
+    all_claims = claimed[0] + claimed[1]
+    assert claimed[0] and claimed[1]
+    assert len(all_claims) == len(set(all_claims)) == len(searches)
@@ -0,0 +1,35 @@
+"""Résumé matches still point at the right jobs once jobs.rowid is renumbered.
+
+jobs has a TEXT primary key, so VACUUM may renumber its rowids, and a dump
+and reload does.
+"""
+
+from api.job_match import JobMatchIndex, match_jobs, match_text
+from api.text_index import TextIndex
+from jobstore import JobWriter, connect
+
+DESCRIPTIONS = {
+    "python": "Python developer building SQL pipelines with Airflow",
+    "java": "Java developer on Kubernetes and AWS",
+    "react": "React and TypeScript front end developer",
+}
+
+
+def test_matches_after_renumbering(tmp_path):
+    conn = connect(str(tmp_path / "jobs.db"))
+    with JobWriter(conn, detect_duplicates=False) as writer:
+        writer.write([{"job_id": job_id, "title": "Developer", "company": "Acme", "city": "Sydney",
+                       "country": "Australia", "description": description,
+                       "job_link": f"https://example.com/jobs/view/{job_id}", "source_url": "https://example.com",
+                       "source_site": "LinkedIn"} for job_id, description in DESCRIPTIONS.items()])
+    index, text_index = JobMatchIndex(str(tmp_path / "match")), TextIndex(str(tmp_path / "text"))
+    index.refresh(conn, min_interval=0)
+    text_index.refresh(conn, min_interval=0)
+
+    # Every job takes the next one's rowid
+    with conn:
+        conn.execute("UPDATE jobs SET rowid = rowid + 10")
+        conn.execute("UPDATE jobs SET rowid = (rowid - 10) % 3 + 1")
+    found = match_jobs(conn, index, ["Python", "SQL", "Airflow"])
+    assert found["method"] == "skills" and found["results"][0]["job_id"] == "python"
+    assert [job["job_id"] for job in match_text(conn, text_index, "kubernetes aws", limit=1)] == ["java"]
@@ -0,0 +1,16 @@
+"""The single-pass description normalizer against the chained re.sub it replaced."""
+
+import pytest
+
+from bench_normalizer import fixture_corpus, fuzz_strings, legacy_format
+from parsing import format_job_description
+
+
+@pytest.mark.parametrize("text", fixture_corpus())
+def test_fixture_descriptions(text):
+    assert format_job_description(text) == legacy_format(text)
+
+
+def test_fuzz_strings():
+    mismatches = [text for text in fuzz_strings(5000) if format_job_description(text) != legacy_format(text)]
+    assert not mismatches
@@ -0,0 +1,32 @@
+"""What a census trusts about a search-result page."""
+
+import os
+
+from parsing import parse_census_page
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "webscraping", "fixtures")
+
+
+def _fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+        return f.read()
+
+
+def test_whole_last_page():
+    cards, complete, reported = parse_census_page(_fixture("search_results_last_page.html"))
+    assert len(cards) == 7 and complete and reported is None
+
+
+def test_cut_off_page():
+    html = _fixture("search_results.html")
+    cards, complete, _ = parse_census_page(html[:len(html) // 2])
+    assert len(cards) < 25 and not complete
+
+
+def test_page_without_results_list():
+    assert parse_census_page(b"<html><body>Sign in to see more jobs</body></html>") == ([], False, None)
+
+
+def test_reported_job_count():
+    html = _fixture("search_results.html")
+    assert parse_census_page(html.replace(b">1,000+<", b">1,234<"))[2] == 1234
@@ -0,0 +1,131 @@
+"""Health-based proxy selection, ejection and readmission, on a fake clock."""
+
+import random
+from collections import Counter
+
+from proxies import ProxyPool
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FirstTwo:
+    """rng whose sample() always offers the first two proxies, in order."""
+
+    def sample(self, population, k):
+        return population[:k]
+
+
+def _pool(urls, clock, rng=None):
+    return ProxyPool(urls, clock=clock, rng=rng or FirstTwo())
+
+
+def _responses(pool, proxy, status, count, latency=0.1):
+    for _ in range(count):
+        # As if acquire() had picked it
+        proxy.in_flight += 1
+        pool.release(proxy, status, latency)
+
+
+def test_ejected_on_error_rate():
+    clock = FakeClock()
+    pool = _pool(["http://a:1", "http://b:1"], clock)
+    a = pool.proxies[0]
+    # 1 - 0.8 ** 4 is over the 50% threshold, but 4 is short of min_samples
+    _responses(pool, a, None, 4)
+    assert a.ejected_until == 0.0
+    _responses(pool, a, None, 1)
+    assert a.ejected_until == clock.now + 30
+
+
+def test_ejected_on_429_rate():
+    clock = FakeClock()
+    pool = _pool(["http://a:1", "http://b:1"], clock)
+    a = pool.proxies[0]
+    _responses(pool, a, 200, 5)
+    _responses(pool, a, 429, 3)
+    assert a.ejected_until == 0.0
+    _responses(pool, a, 429, 1)
+    assert a.ejected_until == clock.now + 30
+
+
+def test_ejection_time_doubles_up_to_the_cap():
+    clock = FakeClock()
+    pool = ProxyPool(["http://a:1", "http://b:1"], max_eject_seconds=200, clock=clock, rng=FirstTwo())
+    a = pool.proxies[0]
+    durations = []
+    for _ in range(5):
+        _responses(pool, a, None, 5)
+        durations.append(a.ejected_until - clock.now)
+        clock.now = a.ejected_until
+        pool.acquire()
+    assert durations == [30, 60, 120, 200, 200]
+
+
+def test_good_record_resets_the_ejection_time():
+    clock = FakeClock()
+    pool = _pool(["http://a:1", "http://b:1"], clock)
+    a = pool.proxies[0]
+    _responses(pool, a, None, 5)
+    clock.now = a.ejected_until
+    pool.acquire()
+    _responses(pool, a, 200, 5)
+    _responses(pool, a, None, 5)
+    assert a.ejected_until - clock.now == 30
+
+
+def test_readmitted_with_a_clean_record():
+    clock = FakeClock()
+    pool = _pool(["http://a:1", "http://b:1"], clock)
+    a, b = pool.proxies
+    _responses(pool, a, 200, 5)
+    _responses(pool, a, None, 5)
+    assert all(pool.acquire() is b for _ in range(10))
+    clock.now = a.ejected_until
+    assert pool.acquire() is a
+    assert a.ejected_until == 0.0
+    assert (a.samples, a.error_rate, a.throttle_rate, a.latency) == (0, 0.0, 0.0, None)
+    assert a.errors == 5
+
+
+def test_last_proxy_is_never_ejected():
+    clock = FakeClock()
+    pool = _pool(["http://a:1"], clock)
+    _responses(pool, pool.proxies[0], None, 20)
+    assert pool.proxies[0].ejected_until == 0.0
+
+    pool = _pool(["http://a:1", "http://b:1"], clock)
+    a, b = pool.proxies
+    _responses(pool, a, None, 5)
+    _responses(pool, b, None, 20)
+    assert a.ejected_until > clock.now and b.ejected_until == 0.0
+
+
+def test_better_of_two_random_proxies():
+    clock = FakeClock()
+    pool = _pool(["http://fast", "http://medium", "http://slow"], clock, rng=random.Random(0))
+    for proxy, latency in zip(pool.proxies, (0.1, 0.2, 0.5)):
+        _responses(pool, proxy, 200, 1, latency)
+    picked = Counter()
+    for _ in range(3000):
+        proxy = pool.acquire()
+        picked[proxy.name] += 1
+        # Keeps every latency as it was
+        pool.release(proxy, 200, proxy.latency)
+    # The slowest never wins a pair; the fastest wins every pair it is in
+    assert picked["slow"] == 0
+    assert 1800 < picked["fast"] < 2200 and picked["medium"] == 3000 - picked["fast"]
+
+
+def test_queued_requests_count_against_a_proxy():
+    clock = FakeClock()
+    pool = _pool(["http://fast", "http://slow"], clock)
+    fast, slow = pool.proxies
+    _responses(pool, fast, 200, 1, 0.1)
+    _responses(pool, slow, 200, 1, 0.25)
+    assert [pool.acquire().name for _ in range(3)] == ["fast", "fast", "slow"]
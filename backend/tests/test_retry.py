@@ -0,0 +1,169 @@
+"""Retry-After parsing, the backoff schedule and the circuit breaker's states."""
+
+import asyncio
+import random
+from datetime import datetime, timezone
+
+import pytest
+
+from AsyncScrape import Fetcher
+from retry import CircuitBreaker, FetchError, RetryPolicy, parse_retry_after
+from scheduler import RequestScheduler
+
+NOW = datetime(2026, 10, 18, 12, 0, 0, tzinfo=timezone.utc)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_retry_after_seconds():
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after(" 0 ") == 0.0
+
+
+def test_retry_after_http_date():
+    assert parse_retry_after("Sun, 18 Oct 2026 12:01:30 GMT", now=NOW) == 90.0
+    # A date in the past means "now"
+    assert parse_retry_after("Sun, 18 Oct 2026 11:00:00 GMT", now=NOW) == 0.0
+
+
+@pytest.mark.parametrize("value", [None, "", "soon", "-5", "1.5"])
+def test_retry_after_unusable(value):
+    assert parse_retry_after(value, now=NOW) is None
+
+
+def test_backoff_bounds():
+    policy = RetryPolicy(base_delay=2.0, max_delay=60.0, rng=random.Random(0))
+    for attempt in range(1, 10):
+        delays = [policy.backoff(attempt) for _ in range(200)]
+        assert 0 <= min(delays) and max(delays) <= min(60.0, 2.0 * 2 ** attempt)
+        # Full jitter: the delays spread over the whole range
+        assert max(delays) > 0.9 * min(60.0, 2.0 * 2 ** attempt)
+
+
+def test_backoff_honours_retry_after_up_to_the_cap():
+    policy = RetryPolicy(base_delay=2.0, max_retry_after=300.0, rng=random.Random(0))
+    assert policy.backoff(1, "45") == 45.0
+    assert policy.backoff(1, "3600") == 300.0
+    # A shorter Retry-After doesn't cut the backoff
+    shorter = RetryPolicy(base_delay=2.0, rng=random.Random(0)).backoff(1, "0")
+    assert shorter > 0 and shorter == RetryPolicy(base_delay=2.0, rng=random.Random(0)).backoff(1)
+
+
+class ScriptedFetcher(Fetcher):
+    """Fetcher whose attempts return the given statuses instead of going out."""
+
+    def __init__(self, statuses, policy):
+        super().__init__(None, RequestScheduler(), None, retry_policy=policy)
+        self.statuses = list(statuses)
+        self.attempts = 0
+
+    async def _request(self, host, url, labels):
+        self.attempts += 1
+        status = self.statuses.pop(0)
+        return status, b"body" if status < 400 else None, None
+
+
+def _fetch(fetcher):
+    return asyncio.run(fetcher.get("https://example.com/jobs"))
+
+
+def test_attempt_cap():
+    fetcher = ScriptedFetcher([503] * 10, RetryPolicy(max_attempts=3, base_delay=0.0))
+    with pytest.raises(FetchError) as error:
+        _fetch(fetcher)
+    assert fetcher.attempts == 3 and error.value.status == 503
+
+
+def test_success_after_a_retry():
+    fetcher = ScriptedFetcher([429, 200], RetryPolicy(max_attempts=3, base_delay=0.0))
+    assert _fetch(fetcher) == b"body" and fetcher.attempts == 2
+
+
+def test_permanent_error_is_not_retried():
+    fetcher = ScriptedFetcher([404, 200], RetryPolicy(max_attempts=3, base_delay=0.0))
+    with pytest.raises(FetchError):
+        _fetch(fetcher)
+    assert fetcher.attempts == 1
+
+
+def _breaker(clock):
+    return CircuitBreaker("example.com", window=10, min_requests=4, failure_threshold=0.5, cooldown=30.0,
+                          clock=clock)
+
+
+def _opened(clock):
+    breaker = _breaker(clock)
+    for ok in (True, False, True, False):
+        breaker.record(ok)
+    assert breaker.state == CircuitBreaker.OPEN and breaker.trips == 1
+    # Past the cool-down and its jitter
+    clock.now += 30 * 1.2
+    return breaker
+
+
+def test_breaker_stays_closed_below_threshold():
+    breaker = _breaker(FakeClock())
+    for ok in (True, False, True, True, False, True):
+        breaker.record(ok)
+    assert breaker.state == CircuitBreaker.CLOSED
+    # Too few outcomes to judge yet
+    breaker = _breaker(FakeClock())
+    for _ in range(3):
+        breaker.record(False)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_probe_succeeds():
+    clock = FakeClock()
+    breaker = _opened(clock)
+    asyncio.run(breaker.wait())
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.record(True)
+    assert breaker.state == CircuitBreaker.CLOSED
+    # The failures from before the trip are forgotten
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_probe_fails():
+    clock = FakeClock()
+    breaker = _opened(clock)
+    asyncio.run(breaker.wait())
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN and breaker.trips == 2
+
+
+def test_breaker_ignores_late_results_while_open():
+    breaker = _opened(FakeClock())
+    breaker.record(True)
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_breaker_lets_one_probe_through():
+    clock = FakeClock()
+    breaker = _opened(clock)
+
+    async def second_request_waits():
+        await breaker.wait()
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(breaker.wait(), 0.05)
+
+    asyncio.run(second_request_waits())
+
+
+def test_breaker_probe_that_never_reports_back():
+    clock = FakeClock()
+    breaker = _opened(clock)
+    asyncio.run(breaker.wait())
+    # The probe was cancelled and never recorded; after a cool-down another goes out
+    clock.now += 30
+    asyncio.run(asyncio.wait_for(breaker.wait(), 0.05))
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.record(True)
+    assert breaker.state == CircuitBreaker.CLOSED
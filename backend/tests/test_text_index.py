@@ -0,0 +1,95 @@
+"""What refreshes of the BM25 index pick up, and what they leave behind."""
+
+from api.text_index import TextIndex
+from jobstore import JobWriter, connect
+
+
+def _job(job_id, description):
+    return {"job_id": job_id, "title": "Data Engineer", "company": "Acme", "city": "Toronto",
+            "country": "Canada", "description": description, "job_link": f"https://example.com/{job_id}",
+            "source_url": "https://example.com/search", "source_site": "LinkedIn"}
+
+
+def test_refresh_with_only_empty_descriptions(tmp_path):
+    conn = connect(str(tmp_path / "jobs.db"))
+    index = TextIndex(str(tmp_path / "index"))
+    with JobWriter(conn, detect_duplicates=False) as writer:
+        writer.write([_job("1", "Python and SQL pipelines"), _job("2", "Kubernetes operations")])
+    index.refresh(conn, min_interval=0)
+    segments = len(index.view.segments)
+
+    # Failed description fetches are stored as ""
+    with JobWriter(conn, detect_duplicates=False) as writer:
+        writer.write([_job("3", ""), _job("4", "")])
+    index.refresh(conn, min_interval=0)
+    assert len(index.view.segments) == segments
+    assert [rowid for rowid, _ in index.search("python pipelines")] == [
+        conn.execute("SELECT search_rowid FROM jobs WHERE job_id = '1'").fetchone()[0]]
+
+    # The empty jobs are indexed with the next jobs that have any words
+    with JobWriter(conn, detect_duplicates=False) as writer:
+        writer.write([_job("5", "Python notebooks")])
+    index.refresh(conn, min_interval=0)
+    assert len(index.view.segments) == segments + 1
+    assert len(index.view.segments[-1]) == 3
+    assert len(index.search("python")) == 2
+
+
+
+def test_refresh_without_skill_tagging(tmp_path):
+    conn = connect(str(tmp_path / "jobs.db"))
+    index = TextIndex(str(tmp_path / "index"))
+    with JobWriter(conn, detect_duplicates=False, tag_skills=False) as writer:
+        writer.write([_job("1", "Python and SQL pipelines")])
+    index.refresh(conn, min_interval=0)
+    with JobWriter(conn, detect_duplicates=False, tag_skills=False) as writer:
+        writer.write([_job("2", "Python notebooks")])
+    index.refresh(conn, min_interval=0)
+    assert len(index.search("python")) == 2
+
+
+def test_retagging_does_not_reindex(tmp_path):
+    conn = connect(str(tmp_path / "jobs.db"))
+    index = TextIndex(str(tmp_path / "index"))
+    with JobWriter(conn, detect_duplicates=False) as writer:
+        writer.write([_job("1", "Python and SQL pipelines"), _job("2", "Kubernetes operations")])
+    index.refresh(conn, min_interval=0)
+    segments = [segment.path for segment in index.view.segments]
+
+    # What a taxonomy change does to every job; the descriptions stay the same
+    with conn:
+        conn.execute("UPDATE jobs SET skills_seq = skills_seq + 10")
+    with JobWriter(conn, detect_duplicates=False) as writer:
+        writer.write([_job("1", "Python and SQL pipelines")])
+    index.refresh(conn, min_interval=0)
+    assert [segment.path for segment in index.view.segments] == segments
+
+
+def test_superseded_documents_are_compacted(tmp_path):
+    conn = connect(str(tmp_path / "jobs.db"))
+    index = TextIndex(str(tmp_path / "index"))
+    with JobWriter(conn, detect_duplicates=False) as writer:
+        writer.write([_job(str(n), f"Python developer number{n}") for n in range(8)])
+    index.refresh(conn, min_interval=0)
+
+    # Under COMPACT_FRACTION of the first segment: its old documents only stop counting
+    with JobWriter(conn, detect_duplicates=False) as writer:
+        writer.write([_job("0", "Rust developer")])
+    index.refresh(conn, min_interval=0)
+    assert [len(segment) for segment in index.view.segments] == [8, 1]
+    assert index.view.jobs == 8
+
+    # Now a quarter of it is superseded, so it is rebuilt without them
+    with JobWriter(conn, detect_duplicates=False) as writer:
+        writer.write([_job("1", "Rust developer")])
+    index.refresh(conn, min_interval=0)
+    assert [len(segment) for segment in index.view.segments] == [6, 1, 1]
+    assert index.view.segments[0].generation == 1
+    assert index.view.jobs == 8
+    assert sorted(rowid for rowid, _ in index.search("python")) == [
+        row[0] for row in conn.execute("SELECT search_rowid FROM jobs WHERE job_id NOT IN ('0', '1') "
+                                       "ORDER BY search_rowid")]
+
+    # The next process loads the rebuilt segment only
+    reloaded = TextIndex(str(tmp_path / "index"))
+    assert [len(segment) for segment in reloaded.view.segments] == [6, 1, 1]
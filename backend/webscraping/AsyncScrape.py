@@ -1,14 +1,30 @@
 import aiohttp
 import asyncio
-from bs4 import BeautifulSoup
-import pandas as pd
 import time
-import random
-from fake_useragent import UserAgent
-from urllib.parse import urlencode, urlparse, parse_qs
+from urllib.parse import urlencode
 import sqlite3
-from datetime import datetime
-import re
+from datetime import timedelta
+from dataclasses import dataclass, field, replace
+import os
+import argparse
+import heapq
+import logging
+import math
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from census import Census
+from checkpoints import Checkpoint, CheckpointStore
+from frontier import Frontier
+from jobstore import JobWriter, KnownJobIds, connect, fresh_job_ids
+from metrics import Registry, SampledLog, serve
+from parsing import LoopLagMonitor, ParseStage
+from proxies import ProxyPool, make_connector, read_proxy_list
+from recrawl import MAX_JOBS_PER_SEARCH, YieldTable
+from retry import CircuitBreaker, FetchError, RetryPolicy
+from scheduler import RequestScheduler
+from user_agents import random_user_agent
 
 # Proxy configuration (replace with your proxy service details)
 PROXY_HOST = "brd.superproxy.io"  # Bright Data host
@@ -25,23 +41,114 @@ PROXIES = {
 # SCRAPINGDOG_API_KEY = "your_api_key"
 # SCRAPINGDOG_URL = "https://api.scrapingdog.com/linkedin"
 
-# Initialize User-Agent rotator
-ua = UserAgent()
+# Request scheduling: starting rate per host (requests/second, adapted at
+# runtime) and the maximum number of requests in flight per host
+REQUESTS_PER_SECOND = 2.0
+MAX_CONCURRENT_REQUESTS = 8
+# Ceiling for the adapted rate
+MAX_REQUESTS_PER_SECOND = 20.0
 
-def extract_job_id(job_url):
-    """Extract the job ID from a LinkedIn job URL."""
-    try:
-        # Parse the URL and get the path
-        parsed_url = urlparse(job_url)
-        # The job ID is typically in the path after 'jobs/view/'
-        path_parts = parsed_url.path.split('/')
-        if 'jobs' in path_parts and 'view' in path_parts:
-            job_id_index = path_parts.index('view') + 1
-            if job_id_index < len(path_parts):
-                return path_parts[job_id_index]
-    except Exception as e:
-        print(f"Error extracting job ID: {e}")
-    return None
+# Where search pages are requested; bench_crawl.py points this at replay_server.py
+LINKEDIN_URL = "https://www.linkedin.com"
+
+# HTML parsing backend: "selectolax", "lxml" or "bs4"; None picks the
+# fastest one installed
+HTML_EXTRACTOR = None
+
+# Processes used for HTML parsing and description formatting; 0 parses on
+# the event loop itself
+PARSE_WORKERS = os.cpu_count()
+
+# Jobs stored more recently than this are not re-fetched; older rows get
+# their description refreshed
+DESCRIPTION_TTL = timedelta(days=7)
+
+# Incremental mode: stop paging a (title, city) search after this many
+# consecutive pages that contain no job IDs we haven't stored yet
+INCREMENTAL_STOP_PAGES = 2
+
+# Attempts per URL before giving up on it; transient failures (network
+# errors, 429, 5xx) are retried with exponential backoff or Retry-After
+MAX_FETCH_ATTEMPTS = 4
+
+# Jobs buffered between the crawlers and the database writer; crawlers wait
+# when it is full, so memory stays flat however large the crawl is
+JOB_QUEUE_SIZE = 200
+
+# Live metrics are served at http://127.0.0.1:METRICS_PORT/metrics in
+# Prometheus text format while the scraper runs; 0 turns the endpoint off
+METRICS_PORT = 9108
+
+# Per-job and per-retry events are logged as JSON lines, the first and
+# then every Nth of each kind; the metrics endpoint has the exact counts
+LOG_SAMPLE_EVERY = 100
+
+# Yield-driven recrawl (--request-budget): searches crawled at the same time
+RECRAWL_CONCURRENCY = 3
+
+# Census (--census): most result pages walked per search. LinkedIn stops
+# listing a search after about 1000 results; a search cut off here doesn't
+# count its missing jobs as missed
+CENSUS_MAX_PAGES = 40
+
+# Define cities with their LinkedIn location encodings and country
+# Format: (city_name, encoded_location_string, country)
+CITIES = [
+    ("Sydney", "Sydney%2C%20New%20South%20Wales%2C%20Australia", "Australia"),
+    ("Melbourne", "Melbourne%2C%20Victoria%2C%20Australia", "Australia"),
+    ("Brisbane", "Brisbane%2C%20Queensland%2C%20Australia", "Australia")
+    # Easy to expand with new cities and countries, for example:
+    # ("London", "London%2C%20England%2C%20United%20Kingdom", "United Kingdom"),
+    # ("New York", "New%20York%2C%20New%20York%2C%20United%20States", "United States"),
+    # ("Toronto", "Toronto%2C%20Ontario%2C%20Canada", "Canada"),
+]
+
+# Define job titles with weights
+JOB_TITLES = [
+    ("Software Engineer", 3), ("Data Analyst", 3), ("Project Manager", 1), ("Registered Nurse", 3), ("Accountant", 1),
+    ("Marketing Manager", 1), ("Civil Engineer", 1), ("Teacher", 1), ("Sales Manager", 1), ("Graphic Designer", 1),
+    ("Human Resources Manager", 1), ("Electrician", 1), ("Financial Analyst", 1), ("Chef", 1), ("Logistics Coordinator", 1),
+    ("Customer Service Representative", 1), ("Business Development Manager", 1), ("Occupational Therapist", 0.3),
+    ("Retail Manager", 1), ("Mechanical Engineer", 1),
+    ("Frontend Developer", 3), ("Backend Developer", 3), ("DevOps Engineer", 3), ("Data Scientist", 3), ("Machine Learning Engineer", 1),
+    ("Cloud Architect", 1), ("Cybersecurity Analyst", 1), ("IT Support Specialist", 1), ("Database Administrator", 1), ("Systems Analyst", 1),
+    ("Network Engineer", 1), ("UX Designer", 1), ("UI Designer", 1), ("Technical Writer", 0.3), ("Product Manager", 1),
+    ("General Practitioner", 1), ("Pharmacist", 1), ("Physiotherapist", 1), ("Dentist", 0.3), ("Medical Laboratory Technician", 0.3),
+    ("Midwife", 0.3), ("Radiographer", 0.3), ("Paramedic", 1), ("Clinical Psychologist", 0.3), ("Aged Care Worker", 1),
+    ("Financial Planner", 1), ("Tax Consultant", 1), ("Investment Analyst", 1), ("Risk Manager", 1), ("Management Consultant", 1),
+    ("Business Analyst", 3), ("Procurement Manager", 1), ("Auditor", 1), ("Credit Analyst", 1), ("Payroll Officer", 1),
+    ("Structural Engineer", 1), ("Electrical Engineer", 1), ("Environmental Engineer", 0.3), ("Quantity Surveyor", 1), ("Construction Manager", 1),
+    ("Plumber", 1), ("Carpenter", 1), ("Welder", 1), ("Site Supervisor", 1), ("Building Inspector", 0.3),
+    ("University Lecturer", 0.3), ("Early Childhood Educator", 1), ("Special Education Teacher", 0.3), ("Vocational Trainer", 0.3), ("Librarian", 0.3),
+    ("Education Consultant", 0.3), ("School Counselor", 0.3), ("Academic Researcher", 0.3),
+    ("Barista", 1), ("Hotel Manager", 1), ("Travel Agent", 0.3), ("Event Coordinator", 1), ("Sous Chef", 1),
+    ("Restaurant Manager", 1), ("Tour Guide", 0.3), ("Bartender", 1),
+    ("Sales Representative", 1), ("Store Assistant", 1), ("Merchandiser", 1), ("E-commerce Specialist", 1), ("Real Estate Agent", 1),
+    ("Account Manager", 1), ("Customer Success Manager", 1),
+    ("Lawyer", 1), ("Paralegal", 1), ("Compliance Officer", 1), ("Legal Secretary", 1), ("Policy Analyst", 0.3),
+    ("Content Creator", 1), ("Video Editor", 0.3), ("Journalist", 0.3), ("Public Relations Specialist", 1), ("Photographer", 0.3),
+    ("Copywriter", 1), ("Art Director", 0.3),
+    ("Production Manager", 1), ("Warehouse Manager", 1), ("Supply Chain Analyst", 1), ("Forklift Operator", 1), ("Quality Assurance Inspector", 1),
+    ("Maintenance Technician", 1), ("Factory Worker", 1),
+    ("Environmental Scientist", 0.3), ("Agricultural Consultant", 0.3), ("Horticulturist", 0.3), ("Park Ranger", 0.3), ("Sustainability Consultant", 0.3),
+    ("Public Servant", 1), ("Urban Planner", 0.3), ("Social Worker", 1), ("Community Development Officer", 0.3), ("Emergency Services Officer", 0.3),
+    ("Actor", 0.3), ("Musician", 0.3), ("Stage Manager", 0.3)
+]
+
+
+BASE_JOBS = 3  # Target average jobs per title (reduced from 100)
+AVERAGE_WEIGHT = sum(weight for _, weight in JOB_TITLES) / len(JOB_TITLES)  # ~0.934
+
+def search_url(job_title, location_encoded):
+    """Construct the LinkedIn search URL for a job title in one location."""
+    keywords_encoded = job_title.replace(' ', '%20')
+    return f"{LINKEDIN_URL}/jobs/search/?keywords={keywords_encoded}&location={location_encoded}"
+
+def jobs_per_city(weight):
+    """Weighted max_jobs for one (title, city) search."""
+    max_jobs_per_query = int(BASE_JOBS * (weight / AVERAGE_WEIGHT))
+    max_jobs_per_city = max_jobs_per_query // len(CITIES)  # Distribute across all cities
+    return max(5, min(200, max_jobs_per_city))  # Cap between 5 and 200
 
 def job_exists(cursor, job_id):
     """Check if a job already exists in the database."""
@@ -68,429 +175,787 @@ def parse_location(location_str):
     
     return city, country
 
-def format_job_description(description):
-    """Format job description text with minimal changes to preserve original structure."""
-    # Remove 'Show more Show less' text that sometimes appears at the end
-    description = re.sub(r'\s*Show\s+more\s+Show\s+less\s*$', '', description)
-    
-    # Fix common issues where words run together with no spaces
-    # Handle camelCase pattern (lowercase directly followed by uppercase)
-    description = re.sub(r'([a-z])([A-Z])', r'\1 \2', description)
-    
-    # Fix pattern: DeFi (keep as is, don't add space)
-    description = re.sub(r'De Fi', 'DeFi', description)
-    
-    # Fix missing space between number and text
-    description = re.sub(r'([0-9])([a-zA-Z])', r'\1 \2', description)
-    
-    # Fix missing spaces after periods for sentences run together
-    description = re.sub(r'(\.)([A-Z][a-z])', r'\1 \2', description)
-    
-    # Fix spaces after commas if missing
-    description = re.sub(r'(\,)([A-Za-z])', r'\1 \2', description)
-    
-    # Fix spaces after semicolons if missing
-    description = re.sub(r'(\;)([A-Za-z])', r'\1 \2', description)
-    
-    # Fix no space after colons
-    description = re.sub(r'(\:)([A-Za-z])', r'\1 \2', description)
-    
-    # Fix specific issues in the example text
-    description = re.sub(r'reports\)Strong', r'reports) Strong', description)
-    description = re.sub(r'preferred Stay', r'preferred. Stay', description)
-    description = re.sub(r'assets Synthesize', r'assets. Synthesize', description)
-    description = re.sub(r'as needed Support', r'as needed. Support', description)
-    description = re.sub(r'chart\)\(Plus', r'chart). (Plus', description)
-    description = re.sub(r'Work Perks: crypto\.com', r'Work Perks: Crypto.com', description)
-    
-    # Handle a specific pattern with run-together words after closing parenthesis
-    description = re.sub(r'\)([A-Z][a-z])', r') \1', description)
-    
-    return description
+@dataclass
+class CrawlStats:
+    """Counters for a whole scrape run."""
+    descriptions_fetched: int = 0
+    descriptions_skipped: int = 0
+    pages_fetched: int = 0
+    # Lower bound on the search pages a full crawl would still have requested
+    # for the queries incremental mode stopped early
+    pages_skipped: int = 0
+    queries_stopped_early: int = 0
 
+class CrawlMetrics:
+    """Live instruments for a scrape run, served by main() on METRICS_PORT.
 
+    Fetch and parse metrics are labelled with the kind of page ("listing"
+    for search pages, "description" for job pages) and the search's title
+    and city. Database writes cover every search at once, so they aren't.
+    """
 
-async def get_job_description(session, job_url):
-    try:
-        # Add random delay before each description fetch
-        await asyncio.sleep(random.uniform(1, 2))
-        headers = {"User-Agent": ua.random}
-        async with session.get(job_url, headers=headers, proxy=PROXIES["http"], timeout=10) as response:
-            if response.status == 429:
-                print(f"Rate limited, waiting before retry...")
-                await asyncio.sleep(random.uniform(60, 90))  # Random delay between 60-90 seconds on rate limit
-                return await get_job_description(session, job_url)  # Retry the request
-                
-            response.raise_for_status()
-            html = await response.text()
-            soup = BeautifulSoup(html, "html.parser")
-            description = soup.select_one(".description__text").text.strip()
+    def __init__(self, registry=None):
+        self.registry = registry or Registry()
+        page = ("kind", "title", "city")
+        self.requests = self.registry.counter(
+            "scraper_requests", "Request attempts by response status, or \"error\" for no response",
+            page + ("status",))
+        self.fetch_seconds = self.registry.histogram(
+            "scraper_fetch_seconds", "Time of one request attempt, from sending it to reading the body", page)
+        self.response_bytes = self.registry.counter("scraper_response_bytes", "Response body bytes read", page)
+        self.retries = self.registry.counter("scraper_retries", "Attempts retried after a transient failure", page)
+        self.failures = self.registry.counter("scraper_fetch_failures", "URLs given up on", page)
+        self.parse_seconds = self.registry.histogram(
+            "scraper_parse_seconds", "Time to parse a page, including waiting for a parse worker", page)
+        self.jobs = self.registry.counter("scraper_jobs_collected", "Jobs handed to the database writer",
+                                          ("title", "city"))
+        self.db_write_seconds = self.registry.histogram(
+            "scraper_db_write_seconds", "Time of one JobWriter flush, including descriptions and skill tags")
+        self.rows_written = self.registry.counter("scraper_db_rows_written", "Jobs inserted or updated")
+        self.log = SampledLog(every=LOG_SAMPLE_EVERY)
+
+    def watch(self, queue, scheduler):
+        """Report the writer queue's depth and each host's AIMD rate whenever metrics are read."""
+        self.registry.gauge("scraper_queue_depth", "Jobs and checkpoints waiting for the database writer",
+                            function=queue.qsize)
+        self.registry.gauge("scraper_host_rate", "Requests per second the scheduler currently allows a host",
+                            ("host",), function=lambda: {(host.host,): host.rate for host in scheduler.hosts()})
+
+class Fetcher:
+    """Issues GET requests through the proxy pool, paced by a per-host scheduler.
+
+    Transient failures are retried under the retry policy, and each host has
+    a circuit breaker that pauses all of its requests when failures pile up.
+    """
+
+    def __init__(self, session, scheduler, proxy_pool, retry_policy=None, metrics=None):
+        self.session = session
+        self.scheduler = scheduler
+        self.proxy_pool = proxy_pool
+        self.retry_policy = retry_policy or RetryPolicy(max_attempts=MAX_FETCH_ATTEMPTS)
+        self.metrics = metrics or CrawlMetrics()
+        self.breakers = {}
+
+    def breaker(self, host):
+        if host not in self.breakers:
+            self.breakers[host] = CircuitBreaker(host)
+        return self.breakers[host]
+
+    async def get(self, url, kind="listing", title=None, city=None):
+        """Fetch a URL and return the body bytes.
+
+        kind, title and city only label the request in the metrics. Raises
+        FetchError on a permanent HTTP error or once every attempt has failed.
+        """
+        labels = (kind, title or "", city or "")
+        host = self.scheduler.for_url(url)
+        breaker = self.breaker(host.host)
+        policy = self.retry_policy
+        for attempt in range(1, policy.max_attempts + 1):
+            await breaker.wait()
+            try:
+                status, body, retry_after = await self._request(host, url, labels)
+                reason = f"HTTP {status}"
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                status, body, retry_after = None, None, None
+                reason = str(e) or type(e).__name__
+            breaker.record(not policy.should_retry(status))
             
-            # Format the description before returning it
-            formatted_description = format_job_description(description)
-            return formatted_description
+            if status is not None and status < 400:
+                return body
+            if not policy.should_retry(status):
+                self.metrics.failures.labels(*labels).inc()
+                raise FetchError(url, status, reason)
+            if attempt < policy.max_attempts:
+                delay = policy.backoff(attempt, retry_after)
+                self.metrics.retries.labels(*labels).inc()
+                self.metrics.log.event("retry", reason=reason, url=url, delay=round(delay, 1), attempt=attempt,
+                                       max_attempts=policy.max_attempts)
+                await asyncio.sleep(delay)
+        self.metrics.failures.labels(*labels).inc()
+        raise FetchError(url, status, f"{reason} after {policy.max_attempts} attempts")
+
+    async def _request(self, host, url, labels):
+        """Make one attempt. Returns (status, body bytes or None on an error status, Retry-After header)."""
+        async with host.slot():
+            headers = {"User-Agent": random_user_agent()}
+            proxy = self.proxy_pool.acquire()
+            status = None
+            started = time.monotonic()
+            try:
+                async with self.session.get(url, headers=headers, proxy=proxy.url, timeout=10) as response:
+                    status = response.status
+                    host.record(status, started)
+                    if status >= 400:
+                        return status, None, response.headers.get("Retry-After")
+                    body = await response.read()
+                    self.metrics.response_bytes.labels(*labels).inc(len(body))
+                    return status, body, None
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                status = None
+                host.record(None, started)
+                raise
+            finally:
+                elapsed = time.monotonic() - started
+                self.proxy_pool.release(proxy, status, elapsed)
+                self.metrics.requests.labels(*labels, str(status) if status is not None else "error").inc()
+                self.metrics.fetch_seconds.labels(*labels).observe(elapsed)
+
+@dataclass
+class ScrapeContext:
+    """State shared by every crawl coroutine in a run."""
+    fetcher: Fetcher
+    parse_stage: ParseStage
+    # Only used through run_query(), so the loop never waits on SQLite
+    conn: sqlite3.Connection
+    stats: CrawlStats
+    # Jobs go here and are persisted by the writer task
+    queue: asyncio.Queue
+    description_ttl: timedelta = DESCRIPTION_TTL
+    # Set in incremental mode
+    known_ids: KnownJobIds = None
+    stop_after_pages: int = INCREMENTAL_STOP_PAGES
+    conn_lock: threading.Lock = field(default_factory=threading.Lock)
+
+    async def run_query(self, function, *args):
+        """Call function(*args), which uses conn, on a worker thread, one such call at a time."""
+        def call():
+            with self.conn_lock:
+                return function(*args)
+        return await asyncio.to_thread(call)
+
+async def get_job_description(ctx, job_url, job_title=None, city=None):
+    try:
+        html = await ctx.fetcher.get(job_url, "description", job_title, city)
+
+        # Extract and format the description off the event loop
+        started = time.monotonic()
+        description = await ctx.parse_stage.job_page(html)
+        ctx.fetcher.metrics.parse_seconds.labels("description", job_title or "", city or "").observe(
+            time.monotonic() - started)
+        if description is None:
+            raise ValueError("no .description__text on page")
+        return description
     except Exception as e:
         print(f"Error fetching job description: {e}")
         return ""
 
-async def get_job_listings(session, base_url, max_jobs=1000, city=None, country=None, job_title=None):
-    jobs = []
-    page = 0
-    jobs_collected = 0
+async def _fetch_listing(ctx, parse, base_url, page, job_title, city):
+    url = f"{base_url}&{urlencode({'start': page * 25})}"
+    html = await ctx.fetcher.get(url, "listing", job_title, city)
+    started = time.monotonic()
+    parsed = await parse(html)
+    ctx.fetcher.metrics.parse_seconds.labels("listing", job_title or "", city or "").observe(
+        time.monotonic() - started)
+    ctx.stats.pages_fetched += 1
+    return parsed
 
-    while jobs_collected < max_jobs:
-        params = {"start": page * 25}
-        url = f"{base_url}&{urlencode(params)}"
+async def fetch_job_cards(ctx, base_url, page, job_title=None, city=None):
+    """Fetch and parse one search-result page and return its cards."""
+    return await _fetch_listing(ctx, ctx.parse_stage.search_page, base_url, page, job_title, city)
+
+async def collect_jobs(ctx, job_cards, limit, base_url, city, country, job_title):
+    """Turn a page of cards into at most limit complete jobs, fetching their descriptions.
+
+    Cards that can't be used are dropped, and so are jobs stored within the
+    description TTL, which are checked against the database in one query.
+    """
+    job_data_list = []
+    for job_card in job_cards:
+        title = job_card["title"]
+        if None in (title, job_card["company"], job_card["location"], job_card["job_link"]):
+            missing = ", ".join(field for field in ("title", "company", "location", "job_link")
+                                if job_card[field] is None)
+            print(f"Error parsing job card: missing {missing}")
+            continue
         
-        try:
-            headers = {"User-Agent": ua.random}
-            async with session.get(url, headers=headers, proxy=PROXIES["http"], timeout=10) as response:
-                if response.status == 429:
-                    print(f"Rate limited, waiting before retry...")
-                    await asyncio.sleep(random.uniform(60, 90))  # Random delay between 60-90 seconds on rate limit
-                    continue  # Retry the current page
-                    
-                response.raise_for_status()
-                html = await response.text()
-                soup = BeautifulSoup(html, "html.parser")
-                job_cards = soup.select(".jobs-search__results-list li")
-                
-                if not job_cards:
-                    print("No more jobs found or page structure changed.")
-                    break
-                
-                # Process job cards in batches to avoid rate limiting
-                batch_size = 1  # Process 1 job at a time
-                for i in range(0, len(job_cards), batch_size):
-                    batch_cards = job_cards[i:i + batch_size]
-                    job_tasks = []
-                    job_data_list = []
-                    
-                    for job_card in batch_cards:
-                        try:
-                            title = job_card.select_one(".base-search-card__title").text.strip()
-                            company = job_card.select_one(".base-search-card__subtitle").text.strip()
-                            location_str = job_card.select_one(".job-search-card__location").text.strip()
-                            
-                            job_link = job_card.select_one("a.base-card__full-link")["href"]
-                            job_id = extract_job_id(job_link)
-                            
-                            if not job_id:
-                                print(f"Could not extract job ID for: {title}")
-                                continue
-                            
-                            job_data = {
-                                "title": title,
-                                "company": company,
-                                "city": city,  # Use the city parameter directly
-                                "country": country,  # Use the country parameter directly
-                                "job_link": job_link,
-                                "source_url": base_url,
-                                "source_site": "LinkedIn"
-                            }
-                            job_data_list.append(job_data)
-                            job_tasks.append(get_job_description(session, job_link))
-                            
-                        except AttributeError as e:
-                            print(f"Error parsing job card: {e}")
-                            continue
-                    
-                    if job_tasks:
-                        try:
-                            # Fetch descriptions in parallel for the batch
-                            descriptions = await asyncio.gather(*job_tasks, return_exceptions=True)
-                            
-                            # Process results
-                            for job_data, description in zip(job_data_list, descriptions):
-                                if isinstance(description, Exception):
-                                    print(f"Error fetching description for {job_data['title']}: {description}")
-                                    description = ""
-                                
-                                job_data["description"] = description
-                                jobs.append(job_data)
-                                
-                                jobs_collected += 1
-                                print(f"Collected job {jobs_collected}: {job_data['title']} ({job_data['city']}, {job_data['country']})")
-                                
-                                if jobs_collected >= max_jobs:
-                                    break
-                            
-                            # Add delay between batches
-                            await asyncio.sleep(random.uniform(2, 4))  # Random delay between 2-4 seconds for batches
-                            
-                        except Exception as e:
-                            print(f"Error processing batch: {e}")
-                    
-                    if jobs_collected >= max_jobs:
-                        break
-                
-                page += 1
-                
-                if len(job_cards) < 25:
-                    print("Reached end of job listings.")
-                    break
-                    
-        except Exception as e:
-            print(f"Error fetching page {page}: {e}")
-            await asyncio.sleep(random.uniform(30, 45))  # Random delay between 30-45 seconds on error
+        job_link = job_card["job_link"]
+        if not job_card["job_id"]:
+            print(f"Could not extract job ID for: {title}")
             continue
+        
+        job_data_list.append({
+            "job_id": job_card["job_id"],
+            "title": title,
+            "company": job_card["company"],
+            "city": city,  # Use the city parameter directly
+            "country": country,  # Use the country parameter directly
+            "job_link": job_link,
+            "source_url": base_url,
+            "source_site": "LinkedIn",
+            "search_title": job_title
+        })
     
-    return jobs
-
-def save_to_sqlite(jobs, db_name="linkedin_jobs.db"):
-    # Create a connection to SQLite database
-    conn = sqlite3.connect(db_name)
-    cursor = conn.cursor()
-    
-    # Create the jobs table if it doesn't exist
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS jobs (
-            job_id TEXT PRIMARY KEY,
-            title TEXT,
-            company TEXT,
-            city TEXT,
-            country TEXT,
-            description TEXT,
-            job_link TEXT,
-            source_url TEXT,
-            source_site TEXT,
-            date_added TIMESTAMP,
-            scraped_date TIMESTAMP
-        )
-    ''')
+    # Check the whole page against the database in one query and only
+    # fetch descriptions for new jobs or ones older than the TTL
+    fresh = await ctx.run_query(fresh_job_ids, ctx.conn, [job_data["job_id"] for job_data in job_data_list],
+                                ctx.description_ttl)
+    if fresh:
+        ctx.stats.descriptions_skipped += len(fresh)
+        job_data_list = [job_data for job_data in job_data_list if job_data["job_id"] not in fresh]
+    job_data_list = job_data_list[:limit]
+    ctx.stats.descriptions_fetched += len(job_data_list)
     
-    # Create indexes for faster queries
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_city ON jobs (city)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_scraped_date ON jobs (scraped_date)')
+    # Fetch every description on the page at once; the scheduler
+    # decides how many actually run concurrently and how fast
+    descriptions = await asyncio.gather(
+        *(get_job_description(ctx, job_data["job_link"], job_title, city) for job_data in job_data_list),
+        return_exceptions=True
+    )
     
-    # Insert jobs into the database
-    new_jobs = 0
-    skipped_jobs = 0
-    current_time = datetime.now()
+    for job_data, description in zip(job_data_list, descriptions):
+        if isinstance(description, Exception):
+            print(f"Error fetching description for {job_data['title']}: {description}")
+            description = ""
+        job_data["description"] = description
+    return job_data_list
+
+async def iter_job_listings(ctx, base_url, max_jobs=1000, city=None, country=None, job_title=None,
+                            checkpoint=None):
+    """Crawl one search query, yielding each job as soon as its description is in.
+
+    After each finished page a Checkpoint is yielded as well, and a final one
+    with status "completed" once the search is done. Passing a saved
+    checkpoint resumes the search on the page after it. A page that still
+    fails after the fetcher's retries ends the search with the error; its
+    checkpoint stays in progress, so the next run picks up from that page.
+    Stops early on pages of known jobs when ctx.known_ids is set (incremental mode).
+    """
+    checkpoint = checkpoint or Checkpoint(job_title, city)
+    page = checkpoint.last_page + 1
+    jobs_collected = checkpoint.jobs_collected
+    pages_without_new = 0
+
+    while jobs_collected < max_jobs:
+        job_cards = await fetch_job_cards(ctx, base_url, page, job_title, city)
+        if not job_cards:
+            print("No more jobs found or page structure changed.")
+            break
+        
+        if ctx.known_ids is not None:
+            new_ids = [card["job_id"] for card in job_cards if card["job_id"] and card["job_id"] not in ctx.known_ids]
+            pages_without_new = 0 if new_ids else pages_without_new + 1
+            if pages_without_new >= ctx.stop_after_pages:
+                skipped = math.ceil((max_jobs - jobs_collected) / 25)
+                ctx.stats.pages_skipped += skipped
+                ctx.stats.queries_stopped_early += 1
+                print(f"No new jobs on the last {pages_without_new} pages for {job_title} in {city}, "
+                      f"stopping (skipped at least {skipped} pages)")
+                break
+        
+        for job_data in await collect_jobs(ctx, job_cards, max_jobs - jobs_collected, base_url, city, country,
+                                           job_title):
+            yield job_data
+            if ctx.known_ids is not None:
+                ctx.known_ids.add(job_data["job_id"])
+            
+            jobs_collected += 1
+            ctx.fetcher.metrics.jobs.labels(job_title or "", city or "").inc()
+            ctx.fetcher.metrics.log.event("job_collected", search=job_title, city=city, country=country,
+                                          collected=jobs_collected, title=job_data["title"])
+        
+        checkpoint = replace(checkpoint, last_page=page, jobs_collected=jobs_collected)
+        yield checkpoint
+        page += 1
+        
+        if len(job_cards) < 25:
+            print("Reached end of job listings.")
+            break
     
-    for job in jobs:
-        job_id = extract_job_id(job['job_link'])
-        if not job_id:
-            print(f"Could not extract job ID for: {job['title']}")
+    yield replace(checkpoint, status="completed")
+
+async def crawl_to_queue(ctx, *args, **kwargs):
+    """Producer: push every job from one search into the writer queue. Returns the job count.
+
+    Checkpoints go through the queue too, behind the jobs they cover.
+    """
+    count = 0
+    async for item in iter_job_listings(ctx, *args, **kwargs):
+        await ctx.queue.put(item)
+        if not isinstance(item, Checkpoint):
+            count += 1
+    return count
+
+async def _keep_lease(frontier, item, owner):
+    """Renew owner's lease on item until cancelled."""
+    while True:
+        await asyncio.sleep(frontier.lease_seconds / 3)
+        if not await asyncio.to_thread(frontier.renew, item, owner):
+            print(f"Lost the lease on {item.job_title} in {item.city} page {item.page}")
+            return
+
+async def run_frontier_worker(ctx, frontier, owner):
+    """Crawl search pages claimed from the shared frontier until it is drained.
+
+    Returns the number of jobs queued for writing.
+    """
+    locations = {city_name: (location_encoded, country) for city_name, location_encoded, country in CITIES}
+    jobs_queued = 0
+    while True:
+        # Frontier calls may wait for other processes' write lock, so they
+        # run off the event loop
+        item = await asyncio.to_thread(frontier.claim, owner)
+        if item is None:
+            if not await asyncio.to_thread(frontier.has_open_work):
+                return jobs_queued
+            # Other workers still hold pages that may queue follow-up pages
+            await asyncio.sleep(frontier.lease_seconds / 10)
             continue
-            
+        
+        location_encoded, country = locations[item.city]
+        base_url = search_url(item.job_title, location_encoded)
+        lease_keeper = asyncio.create_task(_keep_lease(frontier, item, owner))
         try:
-            # Check if job exists to determine if this is a new or existing job
-            cursor.execute('SELECT date_added FROM jobs WHERE job_id = ?', (job_id,))
-            existing_job = cursor.fetchone()
+            job_cards = await fetch_job_cards(ctx, base_url, item.page, item.job_title, item.city)
+            jobs = await collect_jobs(ctx, job_cards, item.max_jobs, base_url, item.city, country, item.job_title)
+            for job in jobs:
+                await ctx.queue.put(job)
+            jobs_queued += len(jobs)
+            ctx.fetcher.metrics.jobs.labels(item.job_title, item.city).inc(len(jobs))
             
-            if existing_job:
-                # Update existing job with new scraped_date
-                cursor.execute('''
-                    UPDATE jobs 
-                    SET title = ?, company = ?, city = ?, country = ?, 
-                        description = ?, job_link = ?, source_url = ?, 
-                        source_site = ?, scraped_date = ?
-                    WHERE job_id = ?
-                ''', (
-                    job['title'],
-                    job['company'],
-                    job['city'],
-                    job['country'],
-                    job['description'],
-                    job['job_link'],
-                    job['source_url'],
-                    job['source_site'],
-                    current_time,
-                    job_id
-                ))
-                skipped_jobs += 1
-                print(f"Updated existing job: {job['title']}")
-            else:
-                # Insert new job with both date_added and scraped_date
-                cursor.execute('''
-                    INSERT INTO jobs (
-                        job_id, title, company, city, country, description, 
-                        job_link, source_url, source_site, date_added, scraped_date
-                    )
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    job_id,
-                    job['title'],
-                    job['company'],
-                    job['city'],
-                    job['country'],
-                    job['description'],
-                    job['job_link'],
-                    job['source_url'],
-                    job['source_site'],
-                    current_time,  # date_added
-                    current_time   # scraped_date
-                ))
+            # A full page means there may be more results behind it
+            remaining = item.max_jobs - len(jobs)
+            more = len(job_cards) == 25 and remaining > 0
+            await asyncio.to_thread(frontier.complete, item, owner, remaining if more else None)
+            print(f"[{owner}] {item.job_title} in {item.city} page {item.page}: {len(jobs)} jobs")
+        except Exception as e:
+            print(f"[{owner}] Error on {item.job_title} in {item.city} page {item.page}: {e}")
+            await asyncio.to_thread(frontier.release, item, owner)
+        finally:
+            lease_keeper.cancel()
+
+def seed_frontier(db_name="linkedin_jobs.db"):
+    """Reset the shared frontier to page 0 of every (title, city) search."""
+    frontier = Frontier(db_name)
+    frontier.seed([(job_title, city_name, jobs_per_city(weight))
+                   for job_title, weight in JOB_TITLES
+                   for city_name, _, _ in CITIES], reset=True)
+    print(f"Seeded frontier with {len(JOB_TITLES) * len(CITIES)} searches")
+    frontier.close()
+
+def _timed_write(writer, write, *args):
+    """Call a JobWriter method; returns (seconds, rows written)."""
+    before = writer.new_jobs + writer.updated_jobs
+    started = time.monotonic()
+    write(*args)
+    return time.monotonic() - started, writer.new_jobs + writer.updated_jobs - before
+
+def _open_writer():
+    conn = connect()
+    return JobWriter(conn), CheckpointStore(conn)
+
+def _write_items(writer, checkpoints, items):
+    """Store a batch from the writer queue in order and flush it; runs on the writer thread.
+
+    Returns the (seconds, rows written) of every write that wrote anything.
+    """
+    timings = []
+    for item in items:
+        if isinstance(item, Checkpoint):
+            checkpoints.mark(item)
+        else:
+            # Flushes by itself once a chunk has built up
+            timings.append(_timed_write(writer, writer.add, item))
+    timings.append(_timed_write(writer, writer.flush))
+    checkpoints.flush()
+    return [(seconds, written) for seconds, written in timings if written]
+
+async def write_from_queue(queue, metrics=None):
+    """Consumer: persist jobs and checkpoints as they arrive until a None sentinel is received.
+
+    The writes run on a thread of their own, over a connection of their own,
+    so the near-duplicate check, skill tagging and indexing in JobWriter
+    don't stall the event loop. Whatever is waiting in the queue goes to the
+    thread as one batch and is flushed, so the writer batches while jobs are
+    arriving faster than we can write them and a crash loses at most the
+    jobs that were still in flight. Checkpoints are only written after the
+    jobs queued ahead of them, so a resumed crawl never skips unsaved jobs.
+    Returns the JobWriter, for its counts.
+    """
+    metrics = metrics or CrawlMetrics()
+    loop = asyncio.get_running_loop()
+    # A single thread, which is the one that opens the connection, so it is never shared
+    thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-writer")
+    try:
+        writer, checkpoints = await loop.run_in_executor(thread, _open_writer)
+        try:
+            done = False
+            while not done:
+                items = [await queue.get()]
+                while not queue.empty():
+                    items.append(queue.get_nowait())
+                if None in items:
+                    items, done = items[:items.index(None)], True
+                for seconds, written in await loop.run_in_executor(thread, _write_items, writer, checkpoints, items):
+                    metrics.db_write_seconds.observe(seconds)
+                    metrics.rows_written.inc(written)
+        finally:
+            await loop.run_in_executor(thread, writer.conn.close)
+    finally:
+        thread.shutdown()
+    return writer
+
+async def _unless_writer_died(writer_task, awaitable):
+    """Await awaitable, but raise if the writer task stops first.
+
+    Without this the crawlers would wait forever on a full queue nobody drains.
+    """
+    task = asyncio.ensure_future(awaitable)
+    await asyncio.wait({task, writer_task}, return_when=asyncio.FIRST_COMPLETED)
+    if not task.done():
+        task.cancel()
+        writer_task.result()  # re-raises the writer's exception
+        raise RuntimeError("Database writer stopped unexpectedly")
+    return task.result()
+
+async def crawl_search(ctx, job_title, city, location_encoded, country, requests_left):
+    """Crawl one search from its newest page until a page brings nothing new, queueing its jobs.
+
+    Stops after ctx.stop_after_pages pages without a job outside
+    ctx.known_ids, at the end of the results, after MAX_JOBS_PER_SEARCH jobs,
+    or once requests_left() runs out. Returns (jobs queued, new jobs, cards
+    listed, requests made, whether the search ran to its end rather than out
+    of budget).
+    """
+    base_url = search_url(job_title, location_encoded)
+    jobs_queued = new_jobs = cards = requests = 0
+    pages_without_new = 0
+    page = 0
+    while jobs_queued < MAX_JOBS_PER_SEARCH and requests_left() > 0:
+        job_cards = await fetch_job_cards(ctx, base_url, page, job_title, city)
+        requests += 1
+        cards += len(job_cards)
+        new_ids = [card["job_id"] for card in job_cards if card["job_id"] and card["job_id"] not in ctx.known_ids]
+        pages_without_new = 0 if new_ids else pages_without_new + 1
+        limit = min(MAX_JOBS_PER_SEARCH - jobs_queued, max(0, requests_left()))
+        for job_data in await collect_jobs(ctx, job_cards, limit, base_url, city, country, job_title):
+            requests += 1
+            if job_data["job_id"] not in ctx.known_ids:
                 new_jobs += 1
-                print(f"Added new job: {job['title']}")
-                
-        except sqlite3.IntegrityError as e:
-            print(f"Error processing job {job['title']}: {e}")
-            skipped_jobs += 1
-            continue
-    
-    # Commit the changes and close the connection
-    conn.commit()
-    conn.close()
-    print(f"Added {new_jobs} new jobs, updated {skipped_jobs} existing jobs to {db_name}")
+                ctx.known_ids.add(job_data["job_id"])
+            await ctx.queue.put(job_data)
+            jobs_queued += 1
+            ctx.fetcher.metrics.jobs.labels(job_title, city).inc()
+            ctx.fetcher.metrics.log.event("job_collected", search=job_title, city=city, country=country,
+                                          collected=jobs_queued, title=job_data["title"])
+        if pages_without_new >= ctx.stop_after_pages or len(job_cards) < 25:
+            return jobs_queued, new_jobs, cards, requests, True
+        page += 1
+    return jobs_queued, new_jobs, cards, requests, jobs_queued >= MAX_JOBS_PER_SEARCH
 
-def get_scrape_progress(db_name="linkedin_jobs.db"):
-    """Get the progress of the last scrape from the database."""
-    conn = sqlite3.connect(db_name)
-    cursor = conn.cursor()
-    
-    # Create progress table if it doesn't exist
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS scrape_progress (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            city TEXT,
-            job_title TEXT,
-            jobs_collected INTEGER,
-            last_updated TIMESTAMP,
-            status TEXT
-        )
-    ''')
-    
-    # Get the last scrape progress
-    cursor.execute('''
-        SELECT city, job_title, jobs_collected, status 
-        FROM scrape_progress 
-        ORDER BY last_updated DESC 
-        LIMIT 1
-    ''')
-    
-    progress = cursor.fetchone()
-    conn.close()
-    
-    if progress:
-        return {
-            'city': progress[0],
-            'job_title': progress[1],
-            'jobs_collected': progress[2],
-            'status': progress[3]
-        }
-    return None
-
-def update_scrape_progress(city, job_title, jobs_collected, status, db_name="linkedin_jobs.db"):
-    """Update the progress of the current scrape."""
-    conn = sqlite3.connect(db_name)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        INSERT INTO scrape_progress (city, job_title, jobs_collected, last_updated, status)
-        VALUES (?, ?, ?, ?, ?)
-    ''', (city, job_title, jobs_collected, datetime.now(), status))
-    
-    conn.commit()
+async def crawl_by_yield(ctx, writer_task, request_budget):
+    """Crawl the searches most likely to have new postings until request_budget is spent.
+
+    The order comes from recrawl.YieldTable, and every search that ran to
+    its end is recorded there for the next run to plan with; one the budget
+    cut short would look quieter than it is. Returns the job count.
+    """
+    locations = {city_name: (location_encoded, country) for city_name, location_encoded, country in CITIES}
+    yields = await ctx.run_query(YieldTable, ctx.conn)
+    heap = await ctx.run_query(
+        yields.plan, [(job_title, city_name, weight) for job_title, weight in JOB_TITLES for city_name in locations])
+    searches = len(heap)
+    spent = ctx.stats.pages_fetched + ctx.stats.descriptions_fetched
+
+    def requests_left():
+        return request_budget - (ctx.stats.pages_fetched + ctx.stats.descriptions_fetched - spent)
+
+    totals = {"jobs": 0, "new": 0, "searches": 0}
+
+    async def worker():
+        while heap and requests_left() > 0:
+            _, _, job_title, city_name, expected = heapq.heappop(heap)
+            location_encoded, country = locations[city_name]
+            try:
+                jobs, new_jobs, cards, requests, finished = await crawl_search(
+                    ctx, job_title, city_name, location_encoded, country, requests_left)
+            except Exception as e:
+                print(f"Error processing {job_title} in {city_name}: {e}")
+                continue
+            if finished:
+                await ctx.run_query(yields.record, job_title, city_name, new_jobs, cards, requests)
+            totals["jobs"] += jobs
+            totals["new"] += new_jobs
+            totals["searches"] += 1
+            print(f"{job_title} in {city_name}: {new_jobs} new jobs (expected {expected:.1f}) "
+                  f"from {requests} requests")
+
+    await _unless_writer_died(writer_task, asyncio.gather(*(worker() for _ in range(RECRAWL_CONCURRENCY))))
+    used = request_budget - requests_left()
+    print(f"Yield-driven recrawl: {totals['new']} new jobs from {used} requests "
+          f"({totals['new'] / used if used else 0:.2f} per request), {totals['searches']} of {searches} searches")
+    return totals["jobs"]
+
+async def census_search(ctx, census, job_title, city, location_encoded):
+    """Walk one search's result pages to the end, noting the job IDs on them. Returns the pages fetched.
+
+    A short page only ends the search if it arrived whole (see
+    parsing.parse_census_page); one that didn't is fetched once more. The
+    search counts as walked to the end (census.completed) if it ends on a
+    short page after the first, or on the first when LinkedIn's job count
+    says that is all of it, and the pages held at least as many cards as
+    that count. Anything else leaves the search out of the missed counts.
+    """
+    base_url = search_url(job_title, location_encoded)
+    cards_seen, reported = 0, None
+    for page in range(CENSUS_MAX_PAGES):
+        for _ in range(2):
+            job_cards, complete, page_reported = await _fetch_listing(ctx, ctx.parse_stage.census_page, base_url,
+                                                                      page, job_title, city)
+            if complete:
+                break
+        census.saw(card["job_id"] for card in job_cards if card["job_id"])
+        cards_seen += len(job_cards)
+        reported = page_reported if page_reported is not None else reported
+        if not complete:
+            print(f"Page {page} of {job_title} in {city} came back cut off or without results twice; "
+                  f"its missing jobs aren't counted this time")
+            return page + 1
+        if len(job_cards) < 25:
+            if (page or reported is not None) and cards_seen >= (reported or 0):
+                census.completed(job_title, city)
+            else:
+                print(f"{job_title} in {city} ended after {cards_seen} of {reported or 'an unknown number of'} "
+                      f"jobs; its missing jobs aren't counted this time")
+            return page + 1
+    print(f"{job_title} in {city} still had results after {CENSUS_MAX_PAGES} pages; "
+          f"its missing jobs aren't counted this time")
+    return CENSUS_MAX_PAGES
+
+async def run_census(ctx):
+    """Census every (title, city) search from its result pages alone, without fetching descriptions.
+
+    Searches are walked one page at a time, as many at once as the
+    scheduler allows requests in flight. The job IDs seen are written to
+    the jobs table in one go at the end (see census.py), and a search that
+    fails is left out of the missed counts. Returns the CensusResult.
+    """
+    census = Census(ctx.conn)
+    searches = [(job_title, city_name, location_encoded) for job_title, _ in JOB_TITLES
+                for city_name, location_encoded, _ in CITIES]
+    searches.reverse()
+    pages = 0
+
+    async def worker():
+        nonlocal pages
+        while searches:
+            job_title, city_name, location_encoded = searches.pop()
+            try:
+                fetched = await census_search(ctx, census, job_title, city_name, location_encoded)
+                pages += fetched
+            except Exception as e:
+                print(f"Error taking the census of {job_title} in {city_name}: {e}")
+
+    await asyncio.gather(*(worker() for _ in range(MAX_CONCURRENT_REQUESTS)))
+    result = await ctx.run_query(census.commit)
+    print(f"Census: {result.seen} postings listed on {pages} pages, {result.unknown} of them not stored yet; "
+          f"{result.searches} searches walked to the end")
+    print(f"{result.missed} stored postings were missing from their search, {result.closed} of them now closed "
+          f"after {census.close_after} censuses; {result.reopened} closed postings were listed again")
+    return result
+
+def save_to_sqlite(jobs, db_name="linkedin_jobs.db"):
+    """Upsert a list of jobs; main() keeps a JobWriter open for the whole run instead."""
+    conn = connect(db_name)
+    writer = JobWriter(conn)
+    writer.write(jobs)
     conn.close()
+    print(f"Added {writer.new_jobs} new jobs, updated {writer.updated_jobs} existing jobs to {db_name}")
 
-async def main():
-    # Define cities with their LinkedIn location encodings and country
-    # Format: (city_name, encoded_location_string, country)
-    cities = [
-        ("Sydney", "Sydney%2C%20New%20South%20Wales%2C%20Australia", "Australia"),
-        ("Melbourne", "Melbourne%2C%20Victoria%2C%20Australia", "Australia"),
-        ("Brisbane", "Brisbane%2C%20Queensland%2C%20Australia", "Australia")
-        # Easy to expand with new cities and countries, for example:
-        # ("London", "London%2C%20England%2C%20United%20Kingdom", "United Kingdom"),
-        # ("New York", "New%20York%2C%20New%20York%2C%20United%20States", "United States"),
-        # ("Toronto", "Toronto%2C%20Ontario%2C%20Canada", "Canada"),
-    ]
-    
-    # Define job titles with weights
-    job_titles = [
-        ("Software Engineer", 3), ("Data Analyst", 3), ("Project Manager", 1), ("Registered Nurse", 3), ("Accountant", 1),
-        ("Marketing Manager", 1), ("Civil Engineer", 1), ("Teacher", 1), ("Sales Manager", 1), ("Graphic Designer", 1),
-        ("Human Resources Manager", 1), ("Electrician", 1), ("Financial Analyst", 1), ("Chef", 1), ("Logistics Coordinator", 1),
-        ("Customer Service Representative", 1), ("Business Development Manager", 1), ("Occupational Therapist", 0.3),
-        ("Retail Manager", 1), ("Mechanical Engineer", 1),
-        ("Frontend Developer", 3), ("Backend Developer", 3), ("DevOps Engineer", 3), ("Data Scientist", 3), ("Machine Learning Engineer", 1),
-        ("Cloud Architect", 1), ("Cybersecurity Analyst", 1), ("IT Support Specialist", 1), ("Database Administrator", 1), ("Systems Analyst", 1),
-        ("Network Engineer", 1), ("UX Designer", 1), ("UI Designer", 1), ("Technical Writer", 0.3), ("Product Manager", 1),
-        ("General Practitioner", 1), ("Pharmacist", 1), ("Physiotherapist", 1), ("Dentist", 0.3), ("Medical Laboratory Technician", 0.3),
-        ("Midwife", 0.3), ("Radiographer", 0.3), ("Paramedic", 1), ("Clinical Psychologist", 0.3), ("Aged Care Worker", 1),
-        ("Financial Planner", 1), ("Tax Consultant", 1), ("Investment Analyst", 1), ("Risk Manager", 1), ("Management Consultant", 1),
-        ("Business Analyst", 3), ("Procurement Manager", 1), ("Auditor", 1), ("Credit Analyst", 1), ("Payroll Officer", 1),
-        ("Structural Engineer", 1), ("Electrical Engineer", 1), ("Environmental Engineer", 0.3), ("Quantity Surveyor", 1), ("Construction Manager", 1),
-        ("Plumber", 1), ("Carpenter", 1), ("Welder", 1), ("Site Supervisor", 1), ("Building Inspector", 0.3),
-        ("University Lecturer", 0.3), ("Early Childhood Educator", 1), ("Special Education Teacher", 0.3), ("Vocational Trainer", 0.3), ("Librarian", 0.3),
-        ("Education Consultant", 0.3), ("School Counselor", 0.3), ("Academic Researcher", 0.3),
-        ("Barista", 1), ("Hotel Manager", 1), ("Travel Agent", 0.3), ("Event Coordinator", 1), ("Sous Chef", 1),
-        ("Restaurant Manager", 1), ("Tour Guide", 0.3), ("Bartender", 1),
-        ("Sales Representative", 1), ("Store Assistant", 1), ("Merchandiser", 1), ("E-commerce Specialist", 1), ("Real Estate Agent", 1),
-        ("Account Manager", 1), ("Customer Success Manager", 1),
-        ("Lawyer", 1), ("Paralegal", 1), ("Compliance Officer", 1), ("Legal Secretary", 1), ("Policy Analyst", 0.3),
-        ("Content Creator", 1), ("Video Editor", 0.3), ("Journalist", 0.3), ("Public Relations Specialist", 1), ("Photographer", 0.3),
-        ("Copywriter", 1), ("Art Director", 0.3),
-        ("Production Manager", 1), ("Warehouse Manager", 1), ("Supply Chain Analyst", 1), ("Forklift Operator", 1), ("Quality Assurance Inspector", 1),
-        ("Maintenance Technician", 1), ("Factory Worker", 1),
-        ("Environmental Scientist", 0.3), ("Agricultural Consultant", 0.3), ("Horticulturist", 0.3), ("Park Ranger", 0.3), ("Sustainability Consultant", 0.3),
-        ("Public Servant", 1), ("Urban Planner", 0.3), ("Social Worker", 1), ("Community Development Officer", 0.3), ("Emergency Services Officer", 0.3),
-        ("Actor", 0.3), ("Musician", 0.3), ("Stage Manager", 0.3)
-    ]
-    
-    base_jobs = 3  # Target average jobs per title (reduced from 100)
-    average_weight = sum(weight for _, weight in job_titles) / len(job_titles)  # ~0.934
-    
-    print("Starting LinkedIn job scraper...")
+async def crawl_job_titles(ctx, writer_task, checkpoints, fresh=False):
+    """Crawl every title in JOB_TITLES, all cities of a title at once. Returns the job count.
+
+    If the last run was interrupted less than CHECKPOINT_MAX_AGE ago, picks
+    up where it stopped: completed searches are skipped and unfinished ones
+    continue from their last saved page. Otherwise, or with fresh=True, the
+    checkpoints are cleared and the crawl starts over. main() marks the run
+    finished once its jobs are written.
+    """
+    total_jobs = 0
     
-    # Check for previous progress
-    progress = get_scrape_progress()
-    if progress and progress['status'] == 'in_progress':
-        print(f"Resuming from previous scrape: {progress['job_title']} in {progress['city']}")
-        # Find the index of the last processed job title
-        job_index = next(i for i, (title, _) in enumerate(job_titles) if title == progress['job_title'])
+    saved = {}
+    if not fresh and checkpoints.resumable():
+        saved = checkpoints.load()
+        completed = sum(cp.status == "completed" for cp in saved.values())
+        print(f"Resuming previous scrape: {completed} searches completed, "
+              f"{len(saved) - completed} in progress")
     else:
-        job_index = 0
+        checkpoints.start_run()
     
-    async with aiohttp.ClientSession() as session:
-        # Process job titles
-        for job_title, weight in job_titles[job_index:]:
-            try:
-                # Calculate weighted max_jobs_per_city
-                max_jobs_per_query = int(base_jobs * (weight / average_weight))
-                max_jobs_per_city = max_jobs_per_query // len(cities)  # Distribute across all cities
-                max_jobs_per_city = max(5, min(200, max_jobs_per_city))  # Cap between 5 and 200
+    # Process job titles
+    for job_title, weight in JOB_TITLES:
+        try:
+            max_jobs_per_city = jobs_per_city(weight)
+            
+            # Create tasks for all cities concurrently
+            city_tasks = []
+            for city_name, location_encoded, country in CITIES:
+                checkpoint = saved.get((job_title, city_name))
+                if checkpoint and checkpoint.status == "completed":
+                    continue
                 
-                # Create tasks for all cities concurrently
-                city_tasks = []
-                for city_name, location_encoded, country in cities:
-                    # Update progress
-                    update_scrape_progress(city_name, job_title, 0, 'in_progress')
-                    
-                    # Construct LinkedIn search URL
-                    keywords_encoded = job_title.replace(' ', '%20')
-                    base_url = f"https://www.linkedin.com/jobs/search/?keywords={keywords_encoded}&location={location_encoded}"
+                base_url = search_url(job_title, location_encoded)
+                if checkpoint:
+                    print(f"Resuming {job_title} in {city_name} at page {checkpoint.last_page + 1} "
+                          f"({checkpoint.jobs_collected} jobs already collected)")
+                else:
                     print(f"Scraping {max_jobs_per_city} jobs for {job_title} in {city_name}, {country}...")
-                    
-                    # Create task for this city - pass both city_name and country
-                    task = get_job_listings(session, base_url, max_jobs_per_city, city_name, country, job_title)
-                    city_tasks.append((city_name, task))
-                
-                # Run all city tasks concurrently
-                city_results = await asyncio.gather(*[task for _, task in city_tasks], return_exceptions=True)
                 
-                # Process results from all cities
-                for (city_name, _), result in zip(city_tasks, city_results):
-                    if isinstance(result, Exception):
-                        print(f"Error processing {job_title} in {city_name}: {result}")
-                        update_scrape_progress(city_name, job_title, 0, 'error')
-                    else:
-                        save_to_sqlite(result)
-                        update_scrape_progress(city_name, job_title, len(result), 'completed')
-                
-                # Add small delay between job titles
-                if job_title != job_titles[job_index][0]:  # Skip delay for first job title
-                    await asyncio.sleep(random.uniform(1, 2))  # Reduced delay between job titles
-                
-            except Exception as e:
-                print(f"Error processing {job_title}: {e}")
-                for city_name, _, _ in cities:
-                    update_scrape_progress(city_name, job_title, 0, 'error')
-                continue
+                # Create task for this city - pass both city_name and country
+                task = crawl_to_queue(ctx, base_url, max_jobs_per_city, city_name, country, job_title,
+                                      checkpoint=checkpoint)
+                city_tasks.append((city_name, task))
+            
+            # Run all city tasks concurrently
+            city_results = await _unless_writer_died(
+                writer_task, asyncio.gather(*[task for _, task in city_tasks], return_exceptions=True)
+            )
+            
+            # Process results from all cities
+            for (city_name, _), result in zip(city_tasks, city_results):
+                if isinstance(result, Exception):
+                    print(f"Error processing {job_title} in {city_name}: {result}")
+                else:
+                    total_jobs += result
+            
+        except Exception as e:
+            if writer_task.done():
+                raise
+            print(f"Error processing {job_title}: {e}")
+            continue
     
+    return total_jobs
+
+async def main(incremental=False, stop_after_pages=INCREMENTAL_STOP_PAGES, frontier_workers=0, fresh=False,
+               proxy_urls=None, metrics_port=METRICS_PORT, request_budget=None, census=False):
+    """Run a scrape, resuming the previous one if it was interrupted less than CHECKPOINT_MAX_AGE ago.
+
+    fresh starts over regardless.
+
+    Requests are spread over proxy_urls, or go through PROXIES["http"] if none are given.
+
+    With frontier_workers > 0 this process instead runs that many workers
+    against the shared crawl frontier (seed it first with --seed-frontier).
+
+    With request_budget set it instead recrawls the searches with the most
+    new postings expected per request until that many requests are spent
+    (see recrawl.py), stopping each search like incremental mode does.
+
+    With census set it only walks the search result pages, to note which
+    stored postings are still listed and close the ones that are gone (see
+    census.py); no descriptions are fetched and no jobs are stored.
+
+    Metrics are served on metrics_port for as long as the run lasts; 0 turns
+    that off.
+    """
+    print("Starting LinkedIn job scraper...")
+    
+    scheduler = RequestScheduler(rate=REQUESTS_PER_SECOND, max_concurrency=MAX_CONCURRENT_REQUESTS,
+                                 max_rate=MAX_REQUESTS_PER_SECOND)
+    metrics = CrawlMetrics()
+    metrics_runner = None
+    if metrics_port:
+        try:
+            metrics_runner = await serve(metrics.registry, metrics_port)
+            print(f"Serving metrics at http://127.0.0.1:{metrics_port}/metrics")
+        except OSError as e:
+            print(f"Could not serve metrics on port {metrics_port}: {e}")
+    proxy_pool = ProxyPool(proxy_urls or [PROXIES["http"]])
+    parse_stage = ParseStage(workers=PARSE_WORKERS, backend=HTML_EXTRACTOR)
+    loop_lag = LoopLagMonitor()
+    loop_lag.start()
+    conn = connect(check_same_thread=False)
+    # Only for the run's start and end; the writer task writes the checkpoints themselves
+    checkpoints = CheckpointStore(conn)
+    stats = CrawlStats()
+    known_ids = None
+    if incremental or request_budget:
+        known_ids = KnownJobIds.load(conn)
+        print(f"Incremental mode: {len(known_ids)} known jobs, stopping a search after "
+              f"{stop_after_pages} pages without new ones")
+    run_started = time.monotonic()
+    total_jobs = 0
+    queue = asyncio.Queue(maxsize=JOB_QUEUE_SIZE)
+    metrics.watch(queue, scheduler)
+    writer_task = asyncio.create_task(write_from_queue(queue, metrics))
+    
+    async with aiohttp.ClientSession(connector=make_connector()) as session:
+        fetcher = Fetcher(session, scheduler, proxy_pool, metrics=metrics)
+        ctx = ScrapeContext(fetcher, parse_stage, conn, stats, queue,
+                            known_ids=known_ids, stop_after_pages=stop_after_pages)
+        
+        if frontier_workers:
+            frontier = Frontier()
+            owner = f"{socket.gethostname()}:{os.getpid()}"
+            print(f"Running {frontier_workers} frontier workers as {owner}")
+            jobs_per_worker = await _unless_writer_died(writer_task, asyncio.gather(
+                *(run_frontier_worker(ctx, frontier, f"{owner}:{i}") for i in range(frontier_workers))
+            ))
+            total_jobs = sum(jobs_per_worker)
+            print(f"Frontier drained: {frontier.status_counts()}")
+            frontier.close()
+        elif census:
+            await run_census(ctx)
+        elif request_budget:
+            total_jobs = await crawl_by_yield(ctx, writer_task, request_budget)
+        else:
+            total_jobs = await crawl_job_titles(ctx, writer_task, checkpoints, fresh=fresh)
+    
+    await queue.put(None)
+    writer = await writer_task
+    if not (frontier_workers or census or request_budget):
+        # Every search has had its go, even if some failed; the next run starts over
+        checkpoints.finish_run()
+    elapsed = time.monotonic() - run_started
+    await loop_lag.stop()
+    if metrics_runner is not None:
+        await metrics_runner.cleanup()
+    parse_stage.close()
+    conn.close()
     print("Scraping completed.")
+    print(f"Collected {total_jobs} jobs in {elapsed:.0f}s ({total_jobs / elapsed if elapsed else 0:.2f} jobs/s): "
+          f"{writer.new_jobs} new, {writer.updated_jobs} updated, {writer.new_descriptions} new distinct descriptions, "
+          f"{writer.duplicates} near-duplicates of earlier postings")
+    print(f"Fetched {stats.descriptions_fetched} descriptions, skipped {stats.descriptions_skipped} "
+          f"already scraped within the last {DESCRIPTION_TTL.days} days")
+    print(f"Requested {stats.pages_fetched} search pages")
+    if incremental:
+        print(f"Incremental mode stopped {stats.queries_stopped_early} searches early, "
+              f"skipping at least {stats.pages_skipped} search pages")
+    print(scheduler.report())
+    print(proxy_pool.report())
+    for breaker in ctx.fetcher.breakers.values():
+        if breaker.trips:
+            print(f"Circuit breaker for {breaker.host} tripped {breaker.trips} times")
+    print(loop_lag.report())
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Scrape LinkedIn job listings into SQLite.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="stop paging a search once it only returns jobs already stored")
+    parser.add_argument("--stop-after-pages", type=int, default=INCREMENTAL_STOP_PAGES,
+                        help="consecutive pages without new jobs before an incremental search stops")
+    parser.add_argument("--seed-frontier", action="store_true",
+                        help="reset the shared crawl frontier to every (title, city) search and exit")
+    parser.add_argument("--frontier-workers", type=int, default=0,
+                        help="crawl pages claimed from the shared frontier with this many workers")
+    parser.add_argument("--proxy-file",
+                        help="file with one proxy URL per line to spread requests over (default: PROXIES)")
+    parser.add_argument("--fresh", action="store_true",
+                        help="discard the checkpoints of an unfinished scrape and start over")
+    parser.add_argument("--request-budget", type=int,
+                        help="recrawl the searches most likely to have new jobs until this many requests are made")
+    parser.add_argument("--metrics-port", type=int, default=METRICS_PORT,
+                        help="serve Prometheus metrics on this local port during the run; 0 to disable")
+    parser.add_argument("--census", action="store_true",
+                        help="only walk the search pages to refresh which stored jobs are still listed")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.seed_frontier:
+        seed_frontier()
+    else:
+        proxy_urls = read_proxy_list(args.proxy_file) if args.proxy_file else None
+        asyncio.run(main(incremental=args.incremental, stop_after_pages=args.stop_after_pages,
+                         frontier_workers=args.frontier_workers, fresh=args.fresh, proxy_urls=proxy_urls,
+                         metrics_port=args.metrics_port, request_budget=args.request_budget,
+                         census=args.census))
\ No newline at end of file
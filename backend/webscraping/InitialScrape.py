@@ -1,13 +1,13 @@
 import requests
 from bs4 import BeautifulSoup
-import pandas as pd
 import time
 import random
-from fake_useragent import UserAgent
 from urllib.parse import urlencode, urlparse, parse_qs
 import sqlite3
 from datetime import datetime
 
+from user_agents import random_user_agent
+
 # Proxy configuration (replace with your proxy service details)
 PROXY_HOST = "brd.superproxy.io"  # Bright Data host
 PROXY_PORT = 33335
@@ -23,9 +23,6 @@ PROXIES = {
 # SCRAPINGDOG_API_KEY = "your_api_key"
 # SCRAPINGDOG_URL = "https://api.scrapingdog.com/linkedin"
 
-# Initialize User-Agent rotator
-ua = UserAgent()
-
 def extract_job_id(job_url):
     """Extract the job ID from a LinkedIn job URL."""
     try:
@@ -78,7 +75,7 @@ def get_job_listings(base_url, max_jobs=1000):
         
         try:
             # Rotate User-Agent
-            headers = {"User-Agent": ua.random}
+            headers = {"User-Agent": random_user_agent()}
             
             # Make request through proxy
             response = requests.get(url, headers=headers, proxies=PROXIES, timeout=10)
@@ -153,7 +150,7 @@ def get_job_listings(base_url, max_jobs=1000):
 
 def get_job_description(job_url):
     try:
-        headers = {"User-Agent": ua.random}
+        headers = {"User-Agent": random_user_agent()}
         response = requests.get(job_url, headers=headers, proxies=PROXIES, timeout=10)
         response.raise_for_status()
         
@@ -0,0 +1,154 @@
+"""End-to-end crawl benchmark: the real AsyncScrape.main() against replay_server.py.
+
+Usage:
+    python bench_crawl.py [--titles 10] [--pages 3] [--rate 200] [--concurrency 32]
+                          [--parse-workers N] [--frontier-workers 0]
+                          [--latency 0.05] [--jitter 0.05] [--burst-every 0] [--burst-seconds 2]
+                          [--retry-after 1] [--malformed 0] [--census]
+
+Starts a replay server in a child process and runs a fresh scrape of the
+first --titles of JOB_TITLES in every city into a temporary database, with
+the scraper's search URL, proxies and request rate pointed at the server.
+Everything else (scheduler, retries, circuit breakers, the parse pool,
+JobWriter) is the scraper's own, so its changes can be compared offline.
+
+--rate sets both the scheduler's starting and its highest rate, so by
+default the crawl is held back by the pipeline rather than by politeness;
+pass --rate 2 to see what the AIMD ramp-up costs. The fault options are
+replay_server.py's.
+
+Prints jobs/s, requests/s, the p50/p99 fetch latency (one request, from
+sending it to reading the body, not counting time waiting for the
+scheduler), the peak RSS of the scraper process and of its largest parse
+worker, and the server's counts. The scraper's own output goes to
+/dev/null unless --verbose.
+
+With --census, a census of the same searches (main(census=True)) runs
+after the crawl, and its requests and time are printed next to the crawl's.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import multiprocessing
+import os
+import resource
+import sqlite3
+import sys
+import tempfile
+import time
+from statistics import quantiles
+
+import AsyncScrape
+from descriptions import description_hash
+from proxies import ProxyPool
+from replay_server import Faults, serve_in_child
+
+DB_NAME = "linkedin_jobs.db"
+
+
+class TimedProxyPool(ProxyPool):
+    """ProxyPool that keeps every request's latency, which release() is already handed."""
+
+    latencies = []
+
+    def release(self, proxy, status, latency):
+        self.latencies.append(latency)
+        super().release(proxy, status, latency)
+
+
+def _peak_rss_mb(who):
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(who).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+
+def configure(args, base_url):
+    """Point AsyncScrape at the replay server and size the crawl."""
+    AsyncScrape.LINKEDIN_URL = base_url
+    AsyncScrape.JOB_TITLES = AsyncScrape.JOB_TITLES[:args.titles]
+    max_jobs = args.pages * 25 + 25
+    AsyncScrape.jobs_per_city = lambda weight: max_jobs
+    AsyncScrape.REQUESTS_PER_SECOND = AsyncScrape.MAX_REQUESTS_PER_SECOND = args.rate
+    AsyncScrape.MAX_CONCURRENT_REQUESTS = args.concurrency
+    if args.parse_workers is not None:
+        AsyncScrape.PARSE_WORKERS = args.parse_workers
+    AsyncScrape.ProxyPool = TimedProxyPool
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--titles", type=int, default=10, help="searches per city")
+    parser.add_argument("--pages", type=int, default=3, help="full result pages per search")
+    parser.add_argument("--rate", type=float, default=200.0, help="scheduler requests/s")
+    parser.add_argument("--concurrency", type=int, default=32, help="requests in flight")
+    parser.add_argument("--parse-workers", type=int, default=None, help="default: PARSE_WORKERS")
+    parser.add_argument("--frontier-workers", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--burst-every", type=float, default=0.0)
+    parser.add_argument("--burst-seconds", type=float, default=2.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--malformed", type=float, default=0.0)
+    parser.add_argument("--census", action="store_true", help="also time a census of the crawled searches")
+    parser.add_argument("--verbose", action="store_true", help="show the scraper's output")
+    args = parser.parse_args()
+    faults = Faults(args.latency, args.jitter, args.burst_every, args.burst_seconds, args.retry_after,
+                    args.malformed)
+
+    connection, child_connection = multiprocessing.Pipe()
+    server = multiprocessing.Process(target=serve_in_child, args=(child_connection, args.pages, faults),
+                                     daemon=True)
+    server.start()
+    base_url = connection.recv()
+    configure(args, base_url)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        # main() keeps its database in the working directory
+        os.chdir(directory)
+        try:
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(sys.stdout if args.verbose else devnull):
+                started = time.perf_counter()
+                if args.frontier_workers:
+                    AsyncScrape.seed_frontier(DB_NAME)
+                asyncio.run(AsyncScrape.main(frontier_workers=args.frontier_workers, fresh=True, proxy_urls=[None]))
+                elapsed = time.perf_counter() - started
+                crawl_requests = len(TimedProxyPool.latencies)
+                if args.census:
+                    started = time.perf_counter()
+                    asyncio.run(AsyncScrape.main(census=True, proxy_urls=[None]))
+                    census_elapsed = time.perf_counter() - started
+                    census_requests = len(TimedProxyPool.latencies) - crawl_requests
+                    del TimedProxyPool.latencies[crawl_requests:]
+            # The parse workers have exited by now; the server hasn't
+            worker_rss = _peak_rss_mb(resource.RUSAGE_CHILDREN)
+            conn = sqlite3.connect(DB_NAME)
+            jobs, without_description, last_seen = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(description_hash = ?), 0), COUNT(DISTINCT last_seen) FROM jobs",
+                (description_hash(""),)
+            ).fetchone()
+            conn.close()
+        finally:
+            os.chdir(cwd)
+    connection.send("stop")
+    counts, server_report = connection.recv()
+    server.join()
+
+    requests = counts.get("search", 0) + counts.get("detail", 0)
+    if args.census:
+        requests -= census_requests
+    cuts = quantiles(TimedProxyPool.latencies, n=100) if len(TimedProxyPool.latencies) > 1 else [0.0] * 99
+    print(f"Crawled {jobs} jobs in {elapsed:.1f} s: {jobs / elapsed:.1f} jobs/s, {requests / elapsed:.1f} requests/s "
+          f"({without_description} jobs without a description)")
+    print(f"Fetch latency p50 {cuts[49] * 1000:.1f} ms, p99 {cuts[98] * 1000:.1f} ms "
+          f"over {len(TimedProxyPool.latencies)} requests")
+    print(f"Peak RSS {_peak_rss_mb(resource.RUSAGE_SELF):.0f} MiB scraper, {worker_rss:.0f} MiB largest parse worker")
+    if args.census:
+        print(f"Census of the same searches: {census_requests} requests in {census_elapsed:.1f} s, "
+              f"{crawl_requests / census_requests if census_requests else 0:.1f}x fewer than the crawl's "
+              f"{crawl_requests} ({'every job seen' if last_seen == 1 else 'some jobs not seen'})")
+    print(server_report)
+
+
+if __name__ == "__main__":
+    main()
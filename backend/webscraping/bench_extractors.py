@@ -0,0 +1,87 @@
+"""Compare HTML extraction backends on the recorded fixtures.
+
+Usage:
+    python bench_extractors.py [--iterations 200]
+
+Each backend runs in a fresh process so its peak RSS isn't polluted by the
+others. Reports pages/s for search-result and job-detail pages, the peak
+memory the parsing added on top of the interpreter, and whether the output
+matches the BeautifulSoup reference.
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import time
+
+from extractors import available_extractors, get_extractor
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+SEARCH_PAGES = ["search_results.html", "search_results_last_page.html"]
+DETAIL_PAGES = ["job_detail.html", "job_detail_bullets.html", "job_detail_nested_lists.html",
+                "job_detail_br_runs.html", "job_detail_entities.html"]
+
+
+def _load(names):
+    pages = []
+    for name in names:
+        with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+            pages.append(f.read())
+    return pages
+
+
+def _peak_rss_kb():
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if os.uname().sysname == "Darwin" else peak
+
+
+def _run_backend(name, iterations):
+    extractor = get_extractor(name)
+    search_pages = _load(SEARCH_PAGES)
+    detail_pages = _load(DETAIL_PAGES)
+    baseline_rss = _peak_rss_kb()
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for html in search_pages:
+            extractor.parse_cards(html)
+    search_rate = iterations * len(search_pages) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for html in detail_pages:
+            extractor.parse_description(html)
+    detail_rate = iterations * len(detail_pages) / (time.perf_counter() - start)
+
+    output = ([extractor.parse_cards(html) for html in search_pages],
+              [extractor.parse_description(html) for html in detail_pages])
+    return search_rate, detail_rate, _peak_rss_kb() - baseline_rss, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    backends = available_extractors()
+    if not backends:
+        print("No HTML parser installed.")
+        return
+
+    ctx = multiprocessing.get_context("spawn")
+    results = {}
+    for name in backends:
+        with ctx.Pool(1) as pool:
+            results[name] = pool.apply(_run_backend, (name, args.iterations))
+
+    reference = results.get("bs4", (None, None, None, None))[3]
+    print(f"{'backend':<12}{'search pages/s':>16}{'detail pages/s':>16}{'peak +RSS KiB':>15}  matches bs4")
+    for name, (search_rate, detail_rate, rss_kb, output) in results.items():
+        matches = "n/a" if reference is None else ("yes" if output == reference else "NO")
+        print(f"{name:<12}{search_rate:>16.1f}{detail_rate:>16.1f}{rss_kb:>15}  {matches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Benchmark résumé matching (/api/jobs/match) over a large synthetic index.
+
+Usage:
+    python bench_match.py [--jobs 500000] [--queries 300] [--appends 7]
+
+Writes a match index of --jobs synthetic jobs straight to a temporary
+directory, each with 5 to 25 of 500 skills drawn from a Zipf-like
+distribution (a few skills in most jobs, most skills in a few), in one of
+bench_search's cities. It prints the time to load the index, the p50, p99
+and worst latency of JobMatchIndex.search() for résumés of 3 to 20 skills,
+with and without a city filter, and then the same after --appends small
+segments of re-tagged and new jobs, the way refreshes leave the index
+between merges.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from statistics import quantiles
+
+import numpy as np
+
+from bench_search import CITIES
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from api.job_match import JobMatchIndex, write_segment  # noqa: E402
+
+SKILLS = 500
+
+
+def skill_weights():
+    weights = 1 / np.arange(1, SKILLS + 1)
+    return weights / weights.sum()
+
+
+def make_rows(rng, rowids, seqs):
+    counts = rng.integers(5, 26, size=len(rowids))
+    indices = rng.choice(SKILLS, size=int(counts.sum()), p=skill_weights()).astype(np.int32)
+    # Duplicates within a row are harmless to the benchmark but not realistic
+    indptr = np.append(0, np.cumsum(counts))
+    cities = rng.integers(0, len(CITIES), size=len(rowids))
+    return rowids, seqs, cities, indptr, indices
+
+
+def time_queries(index, rng, queries, label):
+    city_names = [city for city, _ in CITIES]
+    for with_city in (False, True):
+        timings = []
+        for _ in range(queries):
+            skills = rng.choice(SKILLS, size=int(rng.integers(3, 21)), p=skill_weights())
+            city = city_names[int(rng.integers(len(city_names)))] if with_city else None
+            started = time.perf_counter()
+            index.search(skills.tolist(), city, 20)
+            timings.append((time.perf_counter() - started) * 1000)
+        cuts = quantiles(timings, n=100)
+        print(f"{label + (' + city' if with_city else ''):<28}{cuts[49]:>10.1f}{cuts[98]:>10.1f}{max(timings):>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=500000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--appends", type=int, default=7)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+    city_names = [city.lower() for city, _ in CITIES]
+
+    with tempfile.TemporaryDirectory() as directory:
+        started = time.perf_counter()
+        write_segment(directory, 0, 1, *make_rows(rng, np.arange(1, args.jobs + 1), np.ones(args.jobs)), city_names)
+        print(f"Wrote {args.jobs} jobs in {time.perf_counter() - started:.1f} s")
+        started = time.perf_counter()
+        index = JobMatchIndex(directory)
+        print(f"Loaded the index in {(time.perf_counter() - started) * 1000:.0f} ms ({index.view.jobs} jobs)")
+        print(f"{'query':<28}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        time_queries(index, rng, args.queries, "one segment")
+
+        # Each append re-tags 0.2% of the jobs and adds as many new ones
+        size = max(1, args.jobs // 500)
+        next_rowid = args.jobs + 1
+        for seq in range(2, args.appends + 2):
+            retagged = rng.choice(args.jobs, size=size, replace=False) + 1
+            rowids = np.sort(np.concatenate([retagged, np.arange(next_rowid, next_rowid + size)]))
+            next_rowid += size
+            write_segment(directory, seq, seq, *make_rows(rng, rowids, np.full(len(rowids), seq)), city_names)
+        started = time.perf_counter()
+        index = JobMatchIndex(directory)
+        print(f"Loaded {len(index.view.segments)} segments in {(time.perf_counter() - started) * 1000:.0f} ms "
+              f"({index.view.jobs} jobs)")
+        time_queries(index, rng, args.queries, f"{len(index.view.segments)} segments")
+
+
+if __name__ == "__main__":
+    main()
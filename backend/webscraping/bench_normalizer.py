@@ -0,0 +1,146 @@
+"""Check the single-pass description normalizer against the old re.sub chain and time both.
+
+Usage:
+    python bench_normalizer.py [--iterations 200] [--fuzz 20000] [--db linkedin_jobs.db]
+
+The corpus is the descriptions extracted from the recorded fixtures: a
+real posting, and job pages built around the markup descriptions come in
+(bullet characters, nested lists, runs of <br> and HTML entities). With
+--db it also includes every description stored in that database. Both
+implementations must agree byte for byte on the corpus and on --fuzz random
+strings. The random strings are built from the fragments the rules react to:
+case changes, digits, punctuation, unusual whitespace, the special-case
+phrases and "Show more Show less" tails. The script exits non-zero on any
+mismatch.
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+from extractors import get_extractor
+from jobstore import connect
+from normalizer import DescriptionNormalizer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+FUZZ_FRAGMENTS = [
+    "a", "b", "z", "A", "B", "Z", "0", "7", ".", ",", ";", ":", ")", "(", " ", "  ", "\n", "\t",
+    "\xa0", "\u2003", "\x1c", "é", "É", "Show", "more", "less", "Show more Show less",
+    "De", "Fi", "DeFi", "De Fi", "reports", "Strong", "preferred", "Stay", "assets", "Synthesize",
+    "as needed", "Support", "chart", "Plus", "Work", "Perks", "crypto.com", "Work Perks:", "Ab", "aB",
+]
+
+
+def legacy_format(description):
+    """The chained re.sub format_job_description this benchmark compares against."""
+    # Remove 'Show more Show less' text that sometimes appears at the end
+    description = re.sub(r'\s*Show\s+more\s+Show\s+less\s*$', '', description)
+    
+    # Fix common issues where words run together with no spaces
+    # Handle camelCase pattern (lowercase directly followed by uppercase)
+    description = re.sub(r'([a-z])([A-Z])', r'\1 \2', description)
+    
+    # Fix pattern: DeFi (keep as is, don't add space)
+    description = re.sub(r'De Fi', 'DeFi', description)
+    
+    # Fix missing space between number and text
+    description = re.sub(r'([0-9])([a-zA-Z])', r'\1 \2', description)
+    
+    # Fix missing spaces after periods for sentences run together
+    description = re.sub(r'(\.)([A-Z][a-z])', r'\1 \2', description)
+    
+    # Fix spaces after commas if missing
+    description = re.sub(r'(\,)([A-Za-z])', r'\1 \2', description)
+    
+    # Fix spaces after semicolons if missing
+    description = re.sub(r'(\;)([A-Za-z])', r'\1 \2', description)
+    
+    # Fix no space after colons
+    description = re.sub(r'(\:)([A-Za-z])', r'\1 \2', description)
+    
+    # Fix specific issues in the example text
+    description = re.sub(r'reports\)Strong', r'reports) Strong', description)
+    description = re.sub(r'preferred Stay', r'preferred. Stay', description)
+    description = re.sub(r'assets Synthesize', r'assets. Synthesize', description)
+    description = re.sub(r'as needed Support', r'as needed. Support', description)
+    description = re.sub(r'chart\)\(Plus', r'chart). (Plus', description)
+    description = re.sub(r'Work Perks: crypto\.com', r'Work Perks: Crypto.com', description)
+    
+    # Handle a specific pattern with run-together words after closing parenthesis
+    description = re.sub(r'\)([A-Z][a-z])', r') \1', description)
+    
+    return description
+
+
+def fixture_corpus(db_name=None):
+    extractor = get_extractor()
+    corpus = []
+    for name in sorted(os.listdir(FIXTURES_DIR)):
+        with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+            description = extractor.parse_description(f.read())
+        if description is not None:
+            corpus.append(description)
+    if db_name:
+        conn = connect(db_name)
+        corpus.extend(row[0] for row in conn.execute("SELECT description FROM job_descriptions WHERE description != ''"))
+        conn.close()
+    return corpus
+
+
+def fuzz_strings(count, seed=0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        text = "".join(rng.choices(FUZZ_FRAGMENTS, k=rng.randint(0, 40)))
+        if rng.random() < 0.3:
+            text += rng.choice(["", " ", "\n", "\xa0"]) + "Show" + rng.choice([" ", "\n ", "\u2003"]) + "more" \
+                + rng.choice([" ", "  "]) + "Show less" + rng.choice(["", " ", "\n", " \n\n"])
+        yield text
+
+
+def _mismatch(label, text, expected, actual):
+    print(f"MISMATCH ({label}): {text!r}")
+    print(f"  old: {expected!r}")
+    print(f"  new: {actual!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--fuzz", type=int, default=20000)
+    parser.add_argument("--db", help="also check every description stored in this database")
+    args = parser.parse_args()
+
+    normalize = DescriptionNormalizer.from_file()
+    corpus = fixture_corpus(args.db)
+    failures = 0
+    for text in corpus:
+        if normalize(text) != legacy_format(text):
+            failures += 1
+            _mismatch("corpus", text[:200], legacy_format(text)[:200], normalize(text)[:200])
+    for text in fuzz_strings(args.fuzz):
+        if normalize(text) != legacy_format(text):
+            failures += 1
+            if failures <= 10:
+                _mismatch("fuzz", text, legacy_format(text), normalize(text))
+    print(f"Compared {len(corpus)} corpus descriptions and {args.fuzz} fuzz strings: "
+          f"{'all identical' if not failures else f'{failures} mismatches'}")
+
+    total_bytes = sum(len(text.encode()) for text in corpus)
+    print(f"{'implementation':<16}{'descriptions/s':>16}{'MB/s':>10}")
+    for name, func in (("re.sub chain", legacy_format), ("single pass", normalize)):
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            for text in corpus:
+                func(text)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<16}{args.iterations * len(corpus) / elapsed:>16.0f}"
+              f"{args.iterations * total_bytes / elapsed / 1e6:>10.1f}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Benchmark the yield-driven recrawl against the static title weights, under one request budget.
+
+Usage:
+    python bench_recrawl.py [--days 28] [--budget 400] [--spread 1.5] [--seed 0]
+
+Simulates --days of daily runs over every (title, city) search in
+AsyncScrape's JOB_TITLES and CITIES. Each search gets postings at a rate
+of its own: the title's weight times a lognormal factor with sigma
+--spread, so some searches are far busier or quieter than their weight
+says. Postings stay listed for LIFETIME_DAYS, newest first, 25 to a page.
+
+A crawl of a search costs one request per search page and one per new
+job's page. Like an incremental run, it stops after STOP_AFTER_PAGES
+pages without a new job, at the end of the listing, or at its job limit.
+Both policies stop for the day once --budget requests are spent:
+
+    static   every search in JOB_TITLES order, each limited to a share of
+             the budget in proportion to its weight (what main() does
+             with a BASE_JOBS sized to the budget)
+    yield    searches in the order of YieldTable.plan(), each up to
+             MAX_JOBS_PER_SEARCH, with every crawl that ran to its end fed
+             back through record()
+
+Prints the new jobs each policy found, the requests it spent, new jobs
+per request, and the share of all postings it found while they were
+still listed.
+"""
+
+import argparse
+import heapq
+import math
+import random
+from collections import deque
+from datetime import datetime, timedelta
+
+from AsyncScrape import CITIES, INCREMENTAL_STOP_PAGES, JOB_TITLES
+from jobstore import connect
+from recrawl import MAX_JOBS_PER_SEARCH, YieldTable
+
+PAGE_SIZE = 25
+LIFETIME_DAYS = 30
+STOP_AFTER_PAGES = INCREMENTAL_STOP_PAGES
+# Mean postings per day for a search of weight 1
+MEAN_VELOCITY = 2.0
+
+
+class Market:
+    """Every search's listing: (posting number, day posted), oldest first."""
+
+    def __init__(self, searches, spread, rng):
+        self.rng = rng
+        self.velocity = {(title, city): weight * MEAN_VELOCITY * rng.lognormvariate(-spread ** 2 / 2, spread)
+                         for title, city, weight in searches}
+        self.listings = {search: deque() for search in self.velocity}
+        self.next_posting = 0
+
+    def _poisson(self, mean):
+        # Knuth's method is fine for the small means here; large ones use a normal approximation
+        if mean > 50:
+            return max(0, round(self.rng.gauss(mean, math.sqrt(mean))))
+        limit, count, product = math.exp(-mean), 0, self.rng.random()
+        while product > limit:
+            count += 1
+            product *= self.rng.random()
+        return count
+
+    def advance(self, day):
+        for search, listing in self.listings.items():
+            for _ in range(self._poisson(self.velocity[search])):
+                listing.append((self.next_posting, day))
+                self.next_posting += 1
+            while listing and listing[0][1] <= day - LIFETIME_DAYS:
+                listing.popleft()
+
+    def crawl(self, search, known, max_jobs, budget):
+        """One incremental crawl; returns (new jobs, cards listed, requests, whether it ran to its end)."""
+        listing = self.listings[search]
+        new = cards = requests = 0
+        pages_without_new = 0
+        page = 0
+        while new < max_jobs and requests < budget:
+            # Newest first
+            end = len(listing) - page * PAGE_SIZE
+            cards_on_page = [listing[i][0] for i in range(max(0, end - PAGE_SIZE), end)][::-1]
+            requests += 1
+            cards += len(cards_on_page)
+            fresh = [posting for posting in cards_on_page if posting not in known]
+            for posting in fresh[:max(0, min(max_jobs - new, budget - requests))]:
+                known.add(posting)
+                new += 1
+                requests += 1
+            pages_without_new = 0 if fresh else pages_without_new + 1
+            if pages_without_new >= STOP_AFTER_PAGES or len(cards_on_page) < PAGE_SIZE:
+                return new, cards, requests, True
+            page += 1
+        return new, cards, requests, new >= max_jobs
+
+
+def run_static(market, searches, known, budget):
+    total_weight = sum(weight for _, _, weight in searches)
+    new = requests = 0
+    for title, city, weight in searches:
+        if requests >= budget:
+            break
+        max_jobs = max(5, round(budget * weight / total_weight))
+        found, _, spent, _ = market.crawl((title, city), known, max_jobs, budget - requests)
+        new += found
+        requests += spent
+    return new, requests
+
+
+def run_yield(market, searches, known, budget, table, now):
+    heap = table.plan(searches, now)
+    new = requests = 0
+    while heap and requests < budget:
+        _, _, title, city, _ = heapq.heappop(heap)
+        found, cards, spent, finished = market.crawl((title, city), known, MAX_JOBS_PER_SEARCH, budget - requests)
+        # As in crawl_by_yield, a crawl the budget cut short isn't evidence of a quiet search
+        if finished:
+            table.record(title, city, found, cards, spent, now)
+        new += found
+        requests += spent
+    return new, requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=28)
+    parser.add_argument("--budget", type=int, default=400, help="requests per daily run")
+    parser.add_argument("--spread", type=float, default=1.5, help="sigma of the lognormal velocity factor")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    searches = [(title, city, weight) for title, weight in JOB_TITLES for city, _, _ in CITIES]
+
+    print(f"{len(searches)} searches, {args.budget} requests a day for {args.days} days")
+    print(f"{'policy':<10}{'new jobs':>10}{'requests':>10}{'new/req':>10}{'found':>10}")
+    for policy in ("static", "yield"):
+        # Both policies see the same postings
+        market = Market(searches, args.spread, random.Random(args.seed))
+        known = set()
+        table = YieldTable(connect(":memory:"))
+        start = datetime(2025, 1, 1, 6)
+        new = requests = 0
+        for day in range(args.days):
+            market.advance(day)
+            if policy == "static":
+                found, spent = run_static(market, searches, known, args.budget)
+            else:
+                found, spent = run_yield(market, searches, known, args.budget, table, start + timedelta(days=day))
+            new += found
+            requests += spent
+        print(f"{policy:<10}{new:>10}{requests:>10}{new / requests:>10.3f}{new / market.next_posting:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Benchmark /api/jobs/search queries against a large jobs table.
+
+Usage:
+    python bench_search.py --db search_bench.db [--rows 1000000] [--queries 400]
+
+If the database has fewer than --rows jobs, synthetic ones are written
+through JobWriter first (duplicate detection off, the index optimized
+afterwards), so the index is built exactly the way a crawl builds it.
+Descriptions draw their words from a Zipf-like distribution, which gives a
+realistic mix of words that occur in most jobs and words that occur in a
+handful.
+
+It then times the API's search_jobs() for several kinds of query and
+prints the p50, p99 and worst latency of each.
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+from datetime import date, timedelta
+from itertools import accumulate
+
+from jobstore import JobWriter, connect
+from search import optimize
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from api.job_search import search_jobs  # noqa: E402
+
+TITLES = ["Software Engineer", "Data Engineer", "Data Scientist", "Product Manager", "DevOps Engineer",
+          "Frontend Developer", "Backend Developer", "Machine Learning Engineer", "Business Analyst",
+          "Security Analyst", "Solutions Architect", "QA Engineer", "Site Reliability Engineer"]
+SENIORITY = ["", "Senior ", "Junior ", "Lead ", "Principal ", "Graduate "]
+CITIES = [("Sydney", "Australia"), ("Melbourne", "Australia"), ("Brisbane", "Australia"), ("Perth", "Australia"),
+          ("Auckland", "New Zealand"), ("London", "United Kingdom"), ("New York", "United States"),
+          ("San Francisco", "United States"), ("Toronto", "Canada"), ("Singapore", "Singapore")]
+VOCABULARY_SIZE = 30000
+DESCRIPTION_WORDS = 120
+
+
+def make_vocabulary(rng):
+    return ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 11))) for _ in range(VOCABULARY_SIZE)]
+
+
+def make_jobs(count, start, rng, vocabulary):
+    cum_weights = list(accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+    for i in range(start, start + count):
+        city, country = rng.choice(CITIES)
+        title = rng.choice(SENIORITY) + rng.choice(TITLES)
+        job_id = f"{title.lower().replace(' ', '-')}-at-company-{3900000000 + i}"
+        yield {
+            "job_id": job_id,
+            "title": title,
+            "company": f"Company {rng.randrange(20000)}",
+            "city": city,
+            "country": country,
+            "description": " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=DESCRIPTION_WORDS)),
+            "job_link": f"https://www.linkedin.com/jobs/view/{job_id}",
+            "source_url": "https://www.linkedin.com/jobs/search/",
+            "source_site": "LinkedIn",
+        }
+
+
+def fill(conn, rows, rng, vocabulary):
+    existing = conn.execute('SELECT COUNT(*) FROM jobs').fetchone()[0]
+    if existing >= rows:
+        return
+    started = time.perf_counter()
+    with JobWriter(conn, detect_duplicates=False) as writer:
+        for n, job in enumerate(make_jobs(rows - existing, existing, rng, vocabulary), 1):
+            writer.add(job)
+            if n % 100000 == 0:
+                print(f"Wrote {existing + n} jobs ({n / (time.perf_counter() - started):.0f}/s)")
+    elapsed = time.perf_counter() - started
+    print(f"Wrote {rows - existing} jobs in {elapsed:.1f} s ({(rows - existing) / elapsed:.0f}/s)")
+    started = time.perf_counter()
+    optimize(conn)
+    print(f"Optimized the index in {time.perf_counter() - started:.1f} s")
+
+
+def query_mix(rng, vocabulary, count):
+    """(kind, keyword arguments for search_jobs) pairs."""
+    common, mid, rare = vocabulary[:50], vocabulary[200:2000], vocabulary[10000:]
+    kinds = {
+        "title word": lambda: {"text": rng.choice(["engineer", "data", "analyst", "developer", "senior"])},
+        "common word": lambda: {"text": rng.choice(common)},
+        "rare word": lambda: {"text": rng.choice(rare)},
+        "two words": lambda: {"text": f"{rng.choice(mid)} {rng.choice(mid)}"},
+        "prefix": lambda: {"text": rng.choice(mid)[:3] + "*"},
+        "word + city": lambda: {"text": rng.choice(["engineer", "data"] + mid[:20]), "city": rng.choice(CITIES)[0]},
+        "word + country": lambda: {"text": rng.choice(mid), "country": rng.choice(CITIES)[1]},
+        "word + date": lambda: {"text": rng.choice(mid), "scraped_from": date.today() - timedelta(days=7)},
+    }
+    return [(kind, make()) for _ in range(count // len(kinds)) for kind, make in kinds.items()]
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default="search_bench.db")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--queries", type=int, default=400)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocabulary = make_vocabulary(rng)
+    conn = connect(args.db)
+    fill(conn, args.rows, rng, vocabulary)
+    total = conn.execute('SELECT COUNT(*) FROM jobs').fetchone()[0]
+
+    timings = {}
+    for kind, kwargs in query_mix(random.Random(1), vocabulary, args.queries):
+        started = time.perf_counter()
+        search_jobs(conn, limit=args.limit, **kwargs)
+        timings.setdefault(kind, []).append((time.perf_counter() - started) * 1000)
+
+    print(f"{total} jobs, {args.queries} queries, {args.limit} results each")
+    print(f"{'query':<16}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    everything = []
+    for kind, values in timings.items():
+        everything += values
+        print(f"{kind:<16}{percentile(values, 0.5):>9.2f}{percentile(values, 0.99):>9.2f}{max(values):>9.2f}")
+    print(f"{'all':<16}{percentile(everything, 0.5):>9.2f}{percentile(everything, 0.99):>9.2f}{max(everything):>9.2f}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Benchmark skill tagging: the automaton against one regex per skill, and the backfill.
+
+Usage:
+    python bench_skills.py [--docs 2000] [--backfill-jobs 20000] [--workers 0 1 2 4] [--db linkedin_jobs.db]
+
+The corpus is synthetic: sentences of the recorded job_detail fixture,
+shuffled, with skill names, aliases and lookalike words ("Javanese",
+"excel at") dropped in. With --db the stored descriptions are used
+instead. It prints descriptions/s for SkillTagger and for the obvious
+alternative: a case-insensitive word-boundary regex per skill, run one
+after another over the text.
+
+The backfill is then timed on a fresh temporary database of
+--backfill-jobs jobs for each --workers count (0 tags in the main process).
+"""
+
+import argparse
+import os
+import random
+import re
+import tempfile
+import time
+
+from bench_normalizer import fixture_corpus
+from jobstore import JobWriter, connect
+from parsing import format_job_description
+from skill_tagger import SkillTagger, backfill, load_rules, load_taxonomy
+
+LOOKALIKES = ["Javanese", "excel at", "go ahead", "rust-proof", "swift delivery", "react quickly", "R&D",
+              "gopher", "pythonic", "Scrumptious"]
+
+
+def make_corpus(count, seed=0):
+    rng = random.Random(seed)
+    sentences = [s for text in fixture_corpus() for s in re.split(r'(?<=[.!?])\s+', text) if s]
+    rules = load_rules()
+    spellings = load_taxonomy() + [alias for aliases in rules["aliases"].values() for alias in aliases]
+    corpus = []
+    for _ in range(count):
+        parts = rng.sample(sentences, min(len(sentences), rng.randint(15, 40)))
+        for _ in range(rng.randint(3, 15)):
+            parts.insert(rng.randrange(len(parts) + 1), f"Experience with {rng.choice(spellings)}.")
+        for _ in range(rng.randint(0, 3)):
+            parts.insert(rng.randrange(len(parts) + 1), f"You {rng.choice(LOOKALIKES)} every day.")
+        # Stored descriptions have been through the normalizer
+        corpus.append(format_job_description(" ".join(parts)))
+    return corpus
+
+
+def regex_tagger(names):
+    patterns = [(name, re.compile(r'(?<!\w)' + re.escape(name) + r'(?!\w)', re.IGNORECASE)) for name in names]
+
+    def tag(text):
+        return {name for name, pattern in patterns if pattern.search(text)}
+    return tag
+
+
+def time_tagging(label, func, corpus, repeat):
+    started = time.perf_counter()
+    found = 0
+    for _ in range(repeat):
+        for text in corpus:
+            found += len(func(text))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<24}{repeat * len(corpus) / elapsed:>14.0f}{found / (repeat * len(corpus)):>14.1f}")
+
+
+def time_backfill(corpus, jobs, worker_counts):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = os.path.join(tmp, "bench.db")
+        conn = connect(db_name)
+        with JobWriter(conn, detect_duplicates=False, tag_skills=False) as writer:
+            for i in range(jobs):
+                job_id = f"job-{i}"
+                writer.add({"job_id": job_id, "title": "Engineer", "company": "Company", "city": "Sydney",
+                            "country": "Australia", "description": corpus[i % len(corpus)] + f" Ref {i}.",
+                            "job_link": f"https://www.linkedin.com/jobs/view/{job_id}",
+                            "source_url": "", "source_site": "LinkedIn"})
+        print(f"{'workers':<10}{'jobs/s':>10}")
+        for workers in worker_counts:
+            with conn:
+                conn.execute('UPDATE jobs SET skills_version = NULL')
+            done, elapsed = backfill(conn, db_name, workers)
+            print(f"{workers:<10}{done / elapsed:>10.0f}")
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--backfill-jobs", type=int, default=20000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, os.cpu_count()])
+    parser.add_argument("--db", help="tag the descriptions stored in this database")
+    args = parser.parse_args()
+
+    if args.db:
+        conn = connect(args.db)
+        corpus = [row[0] for row in conn.execute("SELECT description FROM job_descriptions WHERE description != ''")]
+        conn.close()
+    else:
+        corpus = make_corpus(args.docs)
+    conn = connect(":memory:")
+    tagger = SkillTagger.from_database(conn)
+    conn.close()
+    total_bytes = sum(len(text) for text in corpus)
+    print(f"{len(corpus)} descriptions, {total_bytes / len(corpus):.0f} characters on average, "
+          f"{len(tagger.patterns)} skill spellings")
+    print(f"{'tagger':<24}{'descriptions/s':>14}{'skills/doc':>14}")
+    time_tagging("regex per skill", regex_tagger(load_taxonomy()), corpus, args.repeat)
+    time_tagging("SkillTagger", tagger.tag, corpus, args.repeat)
+    if args.backfill_jobs:
+        time_backfill(corpus, args.backfill_jobs, args.workers)
+
+
+if __name__ == "__main__":
+    main()
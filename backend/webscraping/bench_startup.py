@@ -0,0 +1,101 @@
+"""Import-time budget for each entry point of the scrapers and the APIs.
+
+Usage:
+    python bench_startup.py [--runs 7] [--top 5] [--scale 1.0]
+
+Imports each entry point in a fresh interpreter under `python -X importtime`
+--runs times (after one run to warm the bytecode cache) and takes the
+median time to import it, which leaves out the interpreter's own start-up.
+Prints that next to the entry point's budget in BUDGETS_MS, the --top
+slowest modules it imported, and exits with status 1 if any entry point is
+over budget, so a cron wrapper or CI step can run it after a dependency
+change. --scale multiplies every budget, for slower machines.
+
+An entry point whose dependencies aren't installed is reported and
+skipped; it doesn't count as a failure.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from statistics import median
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(BACKEND_DIR)
+
+# Entry point -> (directory it is run from, budget in milliseconds). What
+# is left once the heavy imports were made lazy is mostly aiohttp or
+# requests for the scrapers and FastAPI for the APIs; the budgets leave
+# about a third on top of that for a noisy machine.
+BUDGETS_MS = {
+    "AsyncScrape": (os.path.join(BACKEND_DIR, "webscraping"), 600),
+    "InitialScrape": (os.path.join(BACKEND_DIR, "webscraping"), 400),
+    "api.main": (BACKEND_DIR, 1000),
+    "app.main": (REPO_DIR, 800),
+}
+
+
+def import_times(module, cwd):
+    """Run one import; returns [(module, cumulative µs, depth)] in the order -X importtime reports them."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=cwd,
+                            capture_output=True, text=True)
+    if result.returncode:
+        raise ImportError(result.stderr.strip().splitlines()[-1])
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times.append((name.strip(), int(cumulative), (len(name) - len(name.lstrip()) - 1) // 2))
+    return times
+
+
+def slowest_imports(times, module, count):
+    """The modules that module imported itself, slowest first.
+
+    A module is reported after everything it imported, so its own imports
+    are the lines one level deeper just before it.
+    """
+    end = next(i for i, (name, _, _) in enumerate(times) if name == module)
+    depth = times[end][2]
+    children = []
+    for name, cumulative, child_depth in reversed(times[:end]):
+        if child_depth <= depth:
+            break
+        if child_depth == depth + 1:
+            children.append((cumulative, name))
+    return sorted(children, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--top", type=int, default=5, help="slowest imports to list per entry point")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget by this")
+    args = parser.parse_args()
+
+    over_budget = []
+    print(f"{'entry point':<16}{'median ms':>12}{'budget ms':>12}")
+    for module, (cwd, budget) in BUDGETS_MS.items():
+        budget *= args.scale
+        try:
+            import_times(module, cwd)
+            runs = [import_times(module, cwd) for _ in range(args.runs)]
+        except ImportError as e:
+            print(f"{module:<16}{'skipped':>12}{budget:>12.0f}   {e}")
+            continue
+        took = median(next(cumulative for name, cumulative, _ in run if name == module) for run in runs) / 1000
+        status = "" if took <= budget else "   OVER BUDGET"
+        if status:
+            over_budget.append(module)
+        print(f"{module:<16}{took:>12.0f}{budget:>12.0f}{status}")
+        for cumulative, name in slowest_imports(runs[-1], module, args.top):
+            print(f"    {name:<28}{cumulative / 1000:>8.0f} ms")
+    if over_budget:
+        print(f"Over budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
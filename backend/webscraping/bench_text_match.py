@@ -0,0 +1,131 @@
+"""Benchmark the BM25 résumé text fallback of /api/jobs/match over a large synthetic index.
+
+Usage:
+    python bench_text_match.py [--jobs 500000] [--queries 200] [--appends 7]
+
+Writes a text index of --jobs synthetic descriptions straight to a
+temporary directory, in segments of SEGMENT_DOCS, with words drawn from
+bench_search's Zipf-like vocabulary. Queries are résumé-like: 150 to 600
+words from the same distribution, so most of them are common words that
+occur in a large share of the jobs. It prints the size of the index, the
+time to load it, and the p50, p99 and worst latency of TextIndex.search()
+next to a plain term-at-a-time evaluation that decodes every posting of
+every query term, and checks that both find the same top scores. It then
+does the same after --appends small segments of rewritten and new jobs.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from itertools import accumulate
+from statistics import quantiles
+
+import numpy as np
+
+from bench_search import DESCRIPTION_WORDS, make_vocabulary
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from api.text_index import B, K1, SEGMENT_DOCS, TextIndex, tokenize, write_segment  # noqa: E402
+
+
+def make_texts(rng, vocabulary, count, low, high):
+    cum_weights = list(accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+    for _ in range(count):
+        yield " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(low, high)))
+
+
+def exhaustive(index, text, limit):
+    """BM25 top scores, reading every posting of every query term."""
+    view = index.view
+    words = sorted({word.encode("utf-8") for word in tokenize(text)})
+    keys = np.array(words, dtype=view.segments[0].terms.dtype)
+    df = np.zeros(len(keys))
+    numbers = [segment.find(keys) for segment in view.segments]
+    for segment, found in zip(view.segments, numbers):
+        df[found >= 0] += segment.df[found[found >= 0]]
+    df = np.minimum(df, view.jobs)
+    idf = np.log(1 + (view.jobs - df + 0.5) / (df + 0.5))
+    best = []
+    for segment, found, live in zip(view.segments, numbers, view.live):
+        scores = np.zeros(len(segment), dtype=np.float32)
+        lengths = K1 * (1 - B + B * np.asarray(segment.lengths, dtype=np.float32) / view.average_length)
+        for term in np.flatnonzero(found >= 0):
+            row = segment.dense_rows[found[term]]
+            if row >= 0:
+                tfs = segment.dense[row].astype(np.float32)
+                docs = np.flatnonzero(tfs)
+                tfs = tfs[docs]
+            else:
+                docs, tfs = segment.decode(np.arange(segment.term_blocks[found[term]],
+                                                     segment.term_blocks[found[term] + 1]))
+            scores[docs] += idf[term] * tfs * (K1 + 1) / (tfs + lengths[docs]) * live[docs]
+        best.append(np.sort(scores)[-limit:])
+    return np.sort(np.concatenate(best))[::-1][:limit]
+
+
+def time_queries(index, queries, label):
+    pruned, full, mismatches = [], [], 0
+    for text in queries:
+        started = time.perf_counter()
+        found = index.search(text, 20)
+        pruned.append((time.perf_counter() - started) * 1000)
+        started = time.perf_counter()
+        expected = exhaustive(index, text, 20)
+        full.append((time.perf_counter() - started) * 1000)
+        if not np.allclose([score for _, score in found], expected, rtol=1e-4):
+            mismatches += 1
+    for name, timings in (("MaxScore", pruned), ("every posting", full)):
+        cuts = quantiles(timings, n=100)
+        print(f"{label + ', ' + name:<32}{cuts[49]:>10.1f}{cuts[98]:>10.1f}{max(timings):>10.1f}")
+    print(f"{mismatches} of {len(queries)} queries ranked differently")
+
+
+def directory_size(directory):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(directory) for name in names)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=500000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--appends", type=int, default=7)
+    args = parser.parse_args()
+    rng = random.Random(0)
+    vocabulary = make_vocabulary(rng)
+    queries = list(make_texts(rng, vocabulary, args.queries, 150, 600))
+
+    with tempfile.TemporaryDirectory() as directory:
+        started = time.perf_counter()
+        texts = make_texts(rng, vocabulary, args.jobs, DESCRIPTION_WORDS, DESCRIPTION_WORDS)
+        # Described in rowid order, so each job's description_seq is its rowid
+        for start in range(0, args.jobs, SEGMENT_DOCS):
+            rowids = range(start + 1, min(start + SEGMENT_DOCS, args.jobs) + 1)
+            write_segment(directory, None, None, 0, ((rowid, rowid, text) for rowid, text in zip(rowids, texts)))
+        print(f"Wrote {args.jobs} jobs in {time.perf_counter() - started:.1f} s, "
+              f"{directory_size(directory) / 2 ** 20:.0f} MiB")
+        started = time.perf_counter()
+        index = TextIndex(directory)
+        print(f"Loaded {len(index.view.segments)} segments in {(time.perf_counter() - started) * 1000:.0f} ms "
+              f"({index.view.jobs} jobs)")
+        print(f"{'query':<32}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+        time_queries(index, queries, "base segments")
+
+        # Each append rewrites 0.2% of the jobs and adds as many new ones
+        size = max(1, args.jobs // 500)
+        next_rowid = args.jobs + 1
+        for seq in range(args.jobs + 1, args.jobs + args.appends + 1):
+            rewritten = rng.sample(range(1, args.jobs + 1), size)
+            rowids = sorted(rewritten + list(range(next_rowid, next_rowid + size)))
+            next_rowid += size
+            texts = make_texts(rng, vocabulary, len(rowids), DESCRIPTION_WORDS, DESCRIPTION_WORDS)
+            write_segment(directory, seq, seq, 0, ((rowid, seq, text) for rowid, text in zip(rowids, texts)))
+        index = TextIndex(directory)
+        print(f"Loaded {len(index.view.segments)} segments ({index.view.jobs} jobs)")
+        time_queries(index, queries, "with appends")
+
+
+if __name__ == "__main__":
+    main()
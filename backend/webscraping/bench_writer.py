@@ -0,0 +1,120 @@
+"""Benchmark the batched JobWriter against the old per-row save path.
+
+Usage:
+    python bench_writer.py [--sizes 10000 100000] [--chunk-size 500] [--call-size 50]
+
+For each size both paths write into a fresh temporary database twice:
+once into an empty table (all inserts) and once more with the same jobs
+(all updates). The per-row path is the previous save_to_sqlite, kept here
+verbatim, and is called once per --call-size jobs the way main() called it
+once per city result. Per-row prints go to /dev/null, so the cost of
+printing to a terminal is not counted.
+"""
+
+import argparse
+import contextlib
+import os
+import random
+import sqlite3
+import string
+import tempfile
+import time
+from datetime import datetime
+
+from jobstore import JobWriter, connect, ensure_schema
+from parsing import extract_job_id
+
+
+def make_jobs(count, seed=0):
+    rng = random.Random(seed)
+    words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10))) for _ in range(2000)]
+    jobs = []
+    for i in range(count):
+        job_id = f"software-engineer-at-company-{3900000000 + i}"
+        jobs.append({
+            "title": "Software Engineer",
+            "company": f"Company {i % 500}",
+            "city": rng.choice(["Sydney", "Melbourne", "Brisbane"]),
+            "country": "Australia",
+            "description": " ".join(rng.choices(words, k=400)),
+            "job_link": f"https://au.linkedin.com/jobs/view/{job_id}?position=1",
+            "source_url": "https://www.linkedin.com/jobs/search/?keywords=Software%20Engineer",
+            "source_site": "LinkedIn",
+        })
+    return jobs
+
+
+def legacy_save(jobs, db_name):
+    """The per-row save_to_sqlite this benchmark compares against."""
+    conn = sqlite3.connect(db_name)
+    cursor = conn.cursor()
+    ensure_schema(conn)
+    current_time = datetime.now()
+    for job in jobs:
+        job_id = extract_job_id(job['job_link'])
+        cursor.execute('SELECT date_added FROM jobs WHERE job_id = ?', (job_id,))
+        if cursor.fetchone():
+            cursor.execute('''
+                UPDATE jobs
+                SET title = ?, company = ?, city = ?, country = ?,
+                    description = ?, job_link = ?, source_url = ?,
+                    source_site = ?, scraped_date = ?
+                WHERE job_id = ?
+            ''', (job['title'], job['company'], job['city'], job['country'], job['description'],
+                  job['job_link'], job['source_url'], job['source_site'], current_time, job_id))
+            print(f"Updated existing job: {job['title']}")
+        else:
+            cursor.execute('''
+                INSERT INTO jobs (
+                    job_id, title, company, city, country, description,
+                    job_link, source_url, source_site, date_added, scraped_date
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (job_id, job['title'], job['company'], job['city'], job['country'], job['description'],
+                  job['job_link'], job['source_url'], job['source_site'], current_time, current_time))
+            print(f"Added new job: {job['title']}")
+    conn.commit()
+    conn.close()
+
+
+def per_row_save(jobs, db_name, call_size):
+    for start in range(0, len(jobs), call_size):
+        legacy_save(jobs[start:start + call_size], db_name)
+
+
+def batched_save(jobs, db_name, chunk_size):
+    conn = connect(db_name)
+    with JobWriter(conn, chunk_size=chunk_size) as writer:
+        writer.write(jobs)
+    conn.close()
+
+
+def _timed(func, *args):
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        func(*args)
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--call-size", type=int, default=50,
+                        help="jobs per save_to_sqlite call on the per-row path")
+    args = parser.parse_args()
+
+    print(f"{'rows':>8}  {'path':<10}{'insert rows/s':>15}{'update rows/s':>15}")
+    for size in args.sizes:
+        jobs = make_jobs(size)
+        for name, func, extra in (("per-row", per_row_save, (args.call_size,)),
+                                  ("batched", batched_save, (args.chunk_size,))):
+            with tempfile.TemporaryDirectory() as tmp:
+                db_name = os.path.join(tmp, "bench.db")
+                insert_time = _timed(func, jobs, db_name, *extra)
+                update_time = _timed(func, jobs, db_name, *extra)
+            print(f"{size:>8}  {name:<10}{size / insert_time:>15.0f}{size / update_time:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
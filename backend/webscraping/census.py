@@ -0,0 +1,168 @@
+"""Listing-only census: which stored postings are still open, from the search pages alone.
+
+A census walks every search's result pages to the end and notes the job
+IDs on the cards, without fetching a single description. A description
+crawl costs one request per search page plus one per job, so a census of
+the same searches costs about 25 times fewer requests.
+
+Once the census is done, commit() updates the jobs table with a few set-based
+statements over temp tables:
+
+    jobs.last_seen        set to the census time for every job ID seen
+    jobs.missed_censuses  reset to 0 for those, and incremented for every
+                          open job of a search the census walked to its end
+                          that wasn't on its pages
+    jobs.closed_date      set to the census time once a job has been missed
+                          CLOSE_AFTER_MISSES censuses in a row; cleared again
+                          if it shows up after all
+
+Only searches that were walked to the end of their results count towards
+misses, so a search that failed, hit the page limit or got a page cut off
+or blocked closes nothing (see AsyncScrape.census_search).
+Storing a job in a crawl counts as seeing it too (see jobstore.JobWriter).
+
+A closed posting was listed from date_added, when it was first stored, until
+last_seen, which gives its lifetime. Both are what the scraper saw, so the
+lifetimes are lower bounds.
+
+Usage:
+    python census.py [--db linkedin_jobs.db] [--top 20]
+
+prints how many postings are open and closed and the lifetimes of the
+closed ones per search title.
+"""
+
+import argparse
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime
+from statistics import median
+
+DB_NAME = "linkedin_jobs.db"
+
+# Consecutive censuses a job must be missing from before it counts as closed
+CLOSE_AFTER_MISSES = 3
+
+
+def ensure_schema(conn):
+    existing = {row[1] for row in conn.execute('PRAGMA table_info(jobs)')}
+    if "last_seen" not in existing:
+        conn.execute('ALTER TABLE jobs ADD COLUMN last_seen TIMESTAMP')
+        # Until a census runs, the last time a job was seen is when it was scraped
+        with conn:
+            conn.execute('UPDATE jobs SET last_seen = scraped_date')
+    if "missed_censuses" not in existing:
+        conn.execute('ALTER TABLE jobs ADD COLUMN missed_censuses INTEGER NOT NULL DEFAULT 0')
+    if "closed_date" not in existing:
+        conn.execute('ALTER TABLE jobs ADD COLUMN closed_date TIMESTAMP')
+
+
+@dataclass
+class CensusResult:
+    # Job IDs on the walked pages, and how many of those aren't stored yet
+    seen: int
+    unknown: int
+    # Searches walked to the end of their results
+    searches: int
+    # Closed jobs that were listed again
+    reopened: int
+    # Open jobs missing from their search, and how many of those are now closed
+    missed: int
+    closed: int
+
+
+class Census:
+    """The job IDs and finished searches of one census, written to the jobs table by commit()."""
+
+    def __init__(self, conn, started=None, close_after=CLOSE_AFTER_MISSES):
+        self.conn = conn
+        self.started = started or datetime.now()
+        self.close_after = close_after
+        self.seen = set()
+        self.searches = set()
+
+    def saw(self, job_ids):
+        self.seen.update(job_ids)
+
+    def completed(self, job_title, city):
+        """Mark a search as walked to the end, so its missing jobs count as missed."""
+        self.searches.add((job_title, city))
+
+    def commit(self):
+        """Write the census to the jobs table in one transaction; returns a CensusResult."""
+        self.conn.execute('CREATE TEMP TABLE IF NOT EXISTS census_seen (job_id TEXT PRIMARY KEY) WITHOUT ROWID')
+        self.conn.execute('''
+            CREATE TEMP TABLE IF NOT EXISTS census_searches (
+                search_title TEXT NOT NULL,
+                city TEXT NOT NULL,
+                PRIMARY KEY (search_title, city)
+            ) WITHOUT ROWID
+        ''')
+        with self.conn:
+            self.conn.execute('DELETE FROM census_seen')
+            self.conn.execute('DELETE FROM census_searches')
+            self.conn.executemany('INSERT INTO census_seen VALUES (?)', ((job_id,) for job_id in self.seen))
+            self.conn.executemany('INSERT INTO census_searches VALUES (?, ?)', self.searches)
+            reopened = self.conn.execute('''
+                SELECT COUNT(*) FROM jobs
+                WHERE closed_date IS NOT NULL AND job_id IN (SELECT job_id FROM census_seen)
+            ''').fetchone()[0]
+            updated = self.conn.execute('''
+                UPDATE jobs SET last_seen = ?, missed_censuses = 0, closed_date = NULL
+                WHERE job_id IN (SELECT job_id FROM census_seen)
+            ''', (self.started,)).rowcount
+            missed = self.conn.execute('''
+                UPDATE jobs SET missed_censuses = missed_censuses + 1
+                WHERE closed_date IS NULL
+                  AND (search_title, city) IN (SELECT search_title, city FROM census_searches)
+                  AND job_id NOT IN (SELECT job_id FROM census_seen)
+            ''').rowcount
+            closed = self.conn.execute('''
+                UPDATE jobs SET closed_date = ?
+                WHERE closed_date IS NULL AND missed_censuses >= ?
+            ''', (self.started, self.close_after)).rowcount
+            self.conn.execute('DELETE FROM census_seen')
+            self.conn.execute('DELETE FROM census_searches')
+        return CensusResult(len(self.seen), len(self.seen) - updated, len(self.searches), reopened, missed, closed)
+
+
+def posting_lifetimes(conn):
+    """Return {search_title: [days listed]} over the closed postings."""
+    lifetimes = {}
+    rows = conn.execute('''
+        SELECT COALESCE(search_title, ''), julianday(COALESCE(last_seen, scraped_date)) - julianday(date_added)
+        FROM jobs
+        WHERE closed_date IS NOT NULL AND date_added IS NOT NULL
+    ''')
+    for search_title, days in rows:
+        if days is not None:
+            lifetimes.setdefault(search_title, []).append(max(0.0, days))
+    return lifetimes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show how many postings are open and how long closed ones were listed.")
+    parser.add_argument("--db", default=DB_NAME)
+    parser.add_argument("--top", type=int, default=20, help="search titles to list, most closed postings first")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    ensure_schema(conn)
+    open_jobs, closed_jobs, latest = conn.execute('''
+        SELECT COALESCE(SUM(closed_date IS NULL), 0), COALESCE(SUM(closed_date IS NOT NULL), 0), MAX(last_seen)
+        FROM jobs
+    ''').fetchone()
+    print(f"{open_jobs} open postings, {closed_jobs} closed; latest sighting {latest or 'never'}")
+    lifetimes = posting_lifetimes(conn)
+    if lifetimes:
+        everything = [days for days_listed in lifetimes.values() for days in days_listed]
+        print(f"{'search title':<36}{'closed':>8}{'median days':>13}{'max days':>10}")
+        print(f"{'(all)':<36}{len(everything):>8}{median(everything):>13.1f}{max(everything):>10.1f}")
+        for search_title, days_listed in sorted(lifetimes.items(), key=lambda item: -len(item[1]))[:args.top]:
+            print(f"{search_title or '(unknown)':<36}{len(days_listed):>8}{median(days_listed):>13.1f}"
+                  f"{max(days_listed):>10.1f}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Page-level checkpoints so an interrupted scrape resumes where it stopped.
+
+There is one row per (job_title, city) search. It records the last page
+whose jobs have all been written and how many jobs the search has collected
+so far. Updates are buffered and written in one statement per flush. The
+writer task flushes them right after the jobs they cover, so a checkpoint
+never gets ahead of the data. A resumed search restarts on the page after
+its checkpoint, and any of that page's jobs written before the interruption
+are skipped there as fresh (jobstore.fresh_job_ids).
+
+The scrape_run row says when the current run started and whether it
+finished. Only a run that never finished, and wrote its last checkpoint
+less than CHECKPOINT_MAX_AGE ago, is resumed; anything else starts over.
+A run that finishes with some searches still in progress (because they
+failed) therefore doesn't make the next run crawl only those searches.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from jobstore import retry_when_busy
+
+# Result pages shift as postings come and go, so the page an older run
+# stopped on no longer says which jobs it has collected
+CHECKPOINT_MAX_AGE = timedelta(hours=24)
+
+
+@dataclass
+class Checkpoint:
+    job_title: str
+    city: str
+    # Last page whose jobs are all persisted; -1 before the first page
+    last_page: int = -1
+    jobs_collected: int = 0
+    status: str = "in_progress"  # in_progress | completed
+
+
+class CheckpointStore:
+    def __init__(self, conn):
+        self.conn = conn
+        self._pending = {}
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS scrape_checkpoint (
+                job_title TEXT NOT NULL,
+                city TEXT NOT NULL,
+                last_page INTEGER NOT NULL,
+                jobs_collected INTEGER NOT NULL,
+                status TEXT NOT NULL,
+                updated_at TIMESTAMP,
+                PRIMARY KEY (job_title, city)
+            )
+        ''')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS scrape_run (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                started_at TIMESTAMP NOT NULL,
+                finished_at TIMESTAMP
+            )
+        ''')
+
+    def load(self):
+        """Return {(job_title, city): Checkpoint} for every stored search."""
+        rows = self.conn.execute('''
+            SELECT job_title, city, last_page, jobs_collected, status
+            FROM scrape_checkpoint
+        ''')
+        return {(row[0], row[1]): Checkpoint(*row) for row in rows}
+
+    def resumable(self, max_age=CHECKPOINT_MAX_AGE, now=None):
+        """True if the last run was interrupted recently enough to pick up where it stopped."""
+        now = now or datetime.now()
+        row = self.conn.execute('''
+            SELECT r.finished_at, COALESCE((SELECT MAX(updated_at) FROM scrape_checkpoint), r.started_at)
+            FROM scrape_run r
+        ''').fetchone()
+        if row is None or row[0] is not None:
+            return False
+        return now - datetime.fromisoformat(row[1]) < max_age
+
+    def start_run(self):
+        """Forget the previous run's checkpoints and record that a new run has started."""
+        self._pending = {}
+        with self.conn:
+            self.conn.execute('DELETE FROM scrape_checkpoint')
+            self.conn.execute('INSERT OR REPLACE INTO scrape_run (id, started_at, finished_at) VALUES (1, ?, NULL)',
+                              (datetime.now(),))
+
+    def finish_run(self):
+        """Record that the run got through every search, so the next one starts over."""
+        with self.conn:
+            self.conn.execute('UPDATE scrape_run SET finished_at = ? WHERE id = 1', (datetime.now(),))
+
+    def mark(self, checkpoint):
+        """Buffer a checkpoint; only the latest one per search is written."""
+        self._pending[(checkpoint.job_title, checkpoint.city)] = checkpoint
+
+    def flush(self):
+        if not self._pending:
+            return
+        checkpoints, self._pending = list(self._pending.values()), {}
+        retry_when_busy(self._write, checkpoints)
+
+    def _write(self, checkpoints):
+        now = datetime.now()
+        with self.conn:
+            self.conn.executemany('''
+                INSERT INTO scrape_checkpoint (job_title, city, last_page, jobs_collected, status, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(job_title, city) DO UPDATE SET
+                    last_page = excluded.last_page,
+                    jobs_collected = excluded.jobs_collected,
+                    status = excluded.status,
+                    updated_at = excluded.updated_at
+            ''', [(cp.job_title, cp.city, cp.last_page, cp.jobs_collected, cp.status, now) for cp in checkpoints])
@@ -0,0 +1,154 @@
+"""Content-addressed, compressed storage for job descriptions.
+
+One ad is often posted in several cities and re-posted over time, so many
+jobs share the same description. Each distinct text is stored once in the
+descriptions table, keyed by a 128-bit BLAKE2b hash of its UTF-8 bytes and
+compressed with zlib or, when the zstandard package is installed, zstd.
+jobs.description_hash points at it.
+
+Rows written before this table existed keep their text in jobs.description
+until migrate_descriptions.py moves it. Connections opened with
+jobstore.connect() can read either kind through the job_descriptions view
+or load_description().
+
+jobs.description_seq grows with every job stored with a new or changed
+description (mark_described()), so readers that index the text, like the
+API's text index, can pick up where they stopped whatever else the writer
+does.
+"""
+
+import hashlib
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Codec for newly stored descriptions: "zstd" if zstandard is installed, else
+# "zlib". Every row records its own codec, so a database can hold both
+DESCRIPTION_CODEC = "zstd" if zstandard is not None else "zlib"
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 9
+
+_zstd_compressor = None
+_zstd_decompressor = None
+
+
+def available_codecs():
+    return ["zlib"] + (["zstd"] if zstandard is not None else [])
+
+
+def description_hash(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def compress(text, codec=DESCRIPTION_CODEC):
+    data = text.encode("utf-8")
+    if codec == "zlib":
+        return zlib.compress(data, ZLIB_LEVEL)
+    if codec == "zstd":
+        global _zstd_compressor
+        if zstandard is None:
+            raise RuntimeError("The zstd codec needs the zstandard package")
+        if _zstd_compressor is None:
+            _zstd_compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+        return _zstd_compressor.compress(data)
+    raise ValueError(f"Unknown description codec: {codec}")
+
+
+def decompress(codec, body):
+    if body is None:
+        return None
+    if codec == "zlib":
+        return zlib.decompress(body).decode("utf-8")
+    if codec == "zstd":
+        global _zstd_decompressor
+        if zstandard is None:
+            raise RuntimeError("Reading zstd descriptions needs the zstandard package")
+        if _zstd_decompressor is None:
+            _zstd_decompressor = zstandard.ZstdDecompressor()
+        return _zstd_decompressor.decompress(body).decode("utf-8")
+    raise ValueError(f"Unknown description codec: {codec}")
+
+
+def ensure_schema(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS descriptions (
+            hash BLOB PRIMARY KEY,
+            codec TEXT NOT NULL,
+            raw_size INTEGER NOT NULL,
+            body BLOB NOT NULL
+        )
+    ''')
+    existing = {row[1] for row in conn.execute('PRAGMA table_info(jobs)')}
+    if "description_seq" not in existing:
+        conn.execute('ALTER TABLE jobs ADD COLUMN description_seq INTEGER')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_description_seq ON jobs (description_seq)')
+    if conn.execute('SELECT 1 FROM jobs WHERE description_seq IS NULL LIMIT 1').fetchone() is not None:
+        with conn:
+            # Under the write lock, so two processes opening the database can't number the same jobs
+            if not conn.in_transaction:
+                conn.execute('BEGIN IMMEDIATE')
+            mark_described(conn, [row[0] for row in conn.execute(
+                'SELECT job_id FROM jobs WHERE description_seq IS NULL ORDER BY date_added, job_id')])
+
+
+def mark_described(conn, job_ids):
+    """Give the jobs the next description_seqs, in order.
+
+    Runs on conn without committing, like DuplicateDetector.add().
+    """
+    # The end of idx_jobs_description_seq, so no scan
+    first = conn.execute('SELECT COALESCE(MAX(description_seq), 0) + 1 FROM jobs').fetchone()[0]
+    conn.executemany('UPDATE jobs SET description_seq = ? WHERE job_id = ?',
+                     [(first + n, job_id) for n, job_id in enumerate(job_ids)])
+
+
+def register(conn):
+    """Create the read helpers on this connection; they last as long as it does."""
+    # deterministic lets SQLite use the function in indexes and skip re-evaluation
+    conn.create_function("decompress_description", 2, decompress, deterministic=True)
+    conn.execute('''
+        CREATE TEMP VIEW IF NOT EXISTS job_descriptions AS
+        SELECT jobs.job_id,
+               COALESCE(jobs.description, decompress_description(descriptions.codec, descriptions.body)) AS description
+        FROM jobs LEFT JOIN descriptions ON descriptions.hash = jobs.description_hash
+    ''')
+
+
+def store_descriptions(conn, texts, codec=DESCRIPTION_CODEC):
+    """Store the texts that aren't stored yet; returns how many were new.
+
+    texts maps hash -> text. Only unseen texts are compressed and written,
+    so a re-crawl of unchanged ads costs one indexed lookup per chunk. Call
+    it inside the caller's transaction.
+    """
+    if not texts:
+        return 0
+    hashes = list(texts)
+    placeholders = ",".join("?" * len(hashes))
+    existing = {row[0] for row in conn.execute(
+        f'SELECT hash FROM descriptions WHERE hash IN ({placeholders})', hashes
+    )}
+    new_rows = [(digest, codec, len(text.encode("utf-8")), compress(text, codec))
+                for digest, text in texts.items() if digest not in existing]
+    conn.executemany('INSERT OR IGNORE INTO descriptions (hash, codec, raw_size, body) VALUES (?, ?, ?, ?)', new_rows)
+    return len(new_rows)
+
+
+def load_description(conn, job_id):
+    """Description text of one job, or None if the job isn't stored."""
+    row = conn.execute('SELECT description FROM job_descriptions WHERE job_id = ?', (job_id,)).fetchone()
+    return row[0] if row else None
+
+
+def prune_descriptions(conn):
+    """Delete descriptions no job refers to any more. Returns the number removed."""
+    with conn:
+        cursor = conn.execute('''
+            DELETE FROM descriptions
+            WHERE hash NOT IN (SELECT description_hash FROM jobs WHERE description_hash IS NOT NULL)
+        ''')
+    return cursor.rowcount
@@ -0,0 +1,314 @@
+"""Near-duplicate detection for job postings with MinHash and LSH.
+
+Agencies and employers repost the same ad under new job IDs, titles and
+cities. Each description is cut into overlapping 5-word shingles, and a
+MinHash signature of NUM_PERM values estimates how similar two shingle sets
+are (their Jaccard similarity). The signature is split into BANDS bands, and
+each band is hashed into the minhash_buckets table. Postings that share a
+bucket are candidates, so checking a new posting only touches the few rows
+in its buckets instead of the whole table. A candidate whose signature
+agrees on at least DUPLICATE_THRESHOLD of its values is a duplicate. The
+new posting's jobs.duplicate_of then points at the first posting of that ad.
+
+Signatures are stored in jobs.minhash. Changing NUM_PERM, BANDS,
+SHINGLE_WORDS or SEED makes the stored ones incomparable, so run
+"backfill --rebuild" afterwards.
+
+Usage:
+    python duplicates.py backfill [--rebuild] [--db linkedin_jobs.db]
+    python duplicates.py sample pairs.csv [--pairs 200]
+    python duplicates.py evaluate pairs.csv
+
+"sample" writes linked pairs and near misses to a CSV with an empty
+"duplicate" column. Fill it in with 1 or 0, then "evaluate" reports the
+precision and recall of the stored links against those labels, and what a
+range of other thresholds would have given.
+"""
+
+import argparse
+import csv
+import random
+import re
+import zlib
+
+import numpy as np
+
+NUM_PERM = 64
+BANDS = 16  # of NUM_PERM // BANDS rows each
+SHINGLE_WORDS = 5
+SEED = 1
+
+# Estimated Jaccard similarity at which two postings count as the same ad. On
+# the synthetic set in tests/test_duplicates.py, 0.7 links about 85% of reposts
+# with up to 8 edited words at 0.99 precision, and keeps apart roles that share
+# up to three quarters of their text; 0.8 misses about 40% of the reposts, and
+# below 0.7 precision drops and the LSH bands start to miss candidates
+DUPLICATE_THRESHOLD = 0.7
+
+# Candidates checked per posting; only hit by boilerplate shared by many ads
+MAX_CANDIDATES = 200
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+
+_rng = np.random.default_rng(SEED)
+# Multiply-shift hash functions, one per permutation, and multipliers that
+# combine word hashes into shingle hashes and signature rows into buckets
+_PERM_A = _rng.integers(0, 2**64, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_PERM_B = _rng.integers(0, 2**64, NUM_PERM, dtype=np.uint64)
+_SHINGLE_MULT = _rng.integers(0, 2**64, SHINGLE_WORDS, dtype=np.uint64) | np.uint64(1)
+_BAND_MULT = _rng.integers(0, 2**64, (BANDS, NUM_PERM // BANDS), dtype=np.uint64) | np.uint64(1)
+_SHIFT = np.uint64(32)
+
+
+def shingle_hashes(text):
+    """Distinct 64-bit hashes of the text's word shingles (fewer words if the text is short)."""
+    words = _WORD_RE.findall(text.lower())
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    word_hashes = np.fromiter((zlib.crc32(word.encode()) for word in words), dtype=np.uint64, count=len(words))
+    k = min(SHINGLE_WORDS, len(words))
+    n = len(words) - k + 1
+    # uint64 arithmetic wraps around, which is what the hashing wants
+    hashes = np.zeros(n, dtype=np.uint64)
+    for j in range(k):
+        hashes += word_hashes[j:j + n] * _SHINGLE_MULT[j]
+    return np.unique(hashes)
+
+
+def signature(text):
+    """MinHash signature (NUM_PERM uint32 values) of a description, or None if it has no words."""
+    hashes = shingle_hashes(text or "")
+    if hashes.size == 0:
+        return None
+    return ((_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) >> _SHIFT).min(axis=1).astype(np.uint32)
+
+
+def band_buckets(sig):
+    """One 64-bit bucket key per band; each band hashes with its own multipliers."""
+    bands = sig.reshape(BANDS, -1).astype(np.uint64)
+    return (bands * _BAND_MULT).sum(axis=1, dtype=np.uint64).view(np.int64).tolist()
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity: the fraction of signature values that agree."""
+    return float(np.count_nonzero(sig_a == sig_b)) / len(sig_a)
+
+
+def _from_blob(blob):
+    return np.frombuffer(blob, dtype="<u4")
+
+
+def ensure_schema(conn):
+    existing = {row[1] for row in conn.execute('PRAGMA table_info(jobs)')}
+    if "minhash" not in existing:
+        conn.execute('ALTER TABLE jobs ADD COLUMN minhash BLOB')
+    if "duplicate_of" not in existing:
+        conn.execute('ALTER TABLE jobs ADD COLUMN duplicate_of TEXT')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_duplicate_of ON jobs (duplicate_of)')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS minhash_buckets (
+            bucket INTEGER NOT NULL,
+            job_id TEXT NOT NULL,
+            PRIMARY KEY (bucket, job_id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_minhash_buckets_job ON minhash_buckets (job_id)')
+
+
+class DuplicateDetector:
+    """Indexes postings as they are written and links each one to an earlier copy.
+
+    add() runs its statements on conn without committing, so the caller
+    decides the transaction (JobWriter uses the one its chunk is written in).
+    """
+
+    def __init__(self, conn, threshold=DUPLICATE_THRESHOLD):
+        self.conn = conn
+        self.threshold = threshold
+
+    def find_duplicate(self, job_id, sig, buckets):
+        """The root posting sig duplicates, with its similarity, or (None, 0.0)."""
+        placeholders = ",".join("?" * len(buckets))
+        candidates = [row[0] for row in self.conn.execute(
+            f'SELECT DISTINCT job_id FROM minhash_buckets WHERE bucket IN ({placeholders}) AND job_id != ? LIMIT ?',
+            (*buckets, job_id, MAX_CANDIDATES)
+        )]
+        if not candidates:
+            return None, 0.0
+        best, best_similarity = None, 0.0
+        placeholders = ",".join("?" * len(candidates))
+        for candidate, blob, duplicate_of in self.conn.execute(
+            f'SELECT job_id, minhash, duplicate_of FROM jobs WHERE job_id IN ({placeholders}) AND minhash IS NOT NULL',
+            candidates
+        ):
+            root = duplicate_of or candidate
+            if root == job_id:
+                continue  # one of this posting's own duplicates
+            score = similarity(sig, _from_blob(blob))
+            if score >= self.threshold and score > best_similarity:
+                best, best_similarity = root, score
+        return best, best_similarity
+
+    def add(self, job_id, text):
+        """(Re-)index one stored posting. Returns the job_id it duplicates, or None."""
+        self.conn.execute('DELETE FROM minhash_buckets WHERE job_id = ?', (job_id,))
+        sig = signature(text)
+        if sig is None:
+            # An empty signature marks the posting as indexed with nothing to compare
+            self.conn.execute("UPDATE jobs SET minhash = X'', duplicate_of = NULL WHERE job_id = ?", (job_id,))
+            return None
+        buckets = band_buckets(sig)
+        duplicate_of, _ = self.find_duplicate(job_id, sig, buckets)
+        self.conn.executemany('INSERT OR IGNORE INTO minhash_buckets (bucket, job_id) VALUES (?, ?)',
+                              [(bucket, job_id) for bucket in buckets])
+        self.conn.execute('UPDATE jobs SET minhash = ?, duplicate_of = ? WHERE job_id = ?',
+                          (sig.astype("<u4").tobytes(), duplicate_of, job_id))
+        if duplicate_of:
+            # Keep links one level deep: this posting's own duplicates follow it
+            self.conn.execute('UPDATE jobs SET duplicate_of = ? WHERE duplicate_of = ?', (duplicate_of, job_id))
+        return duplicate_of
+
+
+def backfill(conn, rebuild=False, batch_size=1000):
+    """Index every stored posting that has no signature yet, oldest first.
+
+    Returns (postings indexed, duplicates found). Each batch commits on its
+    own, so an interrupted backfill picks up where it stopped.
+    """
+    if rebuild:
+        with conn:
+            conn.execute('DELETE FROM minhash_buckets')
+            conn.execute('UPDATE jobs SET minhash = NULL, duplicate_of = NULL')
+    detector = DuplicateDetector(conn)
+    job_ids = [row[0] for row in conn.execute(
+        'SELECT job_id FROM jobs WHERE minhash IS NULL ORDER BY date_added, job_id'
+    )]
+    linked = 0
+    for start in range(0, len(job_ids), batch_size):
+        batch = job_ids[start:start + batch_size]
+        placeholders = ",".join("?" * len(batch))
+        # The job_descriptions view decompresses transparently
+        texts = dict(conn.execute(
+            f'SELECT job_id, description FROM job_descriptions WHERE job_id IN ({placeholders})', batch
+        ))
+        with conn:
+            for job_id in batch:
+                linked += detector.add(job_id, texts.get(job_id)) is not None
+        print(f"Indexed {start + len(batch)} of {len(job_ids)} postings, {linked} duplicates so far")
+    return len(job_ids), linked
+
+
+def _root(conn, job_id):
+    seen = set()
+    while job_id and job_id not in seen:
+        seen.add(job_id)
+        row = conn.execute('SELECT duplicate_of FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+        if not row or not row[0]:
+            return job_id
+        job_id = row[0]
+    return job_id
+
+
+def _signature_of(conn, job_id):
+    row = conn.execute('SELECT minhash FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+    return _from_blob(row[0]) if row and row[0] else None
+
+
+def sample_pairs(conn, count, seed=0):
+    """Half linked pairs, half candidates that fell short of the threshold, for labelling."""
+    rng = random.Random(seed)
+    linked = conn.execute(
+        'SELECT job_id, duplicate_of FROM jobs WHERE duplicate_of IS NOT NULL ORDER BY RANDOM() LIMIT ?',
+        (count // 2,)
+    ).fetchall()
+    near_misses = []
+    job_ids = [row[0] for row in conn.execute("SELECT job_id FROM jobs WHERE LENGTH(minhash) > 0")]
+    rng.shuffle(job_ids)
+    detector = DuplicateDetector(conn, threshold=0.0)
+    for job_id in job_ids:
+        if len(near_misses) >= count - len(linked):
+            break
+        sig = _signature_of(conn, job_id)
+        other, score = detector.find_duplicate(job_id, sig, band_buckets(sig))
+        if other and score < DUPLICATE_THRESHOLD and _root(conn, job_id) != _root(conn, other):
+            near_misses.append((job_id, other))
+    return linked + near_misses
+
+
+def evaluate(conn, labels):
+    """Precision/recall of the stored links, and of other thresholds, against labelled pairs.
+
+    labels is a list of (job_id_a, job_id_b, is_duplicate).
+    """
+    scored = []
+    for job_a, job_b, actual in labels:
+        sig_a, sig_b = _signature_of(conn, job_a), _signature_of(conn, job_b)
+        score = similarity(sig_a, sig_b) if sig_a is not None and sig_b is not None else 0.0
+        scored.append((_root(conn, job_a) == _root(conn, job_b), score, actual))
+
+    def metrics(predictions):
+        tp = sum(1 for predicted, actual in predictions if predicted and actual)
+        fp = sum(1 for predicted, actual in predictions if predicted and not actual)
+        fn = sum(1 for predicted, actual in predictions if not predicted and actual)
+        precision = tp / (tp + fp) if tp + fp else 1.0
+        recall = tp / (tp + fn) if tp + fn else 1.0
+        return tp, fp, fn, precision, recall
+
+    lines = [f"{len(labels)} labelled pairs, {sum(actual for _, _, actual in labels)} duplicates",
+             f"{'':<18}{'TP':>5}{'FP':>5}{'FN':>5}{'precision':>11}{'recall':>8}"]
+    tp, fp, fn, precision, recall = metrics([(linked, actual) for linked, _, actual in scored])
+    lines.append(f"{'stored links':<18}{tp:>5}{fp:>5}{fn:>5}{precision:>11.3f}{recall:>8.3f}")
+    for threshold in (0.5, 0.6, 0.7, 0.8, 0.9):
+        tp, fp, fn, precision, recall = metrics([(score >= threshold, actual) for _, score, actual in scored])
+        lines.append(f"{f'similarity >= {threshold}':<18}{tp:>5}{fp:>5}{fn:>5}{precision:>11.3f}{recall:>8.3f}")
+    return "\n".join(lines)
+
+
+def _parse_label(value):
+    value = value.strip().lower()
+    if value in ("1", "yes", "y", "true"):
+        return True
+    if value in ("0", "no", "n", "false"):
+        return False
+    return None
+
+
+def main():
+    from jobstore import DB_NAME, connect
+
+    parser = argparse.ArgumentParser(description="Near-duplicate detection for stored job postings.")
+    parser.add_argument("command", choices=["backfill", "sample", "evaluate"])
+    parser.add_argument("csv", nargs="?", help="pairs file written by sample / read by evaluate")
+    parser.add_argument("--db", default=DB_NAME)
+    parser.add_argument("--rebuild", action="store_true", help="backfill: recompute every signature and link")
+    parser.add_argument("--pairs", type=int, default=200, help="sample: number of pairs to write")
+    args = parser.parse_args()
+    if args.command != "backfill" and not args.csv:
+        parser.error(f"{args.command} needs a CSV path")
+
+    conn = connect(args.db)
+    if args.command == "backfill":
+        done, linked = backfill(conn, rebuild=args.rebuild)
+        total = conn.execute('SELECT COUNT(*) FROM jobs WHERE duplicate_of IS NOT NULL').fetchone()[0]
+        print(f"Indexed {done} postings ({linked} new duplicates); {total} postings are marked as duplicates")
+    elif args.command == "sample":
+        pairs = sample_pairs(conn, args.pairs)
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["job_id_a", "job_id_b", "title_a", "title_b", "similarity", "duplicate"])
+            for job_a, job_b in pairs:
+                titles = dict(conn.execute('SELECT job_id, title FROM jobs WHERE job_id IN (?, ?)', (job_a, job_b)))
+                sig_a, sig_b = _signature_of(conn, job_a), _signature_of(conn, job_b)
+                writer.writerow([job_a, job_b, titles.get(job_a), titles.get(job_b),
+                                 f"{similarity(sig_a, sig_b):.2f}", ""])
+        print(f"Wrote {len(pairs)} pairs to {args.csv}; fill in the duplicate column with 1 or 0")
+    else:
+        with open(args.csv, newline="") as f:
+            labels = [(row["job_id_a"], row["job_id_b"], label) for row in csv.DictReader(f)
+                      if (label := _parse_label(row.get("duplicate", ""))) is not None]
+        print(evaluate(conn, labels))
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""HTML extraction backends for LinkedIn search-result and job-detail pages.
+
+The scraper only needs four fields from each search card and the text of
+`.description__text` from a detail page, so the fast backends skip the
+`<head>` and everything else that comes before the part of the page we read,
+instead of building a tree for the whole document.
+
+Backends, fastest first:
+    selectolax  - `pip install selectolax` (lexbor engine)
+    lxml        - `pip install lxml`
+    bs4         - BeautifulSoup + html.parser, the original path, kept as fallback
+
+`get_extractor()` picks the fastest one that is installed. A backend
+imports its library when it is created, so only the one in use is loaded.
+"""
+
+import re
+from abc import ABC, abstractmethod
+from importlib.util import find_spec
+
+RESULTS_LIST_CLASS = "jobs-search__results-list"
+DESCRIPTION_CLASS = "description__text"
+
+def _class_start_re(class_name):
+    """Match the opening tag of an element carrying class_name as a whole token.
+
+    `description__text--rich` on its own doesn't count, and CSS rules in
+    <style> blocks are skipped because they never contain `class="`.
+    """
+    return re.compile(
+        rb'<[a-zA-Z][^>]*\bclass="(?:[^"]*\s)?' + re.escape(class_name.encode()) + rb'(?=[\s"])'
+    )
+
+
+_RESULTS_LIST_RE = _class_start_re(RESULTS_LIST_CLASS)
+_DESCRIPTION_RE = _class_start_re(DESCRIPTION_CLASS)
+
+# Characters BeautifulSoup treats as whitespace when collapsing text nodes
+_ASCII_SPACES = " \n\t\x0c\r"
+
+
+def _as_bytes(html):
+    return html.encode("utf-8") if isinstance(html, str) else html
+
+
+def _join_text(chunks):
+    """Concatenate text nodes the way BeautifulSoup's `.text` does.
+
+    BeautifulSoup collapses every whitespace-only text node to a single
+    newline (or a space if it had no newline). Doing the same here keeps
+    descriptions byte-identical whichever backend produced them.
+    """
+    parts = []
+    for chunk in chunks:
+        if chunk and not chunk.strip(_ASCII_SPACES):
+            chunk = "\n" if "\n" in chunk else " "
+        parts.append(chunk)
+    return "".join(parts)
+
+
+def _slice_from(html, pattern):
+    """Return the document from the first element matching pattern onwards, or None."""
+    match = pattern.search(html)
+    if match is None:
+        return None
+    return html[match.start():]
+
+
+def has_results_list(html):
+    """True if html has the search-results list, even an empty one; block and login pages don't."""
+    return _RESULTS_LIST_RE.search(_as_bytes(html)) is not None
+
+
+class Extractor(ABC):
+    """Interface shared by every backend.
+
+    parse_cards() returns one dict per search card with the keys title,
+    company, location and job_link. A key is None when the card lacks that
+    field, so callers can still count every card on the page.
+    parse_description() returns the stripped description text, or None.
+    """
+
+    name = None
+    # The library the backend needs
+    module = None
+
+    @abstractmethod
+    def parse_cards(self, html):
+        ...
+
+    @abstractmethod
+    def parse_description(self, html):
+        ...
+
+
+class SelectolaxExtractor(Extractor):
+    name = "selectolax"
+    module = "selectolax.lexbor"
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+        self._parser = LexborHTMLParser
+
+    @staticmethod
+    def _node_text(node):
+        return _join_text(child.text_content for child in node.traverse(include_text=True)
+                          if child.tag == "-text").strip()
+
+    def _text(self, node, selector):
+        found = node.css_first(selector)
+        return self._node_text(found) if found is not None else None
+
+    def parse_cards(self, html):
+        fragment = _slice_from(_as_bytes(html), _RESULTS_LIST_RE)
+        if fragment is None:
+            return []
+        tree = self._parser(fragment)
+        cards = []
+        for card in tree.css(f".{RESULTS_LIST_CLASS} li"):
+            link = card.css_first("a.base-card__full-link")
+            cards.append({
+                "title": self._text(card, ".base-search-card__title"),
+                "company": self._text(card, ".base-search-card__subtitle"),
+                "location": self._text(card, ".job-search-card__location"),
+                "job_link": link.attributes.get("href") if link is not None else None,
+            })
+        return cards
+
+    def parse_description(self, html):
+        fragment = _slice_from(_as_bytes(html), _DESCRIPTION_RE)
+        if fragment is None:
+            return None
+        return self._text(self._parser(fragment), f".{DESCRIPTION_CLASS}")
+
+
+def _has_class(class_name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+class LxmlExtractor(Extractor):
+    name = "lxml"
+    module = "lxml.html"
+
+    _CARDS = f"//*[{_has_class(RESULTS_LIST_CLASS)}]//li"
+    _TITLE = f".//*[{_has_class('base-search-card__title')}]"
+    _COMPANY = f".//*[{_has_class('base-search-card__subtitle')}]"
+    _LOCATION = f".//*[{_has_class('job-search-card__location')}]"
+    _LINK = f".//a[{_has_class('base-card__full-link')}]/@href"
+    _DESCRIPTION = f"//*[{_has_class(DESCRIPTION_CLASS)}]"
+
+    def __init__(self):
+        import lxml.html
+        self._html = lxml.html
+        # The slice we parse has lost the <meta charset>, so don't let
+        # libxml2 guess the encoding
+        self._parser = lxml.html.HTMLParser(encoding="utf-8")
+
+    @staticmethod
+    def _text(node, xpath):
+        found = node.xpath(xpath)
+        return _join_text(found[0].xpath(".//text()")).strip() if found else None
+
+    def parse_cards(self, html):
+        fragment = _slice_from(_as_bytes(html), _RESULTS_LIST_RE)
+        if fragment is None:
+            return []
+        tree = self._html.document_fromstring(fragment, parser=self._parser)
+        cards = []
+        for card in tree.xpath(self._CARDS):
+            links = card.xpath(self._LINK)
+            cards.append({
+                "title": self._text(card, self._TITLE),
+                "company": self._text(card, self._COMPANY),
+                "location": self._text(card, self._LOCATION),
+                "job_link": str(links[0]) if links else None,
+            })
+        return cards
+
+    def parse_description(self, html):
+        fragment = _slice_from(_as_bytes(html), _DESCRIPTION_RE)
+        if fragment is None:
+            return None
+        tree = self._html.document_fromstring(fragment, parser=self._parser)
+        return self._text(tree, self._DESCRIPTION)
+
+
+class SoupExtractor(Extractor):
+    """The original full-document BeautifulSoup parse."""
+
+    name = "bs4"
+    module = "bs4"
+
+    def __init__(self):
+        from bs4 import BeautifulSoup
+        self._soup = BeautifulSoup
+
+    @staticmethod
+    def _text(node, selector):
+        found = node.select_one(selector)
+        return found.text.strip() if found is not None else None
+
+    def parse_cards(self, html):
+        soup = self._soup(html, "html.parser")
+        cards = []
+        for card in soup.select(f".{RESULTS_LIST_CLASS} li"):
+            link = card.select_one("a.base-card__full-link")
+            cards.append({
+                "title": self._text(card, ".base-search-card__title"),
+                "company": self._text(card, ".base-search-card__subtitle"),
+                "location": self._text(card, ".job-search-card__location"),
+                "job_link": link.get("href") if link is not None else None,
+            })
+        return cards
+
+    def parse_description(self, html):
+        soup = self._soup(html, "html.parser")
+        return self._text(soup, f".{DESCRIPTION_CLASS}")
+
+
+# Backend name -> class, fastest first
+EXTRACTORS = {cls.name: cls for cls in (SelectolaxExtractor, LxmlExtractor, SoupExtractor)}
+
+
+def _installed(cls):
+    # Finds the library without importing it (only its parent package)
+    try:
+        return find_spec(cls.module) is not None
+    except ModuleNotFoundError:
+        return False
+
+
+def available_extractors():
+    """Names of the backends whose library is installed, fastest first."""
+    return [name for name, cls in EXTRACTORS.items() if _installed(cls)]
+
+
+def get_extractor(name=None):
+    """Return an extractor by name, or the fastest installed one if name is None."""
+    if name is None:
+        available = available_extractors()
+        if not available:
+            raise RuntimeError("No HTML parser installed; install selectolax, lxml or beautifulsoup4")
+        name = available[0]
+    if name not in EXTRACTORS:
+        raise ValueError(f"Unknown extractor {name!r}; choose from {', '.join(EXTRACTORS)}")
+    cls = EXTRACTORS[name]
+    if not _installed(cls):
+        raise RuntimeError(f"Extractor {name!r} is not installed")
+    return cls()
@@ -0,0 +1,191 @@
+"""Persistent crawl frontier shared by several scraper processes.
+
+Work items are single search pages, keyed by (job_title, city, page). A
+worker claims an item with a time-limited lease, renews the lease while it
+works, and marks the item done when it finishes. Finishing a full page
+queues the next one. If a worker dies, its lease runs out and the next
+claim picks the item up again. Every process, on this host or another
+one that can reach the database file, just needs to point at the same
+frontier database.
+
+Usage:
+    python frontier.py status [--db linkedin_jobs.db]
+"""
+
+import argparse
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+FRONTIER_DB = "linkedin_jobs.db"
+
+# How long a claimed item stays reserved without a renewal
+LEASE_SECONDS = 120
+
+# Items claimed this many times without being completed are given up on
+MAX_ATTEMPTS = 3
+
+# Seconds to wait for another process's write lock before "database is locked"
+BUSY_TIMEOUT = 30
+
+
+@dataclass(frozen=True)
+class WorkItem:
+    job_title: str
+    city: str
+    page: int
+    # Jobs still wanted from this search when the page was queued
+    max_jobs: int
+    attempts: int
+
+
+class Frontier:
+    """Lease-based work queue stored in SQLite.
+
+    Every method may wait up to BUSY_TIMEOUT for the write lock, so async
+    callers run them in a thread (asyncio.to_thread); a lock keeps the
+    threads from interleaving on the one connection. clock is injectable so
+    lease expiry can be exercised without waiting.
+    """
+
+    def __init__(self, db_name=FRONTIER_DB, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS,
+                 clock=time.time):
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self._lock = threading.Lock()
+        # Several processes contend for the write lock; wait for it rather
+        # than failing with "database is locked"
+        self.conn = sqlite3.connect(db_name, timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS crawl_frontier (
+                job_title TEXT NOT NULL,
+                city TEXT NOT NULL,
+                page INTEGER NOT NULL,
+                max_jobs INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                lease_owner TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (job_title, city, page)
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_frontier_status ON crawl_frontier (status, lease_expires)')
+
+    def seed(self, searches, reset=False):
+        """Queue page 0 of each (job_title, city, max_jobs) search.
+
+        Searches already in the frontier are left as they are unless reset
+        is true, which clears the whole frontier first.
+        """
+        with self._lock, self.conn:
+            self.conn.execute('BEGIN IMMEDIATE')
+            if reset:
+                self.conn.execute('DELETE FROM crawl_frontier')
+            self.conn.executemany('''
+                INSERT OR IGNORE INTO crawl_frontier (job_title, city, page, max_jobs)
+                VALUES (?, ?, 0, ?)
+            ''', searches)
+
+    def claim(self, owner):
+        """Lease the next available item to owner, or return None if there is none.
+
+        Pending items come first, then items whose lease has expired. A single
+        UPDATE ... RETURNING statement makes the claim atomic across processes.
+        """
+        now = self.clock()
+        with self._lock, self.conn:
+            self.conn.execute('BEGIN IMMEDIATE')
+            self.conn.execute('''
+                UPDATE crawl_frontier SET status = 'failed', lease_owner = NULL
+                WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?
+            ''', (now, self.max_attempts))
+            row = self.conn.execute('''
+                UPDATE crawl_frontier
+                SET status = 'leased', lease_owner = ?, lease_expires = ?, attempts = attempts + 1
+                WHERE rowid = (
+                    SELECT rowid FROM crawl_frontier
+                    WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?)
+                    ORDER BY status = 'leased', page, rowid
+                    LIMIT 1
+                )
+                RETURNING job_title, city, page, max_jobs, attempts
+            ''', (owner, now + self.lease_seconds, now)).fetchone()
+        return WorkItem(*row) if row else None
+
+    def renew(self, item, owner):
+        """Extend owner's lease on item. Returns False if the lease was lost."""
+        with self._lock:
+            cursor = self.conn.execute('''
+                UPDATE crawl_frontier SET lease_expires = ?
+                WHERE job_title = ? AND city = ? AND page = ? AND status = 'leased' AND lease_owner = ?
+            ''', (self.clock() + self.lease_seconds, item.job_title, item.city, item.page, owner))
+        return cursor.rowcount == 1
+
+    def complete(self, item, owner, next_max_jobs=None):
+        """Mark item done and, if next_max_jobs is given, queue the following page.
+
+        Returns False (and changes nothing) if owner no longer holds the lease,
+        because another worker has reclaimed the item in the meantime.
+        """
+        with self._lock, self.conn:
+            self.conn.execute('BEGIN IMMEDIATE')
+            cursor = self.conn.execute('''
+                UPDATE crawl_frontier SET status = 'done', lease_owner = NULL, lease_expires = NULL
+                WHERE job_title = ? AND city = ? AND page = ? AND status = 'leased' AND lease_owner = ?
+            ''', (item.job_title, item.city, item.page, owner))
+            if cursor.rowcount != 1:
+                return False
+            if next_max_jobs:
+                self.conn.execute('''
+                    INSERT OR IGNORE INTO crawl_frontier (job_title, city, page, max_jobs)
+                    VALUES (?, ?, ?, ?)
+                ''', (item.job_title, item.city, item.page + 1, next_max_jobs))
+        return True
+
+    def release(self, item, owner):
+        """Give item back after a failure so it can be claimed again right away.
+
+        Items that have used up their attempts are marked failed instead.
+        """
+        with self._lock:
+            self.conn.execute('''
+                UPDATE crawl_frontier
+                SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                    lease_owner = NULL, lease_expires = NULL
+                WHERE job_title = ? AND city = ? AND page = ? AND status = 'leased' AND lease_owner = ?
+            ''', (self.max_attempts, item.job_title, item.city, item.page, owner))
+
+    def has_open_work(self):
+        """True while any item is pending or leased (possibly to another worker)."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM crawl_frontier WHERE status IN ('pending', 'leased') LIMIT 1"
+            ).fetchone()
+        return row is not None
+
+    def status_counts(self):
+        with self._lock:
+            return dict(self.conn.execute('SELECT status, COUNT(*) FROM crawl_frontier GROUP BY status'))
+
+    def close(self):
+        self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the shared crawl frontier.")
+    parser.add_argument("command", choices=["status"])
+    parser.add_argument("--db", default=FRONTIER_DB)
+    args = parser.parse_args()
+
+    frontier = Frontier(args.db)
+    counts = frontier.status_counts()
+    frontier.close()
+    for status in ("pending", "leased", "done", "failed"):
+        print(f"{status:<8}{counts.get(status, 0):>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+"""SQLite storage for scraped jobs."""
+
+import hashlib
+import sqlite3
+import time
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+from urllib.parse import parse_qs, urlsplit
+
+import census
+import descriptions
+import duplicates
+import search
+import skill_demand
+import skill_tagger
+from descriptions import DESCRIPTION_CODEC, description_hash, mark_described, store_descriptions
+from duplicates import DuplicateDetector
+from parsing import extract_job_id
+from skill_tagger import SkillTagger, store_tags
+
+DB_NAME = "linkedin_jobs.db"
+
+# Rows per executemany/commit in JobWriter
+WRITE_CHUNK_SIZE = 500
+
+# Seconds a write waits for another process's write lock (frontier workers
+# share the database), the same as frontier.BUSY_TIMEOUT, and how many more
+# times a write is tried when the lock is still held after that
+BUSY_TIMEOUT = 30
+BUSY_RETRIES = 3
+
+# description is only filled in by old rows; the text now lives in the
+# descriptions table under description_hash (see descriptions.py)
+JOB_COLUMNS = ("job_id", "title", "company", "city", "country", "description", "description_hash",
+               "job_link", "source_url", "source_site", "date_added", "scraped_date", "search_title",
+               "last_seen")
+
+# PRAGMA user_version of a database with the current schema. Bump it with
+# every change to ensure_schema() or the modules' ensure_schema() it calls,
+# so that older databases are upgraded the next time they are opened
+SCHEMA_VERSION = 2
+
+# What a failed description fetch is stored as
+_EMPTY_DESCRIPTION_HASH = description_hash("")
+
+# The columns that decide whether a job has to be re-indexed for search
+_INDEXED_COLUMNS = ("title", "company", "city", "country", "description_hash")
+_INDEXED_POSITIONS = [JOB_COLUMNS.index(col) for col in _INDEXED_COLUMNS]
+
+# date_added is left alone on conflict so it keeps the first time we saw the job;
+# a job that is scraped again is listed, so it is open again too (see census.py)
+_UPSERT_SQL = f'''
+    INSERT INTO jobs ({", ".join(JOB_COLUMNS)})
+    VALUES ({", ".join("?" * len(JOB_COLUMNS))})
+    ON CONFLICT(job_id) DO UPDATE SET
+        {", ".join(f"{col} = excluded.{col}" for col in JOB_COLUMNS if col not in ("job_id", "date_added"))},
+        missed_censuses = 0, closed_date = NULL
+'''
+
+
+def _add_missing_columns(conn, table, columns):
+    """ALTER TABLE in the columns an older database doesn't have yet; returns their names."""
+    existing = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+    added = []
+    for name, decl in columns:
+        if name not in existing:
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN {name} {decl}')
+            added.append(name)
+    return added
+
+
+def _fill_search_titles(conn):
+    """Recover search_title of older rows from the keywords of their search URL."""
+    rows = conn.execute("SELECT job_id, source_url FROM jobs WHERE source_url LIKE '%keywords=%'").fetchall()
+    titles = [(parse_qs(urlsplit(url).query).get("keywords", [None])[0], job_id) for job_id, url in rows]
+    with conn:
+        conn.executemany('UPDATE jobs SET search_title = ? WHERE job_id = ?', titles)
+
+
+def ensure_schema(conn):
+    """Create or upgrade the schema, unless the database is already at SCHEMA_VERSION.
+
+    Upgrading runs the modules' one-off backfills and takes the write lock;
+    opening a database that is up to date only reads user_version.
+    """
+    (version,) = conn.execute('PRAGMA user_version').fetchone()
+    if version >= SCHEMA_VERSION:
+        return
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            job_id TEXT PRIMARY KEY,
+            title TEXT,
+            company TEXT,
+            city TEXT,
+            country TEXT,
+            description TEXT,
+            description_hash BLOB,
+            job_link TEXT,
+            source_url TEXT,
+            source_site TEXT,
+            date_added TIMESTAMP,
+            scraped_date TIMESTAMP,
+            search_title TEXT
+        )
+    ''')
+
+    # Create indexes for faster queries
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_city ON jobs (city)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_scraped_date ON jobs (scraped_date)')
+
+    added = _add_missing_columns(conn, "jobs", [("description_hash", "BLOB"), ("search_title", "TEXT")])
+    if "search_title" in added:
+        _fill_search_titles(conn)
+    census.ensure_schema(conn)
+    descriptions.ensure_schema(conn)
+    duplicates.ensure_schema(conn)
+    search.ensure_schema(conn)
+    skill_tagger.ensure_schema(conn)
+    skill_demand.ensure_schema(conn)
+    conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+
+def connect(db_name=DB_NAME, check_same_thread=True):
+    """Open the jobs database, creating the schema on first use.
+
+    The database is switched to WAL so readers (analysts, the API) don't
+    block the scraper's writes and vice versa. Writes wait up to
+    BUSY_TIMEOUT for other writers. Pass check_same_thread=False to use the
+    connection from other threads, one at a time.
+    """
+    conn = sqlite3.connect(db_name, timeout=BUSY_TIMEOUT, check_same_thread=check_same_thread)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    ensure_schema(conn)
+    descriptions.register(conn)
+    return conn
+
+
+def retry_when_busy(write, *args):
+    """Call write(*args), trying again if SQLite is still busy after the connection's timeout.
+
+    write must commit or roll back as a whole, so calling it again is safe.
+    """
+    for attempt in range(BUSY_RETRIES + 1):
+        try:
+            return write(*args)
+        except sqlite3.OperationalError as e:
+            if attempt == BUSY_RETRIES or "database is locked" not in str(e):
+                raise
+            print(f"Database still locked, retrying the write ({attempt + 1} of {BUSY_RETRIES})")
+            time.sleep(attempt + 1)
+
+
+def fresh_job_ids(conn, job_ids, ttl):
+    """Return the job_ids already stored with a description and a scraped_date newer than ttl.
+
+    A job whose description fetch failed was stored with an empty one, and
+    is not fresh, so the next run tries it again. One query per call,
+    answered from the primary key index, so a whole search page is checked
+    in a single round trip.
+    """
+    if not job_ids:
+        return set()
+    placeholders = ",".join("?" * len(job_ids))
+    cutoff = datetime.now() - ttl
+    rows = conn.execute(
+        f'''SELECT job_id FROM jobs WHERE job_id IN ({placeholders}) AND scraped_date >= ?
+            AND (description_hash != ? OR description_hash IS NULL AND description != '')''',
+        (*job_ids, cutoff, _EMPTY_DESCRIPTION_HASH)
+    )
+    return {row[0] for row in rows}
+
+
+def _id_key(job_id):
+    """64-bit hash of a job ID; collisions are negligible at our table sizes."""
+    return int.from_bytes(hashlib.blake2b(job_id.encode(), digest_size=8).digest(), "big", signed=True)
+
+
+class KnownJobIds:
+    """Compact membership set of the job IDs already in the database.
+
+    IDs are LinkedIn URL slugs, so a plain set of str costs ~100 bytes per
+    job. This keeps a sorted array of 64-bit hashes instead (8 bytes per
+    job) and looks them up by binary search. IDs added during the run go
+    into a small ordinary set.
+    """
+
+    def __init__(self, job_ids=()):
+        self._keys = array("q", sorted(_id_key(job_id) for job_id in job_ids))
+        self._added = set()
+
+    @classmethod
+    def load(cls, conn):
+        return cls(row[0] for row in conn.execute('SELECT job_id FROM jobs'))
+
+    def __contains__(self, job_id):
+        key = _id_key(job_id)
+        if key in self._added:
+            return True
+        index = bisect_left(self._keys, key)
+        return index < len(self._keys) and self._keys[index] == key
+
+    def __len__(self):
+        return len(self._keys) + len(self._added)
+
+    def add(self, job_id):
+        if job_id not in self:
+            self._added.add(_id_key(job_id))
+
+
+class JobWriter:
+    """Batched upserts into the jobs table over one long-lived connection.
+
+    Jobs are buffered and written chunk_size at a time with a single
+    executemany of INSERT ... ON CONFLICT(job_id) DO UPDATE, then committed.
+    Descriptions go to the descriptions table in the same transaction, and
+    only the ones not stored yet are compressed and written. Jobs whose
+    description is new or changed get the next description_seq and are
+    checked for near-duplicates and tagged with skills there too, and new or
+    changed jobs are re-indexed for full-text search.
+    """
+
+    def __init__(self, conn, chunk_size=WRITE_CHUNK_SIZE, codec=DESCRIPTION_CODEC, detect_duplicates=True,
+                 tag_skills=True):
+        self.conn = conn
+        self.chunk_size = chunk_size
+        self.codec = codec
+        self.detector = DuplicateDetector(conn) if detect_duplicates else None
+        self.tagger = SkillTagger.from_database(conn) if tag_skills else None
+        self.new_jobs = 0
+        self.updated_jobs = 0
+        self.new_descriptions = 0
+        self.duplicates = 0
+        self._pending = []
+        self._texts = {}
+
+    def add(self, job):
+        job_id = job.get("job_id") or extract_job_id(job["job_link"])
+        if not job_id:
+            print(f"Could not extract job ID for: {job['title']}")
+            return
+        now = datetime.now()
+        digest = description_hash(job["description"])
+        self._texts[digest] = job["description"]
+        self._pending.append((
+            job_id,
+            job["title"],
+            job["company"],
+            job["city"],
+            job["country"],
+            None,  # description, superseded by description_hash
+            digest,
+            job["job_link"],
+            job["source_url"],
+            job["source_site"],
+            now,  # date_added, ignored if the job already exists
+            now,  # scraped_date
+            job.get("search_title"),
+            now  # last_seen
+        ))
+        if len(self._pending) >= self.chunk_size:
+            self.flush()
+
+    def write(self, jobs):
+        for job in jobs:
+            self.add(job)
+        self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        texts, self._texts = self._texts, {}
+        retry_when_busy(self._write_chunk, rows, texts)
+
+    def _write_chunk(self, rows, texts):
+        # Last write wins when a job appears twice in the chunk
+        latest = {row[0]: row for row in rows}
+        placeholders = ",".join("?" * len(latest))
+        duplicates = 0
+        with self.conn:
+            # Take the write lock before reading anything, so another writer
+            # on the same database can't hand out the same search rowids
+            if not self.conn.in_transaction:
+                self.conn.execute('BEGIN IMMEDIATE')
+            found = self.conn.execute(
+                f'SELECT job_id, search_rowid, skills_version, {", ".join(_INDEXED_COLUMNS)} FROM jobs '
+                f'WHERE job_id IN ({placeholders})',
+                list(latest)
+            ).fetchall()
+            previous = {row[0]: row[3:] for row in found}
+            search_rowids = {row[0]: row[1] for row in found if row[1] is not None}
+            skills_versions = {row[0]: row[2] for row in found}
+            current = {job_id: tuple(row[i] for i in _INDEXED_POSITIONS) for job_id, row in latest.items()}
+            changed = {job_id: values for job_id, values in current.items() if previous.get(job_id) != values}
+            # New jobs get the next rowids, so the index's rowid order is first-seen order
+            new_rowids = {}
+            last_rowid = None
+            for job_id in changed:
+                if job_id not in search_rowids:
+                    last_rowid = (last_rowid or search.last_rowid(self.conn)) + 1
+                    new_rowids[job_id] = search_rowids[job_id] = last_rowid
+            new_descriptions = store_descriptions(self.conn, texts, self.codec)
+            self.conn.executemany(_UPSERT_SQL, rows)
+            self.conn.executemany('UPDATE jobs SET search_rowid = ? WHERE job_id = ?',
+                                  [(rowid, job_id) for job_id, rowid in new_rowids.items()])
+            search.index_jobs(self.conn, [
+                (search_rowids[job_id], title, company, texts[digest], city, country, job_id)
+                for job_id, (title, company, city, country, digest) in changed.items()
+            ])
+            described = [job_id for job_id, values in changed.items()
+                         if job_id not in previous or previous[job_id][-1] != values[-1]]
+            mark_described(self.conn, described)
+            if self.detector is not None:
+                for job_id in described:
+                    duplicates += self.detector.add(job_id, texts[current[job_id][-1]]) is not None
+            if self.tagger is not None:
+                # Also catches jobs tagged with an older taxonomy
+                store_tags(self.conn, [
+                    (job_id, self.tagger.tag(texts[values[-1]])) for job_id, values in current.items()
+                    if job_id in changed or skills_versions.get(job_id) != self.tagger.version
+                ], self.tagger.version)
+        # Counted once the chunk is committed
+        self.new_descriptions += new_descriptions
+        self.duplicates += duplicates
+        self.new_jobs += len(latest) - len(previous)
+        self.updated_jobs += len(rows) - (len(latest) - len(previous))
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
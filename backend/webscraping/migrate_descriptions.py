@@ -0,0 +1,95 @@
+"""Move job descriptions out of jobs.description into the compressed descriptions table.
+
+Usage:
+    python migrate_descriptions.py [--db linkedin_jobs.db] [--codec zlib|zstd] [--report-only]
+
+Safe to re-run: only rows whose text is still in jobs.description are
+converted, in batches that each commit on their own, so an interrupted run
+just continues. Afterwards unreferenced descriptions are pruned and the
+file is VACUUMed so the freed pages go back to the filesystem. A size
+report is printed before and after.
+"""
+
+import argparse
+import os
+
+from descriptions import DESCRIPTION_CODEC, available_codecs, description_hash, prune_descriptions, store_descriptions
+from jobstore import DB_NAME, connect
+
+BATCH_SIZE = 1000
+
+
+def _file_size(db_name):
+    return sum(os.path.getsize(path) for path in (db_name, db_name + "-wal") if os.path.exists(path))
+
+
+def size_report(conn, db_name):
+    jobs, inline, inline_bytes = conn.execute(
+        'SELECT COUNT(*), COUNT(description), COALESCE(SUM(LENGTH(CAST(description AS BLOB))), 0) FROM jobs'
+    ).fetchone()
+    stored, raw_bytes, compressed_bytes = conn.execute(
+        'SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(LENGTH(body)), 0) FROM descriptions'
+    ).fetchone()
+    referenced_bytes = conn.execute('''
+        SELECT COALESCE(SUM(descriptions.raw_size), 0)
+        FROM jobs JOIN descriptions ON descriptions.hash = jobs.description_hash
+    ''').fetchone()[0]
+    lines = [
+        f"database file:         {_file_size(db_name) / 1e6:10.2f} MB",
+        f"jobs:                  {jobs:10}",
+        f"  inline descriptions: {inline:10}  ({inline_bytes / 1e6:.2f} MB)",
+        f"stored descriptions:   {stored:10}  ({raw_bytes / 1e6:.2f} MB raw, {compressed_bytes / 1e6:.2f} MB compressed)",
+    ]
+    if stored:
+        lines.append(f"  deduplication:       {referenced_bytes / raw_bytes if raw_bytes else 0:10.2f}x"
+                     f"  compression: {raw_bytes / compressed_bytes if compressed_bytes else 0:.2f}x")
+    return "\n".join(lines)
+
+
+def migrate(conn, codec=DESCRIPTION_CODEC, batch_size=BATCH_SIZE):
+    """Convert every job that still has inline text. Returns (jobs converted, new descriptions)."""
+    converted = new = 0
+    while True:
+        rows = conn.execute('''
+            SELECT job_id, description FROM jobs
+            WHERE description IS NOT NULL
+            LIMIT ?
+        ''', (batch_size,)).fetchall()
+        if not rows:
+            return converted, new
+        hashed = [(job_id, description_hash(text), text) for job_id, text in rows]
+        with conn:
+            new += store_descriptions(conn, {digest: text for _, digest, text in hashed}, codec)
+            conn.executemany('UPDATE jobs SET description_hash = ?, description = NULL WHERE job_id = ?',
+                             [(digest, job_id) for job_id, digest, _ in hashed])
+        converted += len(rows)
+        print(f"Converted {converted} jobs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=DB_NAME)
+    parser.add_argument("--codec", default=DESCRIPTION_CODEC, choices=available_codecs())
+    parser.add_argument("--report-only", action="store_true", help="print the size report and exit")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    print("Before:" if not args.report_only else "Storage:")
+    print(size_report(conn, args.db))
+    if args.report_only:
+        conn.close()
+        return
+
+    converted, new = migrate(conn, args.codec)
+    pruned = prune_descriptions(conn)
+    print(f"Converted {converted} jobs into {new} new descriptions, pruned {pruned} unreferenced")
+    conn.execute('VACUUM')
+    # In WAL mode the vacuumed pages land in the -wal file first
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    print("After:")
+    print(size_report(conn, args.db))
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
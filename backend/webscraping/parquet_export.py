@@ -0,0 +1,241 @@
+"""Export the jobs table to Parquet, partitioned by scraped day and country.
+
+Analysts can point pandas or pyarrow at the output directory instead of
+running SELECT * against the live database:
+
+    pd.read_parquet("exports/jobs", filters=[("country", "=", "Australia")])
+
+The layout is Hive style, one file per partition:
+
+    exports/jobs/scraped_day=2026-10-18/country=Australia/part-0.parquet
+
+Low-cardinality text columns (company, city, source_site, search_title)
+are Arrow dictionary columns, so they load as categoricals. Every column
+is dictionary-encoded in the file where that pays off, and the files are
+zstd-compressed.
+
+Exports are incremental. _export_state.json in the output directory keeps
+a fingerprint of every partition: its row count, the sum of its jobs'
+search_rowids, its newest scraped_date and a checksum of its rows. A job
+keeps its search_rowid for good (see search.py), while jobs.rowid may be
+renumbered by VACUUM, which would make every partition look changed.
+Each run computes the fingerprints in one aggregate query and only
+rewrites the partitions whose fingerprint changed. Re-scraping a job moves it to today's partition, so
+the day it left is rewritten too, and partitions left empty are removed.
+Rows are streamed from SQLite in chunks of --chunk-size, so memory stays
+bounded by one chunk whatever the size of a partition.
+
+The whole export reads one snapshot of the database in a single read
+transaction. In WAL mode that doesn't block the scraper's writes.
+
+Needs the pyarrow package.
+
+Usage:
+    python parquet_export.py [--db linkedin_jobs.db] [--out exports/jobs] [--full] [--chunk-size 5000]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+import zlib
+from urllib.parse import quote
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+EXPORT_DIR = os.path.join("exports", "jobs")
+STATE_FILE = "_export_state.json"
+PART_FILE = "part-0.parquet"
+EXPORT_CHUNK_SIZE = 5000
+COMPRESSION = "zstd"
+
+# Partition of jobs without a country or scraped_date. Not Hive's NULL
+# partition: pyarrow can't yet load that into pandas as a categorical.
+UNKNOWN = "unknown"
+
+# Exported columns and their Arrow types; country is in the partition path
+# instead. The internal columns (description_hash, search_rowid,
+# skills_version) are left out.
+_DICTIONARY = "dictionary"
+EXPORT_COLUMNS = (
+    ("job_id", "string"),
+    ("title", "string"),
+    ("company", _DICTIONARY),
+    ("city", _DICTIONARY),
+    ("description", "string"),
+    ("job_link", "string"),
+    ("source_url", "string"),
+    ("source_site", _DICTIONARY),
+    ("search_title", _DICTIONARY),
+    ("duplicate_of", "string"),
+    ("date_added", "timestamp"),
+    ("scraped_date", "timestamp"),
+)
+
+# The columns that feed the partition checksum: everything exported, with
+# the description represented by its hash
+_CHECKSUM_COLUMNS = [name for name, _ in EXPORT_COLUMNS if name != "description"] + ["description_hash"]
+
+
+def _row_checksum(*values):
+    return zlib.crc32(repr(values).encode())
+
+
+def _arrow_schema():
+    types = {"string": pa.string(), _DICTIONARY: pa.dictionary(pa.int32(), pa.string()),
+             "timestamp": pa.timestamp("us")}
+    return pa.schema([(name, types[kind]) for name, kind in EXPORT_COLUMNS])
+
+
+def _to_arrow(kind, values):
+    array = pa.array(values, type=pa.string())
+    if kind == _DICTIONARY:
+        return array.dictionary_encode()
+    if kind == "timestamp":
+        return array.cast(pa.timestamp("us"))
+    return array
+
+
+def partition_path(day, country):
+    return os.path.join(f"scraped_day={day}", f"country={quote(country, safe='')}")
+
+
+def partition_fingerprints(conn):
+    """{(day, country): fingerprint} for every partition, from one pass over jobs."""
+    conn.create_function("export_row_checksum", len(_CHECKSUM_COLUMNS), _row_checksum, deterministic=True)
+    rows = conn.execute(f'''
+        SELECT COALESCE(date(scraped_date), :unknown) AS day, COALESCE(country, :unknown) AS country,
+               COUNT(*), SUM(search_rowid), MAX(scraped_date),
+               SUM(export_row_checksum({", ".join(_CHECKSUM_COLUMNS)}))
+        FROM jobs
+        GROUP BY day, country
+    ''', {"unknown": UNKNOWN})
+    return {(day, country): list(fingerprint) for day, country, *fingerprint in rows}
+
+
+def load_state(out_dir):
+    try:
+        with open(os.path.join(out_dir, STATE_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"columns": [], "partitions": {}}
+
+
+def save_state(out_dir, state):
+    # Written after every partition, so an interrupted export picks up where it stopped
+    path = os.path.join(out_dir, STATE_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def write_partition(conn, path, day, country, chunk_size=EXPORT_CHUNK_SIZE):
+    """Stream one partition into path, replacing it atomically. Returns the rows written."""
+    if day == UNKNOWN:
+        where = "date(jobs.scraped_date) IS NULL"
+    else:
+        # A range on the indexed column, so only that day's rows are read
+        where = "jobs.scraped_date >= :day AND jobs.scraped_date < date(:day, '+1 day')"
+    columns = ", ".join(f"jobs.{name}" if name != "description" else "job_descriptions.description"
+                        for name, _ in EXPORT_COLUMNS)
+    cursor = conn.execute(f'''
+        SELECT {columns}
+        FROM jobs JOIN job_descriptions USING (job_id)
+        WHERE {where} AND COALESCE(jobs.country, :unknown) = :country
+        ORDER BY jobs.scraped_date, jobs.job_id
+    ''', {"day": day, "country": country, "unknown": UNKNOWN})
+    schema = _arrow_schema()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # A dot file, which dataset readers skip, until it is complete
+    tmp_path = os.path.join(os.path.dirname(path), "." + os.path.basename(path) + ".tmp")
+    written = 0
+    with pq.ParquetWriter(tmp_path, schema, compression=COMPRESSION, use_dictionary=True) as writer:
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            arrays = [_to_arrow(kind, values) for (_, kind), values in zip(EXPORT_COLUMNS, zip(*rows))]
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            written += len(rows)
+    os.replace(tmp_path, path)
+    return written
+
+
+def _remove_partition(out_dir, key):
+    shutil.rmtree(os.path.join(out_dir, key), ignore_errors=True)
+    day_dir = os.path.dirname(os.path.join(out_dir, key))
+    if os.path.isdir(day_dir) and not os.listdir(day_dir):
+        os.rmdir(day_dir)
+
+
+def export(conn, out_dir=EXPORT_DIR, full=False, chunk_size=EXPORT_CHUNK_SIZE):
+    """Write the partitions that changed since the last export.
+
+    Returns (partitions written, partitions unchanged, partitions removed, rows written).
+    """
+    if pa is None:
+        raise RuntimeError("The Parquet export needs the pyarrow package")
+    os.makedirs(out_dir, exist_ok=True)
+    state = load_state(out_dir)
+    columns = [list(column) for column in EXPORT_COLUMNS]
+    if full or state["columns"] != columns:
+        # A different set of columns makes every existing file stale
+        for name in os.listdir(out_dir):
+            if name.startswith("scraped_day="):
+                shutil.rmtree(os.path.join(out_dir, name))
+        state = {"columns": columns, "partitions": {}}
+    previous = state["partitions"]
+
+    written = unchanged = rows = 0
+    # One snapshot for the fingerprints and the rows they describe
+    conn.execute("BEGIN")
+    try:
+        fingerprints = partition_fingerprints(conn)
+        current = {}
+        for (day, country), fingerprint in sorted(fingerprints.items()):
+            key = partition_path(day, country)
+            current[key] = fingerprint
+            if previous.get(key) == fingerprint and os.path.exists(os.path.join(out_dir, key, PART_FILE)):
+                unchanged += 1
+                continue
+            rows += write_partition(conn, os.path.join(out_dir, key, PART_FILE), day, country, chunk_size)
+            written += 1
+            previous[key] = fingerprint
+            save_state(out_dir, state)
+    finally:
+        conn.rollback()
+
+    removed = [key for key in previous if key not in current]
+    for key in removed:
+        _remove_partition(out_dir, key)
+        del previous[key]
+    save_state(out_dir, state)
+    return written, unchanged, len(removed), rows
+
+
+def main():
+    from jobstore import DB_NAME, connect
+
+    parser = argparse.ArgumentParser(description="Export the jobs table to partitioned Parquet.")
+    parser.add_argument("--db", default=DB_NAME)
+    parser.add_argument("--out", default=EXPORT_DIR, help="output directory")
+    parser.add_argument("--full", action="store_true", help="rewrite every partition")
+    parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE, help="rows read per chunk")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    started = time.perf_counter()
+    written, unchanged, removed, rows = export(conn, args.out, args.full, args.chunk_size)
+    elapsed = time.perf_counter() - started
+    print(f"Wrote {written} partitions ({rows} jobs), {unchanged} unchanged, {removed} removed "
+          f"in {elapsed:.1f} s -> {args.out}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
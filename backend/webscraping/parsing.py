@@ -0,0 +1,162 @@
+"""CPU-bound parse stage of the scraper.
+
+HTML extraction and description formatting run here rather than on the
+asyncio event loop. ParseStage ships raw page bytes to a ProcessPoolExecutor,
+so socket reads for every city keep flowing while pages are parsed on the
+other cores. The module-level functions are what the worker processes run.
+"""
+
+import asyncio
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlparse
+
+from extractors import get_extractor, has_results_list
+from normalizer import DescriptionNormalizer
+
+# Extractors are created once per worker process and reused
+_extractors = {}
+
+_normalize = DescriptionNormalizer.from_file()
+
+# The job count above the results; "1,000+" past what LinkedIn will count
+_JOB_COUNT_RE = re.compile(rb'results-context-header__job-count">\s*([\d,]+)(\+?)')
+# A page that arrived whole ends with the document's closing tag
+_PAGE_END_RE = re.compile(rb'</html>\s*$', re.IGNORECASE)
+
+
+def _extractor(backend):
+    if backend not in _extractors:
+        _extractors[backend] = get_extractor(backend)
+    return _extractors[backend]
+
+
+def extract_job_id(job_url):
+    """Extract the job ID from a LinkedIn job URL."""
+    try:
+        # Parse the URL and get the path
+        parsed_url = urlparse(job_url)
+        # The job ID is typically in the path after 'jobs/view/'
+        path_parts = parsed_url.path.split('/')
+        if 'jobs' in path_parts and 'view' in path_parts:
+            job_id_index = path_parts.index('view') + 1
+            if job_id_index < len(path_parts):
+                return path_parts[job_id_index]
+    except Exception as e:
+        print(f"Error extracting job ID: {e}")
+    return None
+
+
+def format_job_description(description):
+    """Format job description text with minimal changes to preserve original structure.
+
+    The rules live in normalizer.py and description_fixes.json.
+    """
+    return _normalize(description)
+
+
+def parse_search_page(html, backend=None):
+    """Extract the job cards from a search-result page.
+
+    Returns the extractor's card dicts with a job_id key added (None when the
+    link doesn't contain one).
+    """
+    cards = _extractor(backend).parse_cards(html)
+    for card in cards:
+        card["job_id"] = extract_job_id(card["job_link"]) if card["job_link"] else None
+    return cards
+
+
+def parse_census_page(html, backend=None):
+    """Extract the job cards from a search-result page, with what a census needs to trust a short page.
+
+    Returns (cards, complete, reported). complete is False for a page cut
+    off in transit and for a page without the results list, such as a login
+    wall or a block page. reported is the job count LinkedIn shows, or None
+    when the page doesn't show one or only a lower bound ("1,000+").
+    """
+    html = html.encode("utf-8") if isinstance(html, str) else html
+    complete = has_results_list(html) and _PAGE_END_RE.search(html[-64:]) is not None
+    match = _JOB_COUNT_RE.search(html)
+    reported = int(match.group(1).replace(b",", b"")) if match and not match.group(2) else None
+    return parse_search_page(html, backend), complete, reported
+
+
+def parse_job_page(html, backend=None):
+    """Extract and format the description from a job-detail page, or return None."""
+    description = _extractor(backend).parse_description(html)
+    if description is None:
+        return None
+    return format_job_description(description)
+
+
+class ParseStage:
+    """Runs the parse functions above in a process pool.
+
+    workers=0 parses inline on the event loop, which is only useful as a
+    baseline when measuring loop lag.
+    """
+
+    def __init__(self, workers=None, backend=None):
+        self.workers = os.cpu_count() if workers is None else workers
+        self.backend = backend
+        self._pool = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 0 else None
+
+    async def _run(self, func, html):
+        if self._pool is None:
+            return func(html, self.backend)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, func, html, self.backend)
+
+    async def search_page(self, html):
+        return await self._run(parse_search_page, html)
+
+    async def census_page(self, html):
+        return await self._run(parse_census_page, html)
+
+    async def job_page(self, html):
+        return await self._run(parse_job_page, html)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up a sleeping coroutine.
+
+    Anything running synchronously on the loop (parsing, regex passes, SQLite)
+    shows up as lag here, and as stalled socket reads everywhere else.
+    """
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    async def _watch(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(time.perf_counter() - start - self.interval)
+
+    def start(self):
+        self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def report(self):
+        if not self.samples:
+            return "Event loop lag: no samples."
+        samples = sorted(self.samples)
+        p50 = samples[len(samples) // 2] * 1000
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000
+        return f"Event loop lag: p50 {p50:.1f} ms, p99 {p99:.1f} ms, max {samples[-1] * 1000:.1f} ms"
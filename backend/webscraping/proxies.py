@@ -0,0 +1,172 @@
+"""Outbound proxy pool with health scoring, and the shared HTTP connector.
+
+Every proxy keeps moving averages of its latency, error rate and 429 rate.
+Each request takes the healthier of two randomly picked proxies, scored by
+the expected time to get one good response. Taking the better of two random
+proxies, instead of always the best one, spreads the load so no single
+proxy is swamped. A proxy whose error or 429 rate crosses the threshold is
+ejected for a while. Each ejection in a row lasts twice as long as the last.
+Once it is back it starts again with a clean record.
+
+The pool only does bookkeeping and never touches the network, so it can be
+driven by a fake clock or pointed at local stand-in proxies.
+"""
+
+import random
+import time
+from urllib.parse import urlsplit
+
+import aiohttp
+
+# Connection pooling for the scraper's ClientSession. Keep-alive connections
+# are reused across requests, and resolved addresses are cached
+CONNECTION_LIMIT = 100
+CONNECTION_LIMIT_PER_HOST = 20
+KEEPALIVE_TIMEOUT = 30  # seconds an idle connection stays open
+DNS_CACHE_TTL = 300  # seconds
+
+
+def make_connector(limit=CONNECTION_LIMIT, limit_per_host=CONNECTION_LIMIT_PER_HOST,
+                   keepalive_timeout=KEEPALIVE_TIMEOUT, ttl_dns_cache=DNS_CACHE_TTL):
+    """TCPConnector for the scraper's session. Must be called inside a running event loop."""
+    return aiohttp.TCPConnector(limit=limit, limit_per_host=limit_per_host,
+                                keepalive_timeout=keepalive_timeout, ttl_dns_cache=ttl_dns_cache)
+
+
+def _display(url):
+    """Proxy URL without credentials, for logs and reports."""
+    if url is None:
+        return "direct"
+    parts = urlsplit(url)
+    return f"{parts.hostname}:{parts.port}" if parts.port else parts.hostname or url
+
+
+class Proxy:
+    """One proxy endpoint and its health record. url None means a direct connection."""
+
+    def __init__(self, url):
+        self.url = url
+        self.name = _display(url)
+        self.latency = None  # EWMA seconds, successful responses only
+        self.error_rate = 0.0
+        self.throttle_rate = 0.0
+        self.samples = 0
+        self.in_flight = 0
+        self.ejected_until = 0.0
+        self.ejections = 0  # in a row; reset once the proxy does well again
+
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+
+    def score(self):
+        """Expected seconds per good response, inflated by the requests already queued on it.
+
+        Lower is better. A proxy without latency samples scores 0, so new or
+        re-admitted proxies get tried.
+        """
+        if self.latency is None:
+            return 0.0
+        success = max(0.05, 1.0 - self.error_rate - self.throttle_rate)
+        return self.latency / success * (1 + self.in_flight)
+
+
+class ProxyPool:
+    """Routes requests over a set of proxies by health, ejecting failing ones for a while."""
+
+    def __init__(self, urls, alpha=0.2, min_samples=5, eject_error_rate=0.5, eject_throttle_rate=0.5,
+                 eject_seconds=30.0, max_eject_seconds=600.0, clock=time.monotonic, rng=random):
+        if not urls:
+            raise ValueError("ProxyPool needs at least one proxy")
+        self.proxies = [Proxy(url) for url in urls]
+        self.alpha = alpha
+        self.min_samples = min_samples
+        self.eject_error_rate = eject_error_rate
+        self.eject_throttle_rate = eject_throttle_rate
+        self.eject_seconds = eject_seconds
+        self.max_eject_seconds = max_eject_seconds
+        self.clock = clock
+        self.rng = rng
+
+    def acquire(self):
+        """Pick a proxy for the next request. Pair every call with release()."""
+        now = self.clock()
+        live = [proxy for proxy in self.proxies if proxy.ejected_until <= now]
+        if not live:
+            # Everything is ejected: use whichever comes back first rather than stall
+            live = [min(self.proxies, key=lambda proxy: proxy.ejected_until)]
+        for proxy in live:
+            if proxy.ejected_until and proxy.ejected_until <= now:
+                self._readmit(proxy)
+        if len(live) == 1:
+            proxy = live[0]
+        else:
+            first, second = self.rng.sample(live, 2)
+            proxy = first if first.score() <= second.score() else second
+        proxy.in_flight += 1
+        return proxy
+
+    def release(self, proxy, status, latency):
+        """Record how a request through proxy went.
+
+        status is the HTTP status, or None for a connection error or timeout.
+        407 and 5xx also count as proxy errors.
+        """
+        proxy.in_flight -= 1
+        proxy.requests += 1
+        proxy.samples += 1
+        error = status is None or status == 407 or status >= 500
+        throttled = status == 429
+        proxy.errors += error
+        proxy.throttled += throttled
+        proxy.error_rate += self.alpha * (error - proxy.error_rate)
+        proxy.throttle_rate += self.alpha * (throttled - proxy.throttle_rate)
+        if not error and not throttled:
+            proxy.latency = latency if proxy.latency is None else proxy.latency + self.alpha * (latency - proxy.latency)
+            if proxy.samples >= self.min_samples and proxy.error_rate < self.eject_error_rate / 2:
+                proxy.ejections = 0
+
+        if proxy.samples >= self.min_samples and (proxy.error_rate >= self.eject_error_rate
+                                                  or proxy.throttle_rate >= self.eject_throttle_rate):
+            self._eject(proxy)
+
+    def _eject(self, proxy):
+        now = self.clock()
+        if proxy.ejected_until > now:
+            return  # late responses from requests sent before the ejection
+        # Only the last proxy standing is never ejected; it may as well keep trying
+        if not any(other is not proxy and other.ejected_until <= now for other in self.proxies):
+            return
+        duration = min(self.max_eject_seconds, self.eject_seconds * 2 ** proxy.ejections)
+        proxy.ejections += 1
+        proxy.ejected_until = now + duration
+        print(f"[proxies] {proxy.name}: error rate {proxy.error_rate:.0%}, 429 rate {proxy.throttle_rate:.0%}, "
+              f"ejected for {duration:.0f}s")
+
+    def _readmit(self, proxy):
+        proxy.ejected_until = 0.0
+        proxy.samples = 0
+        proxy.error_rate = 0.0
+        proxy.throttle_rate = 0.0
+        proxy.latency = None
+        print(f"[proxies] {proxy.name}: back in rotation")
+
+    def report(self):
+        """Return a short multi-line summary of how each proxy performed."""
+        now = self.clock()
+        lines = []
+        for proxy in self.proxies:
+            latency = f"{proxy.latency * 1000:.0f} ms" if proxy.latency is not None else "n/a"
+            state = " (ejected)" if proxy.ejected_until > now else ""
+            lines.append(
+                f"{proxy.name}: {proxy.requests} requests, latency {latency}, "
+                f"{proxy.errors} errors, {proxy.throttled} throttled (429){state}"
+            )
+        return "\n".join(lines)
+
+
+def read_proxy_list(path):
+    """Proxy URLs from a text file, one per line. Blank lines and # comments are skipped."""
+    with open(path) as f:
+        lines = (line.split("#", 1)[0].strip() for line in f)
+        return [line for line in lines if line]
@@ -0,0 +1,203 @@
+"""Yield-driven recrawl planning: spend a request budget where new postings are likely.
+
+Every (job_title, city) search has a row in search_yield with decayed
+totals of what its crawls found: new jobs, the days they built up over,
+cards listed, requests spent and the number of crawls. Each crawl keeps
+DECAY of the totals before it, so a search whose market changes is
+re-estimated within a few crawls. From those totals:
+
+    velocity      new postings per day, (new jobs + prior) / (days + PRIOR_DAYS),
+                  a Gamma-Poisson estimate whose prior is the title's static
+                  weight in PRIOR_VELOCITY postings/day per unit of weight
+    change rate   share of listed cards that were new
+    expected new  velocity * days since the last crawl, at most what one
+                  search can return
+    cost          the expected new jobs (one job page each) plus the requests
+                  a crawl spends on top of those: the search pages, including
+                  the ones that end it, and refreshed descriptions
+
+plan() puts every search on a heap ordered by expected new jobs per
+request, except that a search not crawled for MIN_REVISIT goes ahead of
+all of them, so a quiet search is still looked at now and then. Searches
+without a row yet take their last crawl from the jobs table.
+
+Usage:
+    python recrawl.py [--db linkedin_jobs.db] [--top 20]
+"""
+
+import argparse
+import heapq
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+DB_NAME = "linkedin_jobs.db"
+
+# Share of the totals a search keeps from before each new crawl
+DECAY = 0.7
+
+# The prior counts as this many days of observation at PRIOR_VELOCITY * weight
+PRIOR_DAYS = 1.0
+PRIOR_VELOCITY = 1.0
+
+# Requests a crawl spends besides one per new job, before anything is observed:
+# the search pages that end an incremental search
+PRIOR_OVERHEAD = 2.0
+
+# A search not crawled for this long goes to the front of the queue
+MIN_REVISIT = timedelta(days=7)
+
+# Most jobs one search can return, and how far back the listing reaches for a
+# search that has never been crawled
+MAX_JOBS_PER_SEARCH = 200
+BACKLOG_DAYS = 30
+
+
+@dataclass
+class SearchYield:
+    job_title: str
+    city: str
+    # Decayed totals over the search's crawls
+    new_jobs: float = 0.0
+    days: float = 0.0
+    cards: float = 0.0
+    requests: float = 0.0
+    crawls: float = 0.0
+    last_crawled: datetime = None
+
+    def velocity(self, weight=1.0):
+        """Estimated new postings per day."""
+        return (self.new_jobs + PRIOR_VELOCITY * weight * PRIOR_DAYS) / (self.days + PRIOR_DAYS)
+
+    def change_rate(self):
+        """Share of the cards listed that were new, or None before the first crawl."""
+        return self.new_jobs / self.cards if self.cards else None
+
+    def overhead(self):
+        """Expected requests per crawl besides one per new job."""
+        return (max(0.0, self.requests - self.new_jobs) + PRIOR_OVERHEAD) / (self.crawls + 1)
+
+    def expected_new(self, now, weight=1.0):
+        days = (now - self.last_crawled).total_seconds() / 86400 if self.last_crawled else BACKLOG_DAYS
+        return min(MAX_JOBS_PER_SEARCH, self.velocity(weight) * max(0.0, days))
+
+    def priority(self, now, weight=1.0):
+        """Expected new jobs per request if the search were crawled now."""
+        expected = self.expected_new(now, weight)
+        return expected / (expected + self.overhead())
+
+
+def _timestamp(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+class YieldTable:
+    """The search_yield table, plus the rows read from it; record() keeps both up to date."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.yields = None
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS search_yield (
+                job_title TEXT NOT NULL,
+                city TEXT NOT NULL,
+                new_jobs REAL NOT NULL,
+                days REAL NOT NULL,
+                cards REAL NOT NULL,
+                requests REAL NOT NULL,
+                crawls REAL NOT NULL,
+                last_crawled TIMESTAMP,
+                PRIMARY KEY (job_title, city)
+            )
+        ''')
+
+    def load(self):
+        """Return {(job_title, city): SearchYield} for every search crawled so far.
+
+        Searches only the older crawls have seen get a row with just their
+        last crawl, taken from the jobs they stored.
+        """
+        yields = {}
+        rows = self.conn.execute('''
+            SELECT search_title, city, MAX(scraped_date) FROM jobs
+            WHERE search_title IS NOT NULL AND city IS NOT NULL
+            GROUP BY search_title, city
+        ''')
+        for job_title, city, last_crawled in rows:
+            yields[(job_title, city)] = SearchYield(job_title, city, last_crawled=_timestamp(last_crawled))
+        rows = self.conn.execute('''
+            SELECT job_title, city, new_jobs, days, cards, requests, crawls, last_crawled FROM search_yield
+        ''')
+        for row in rows:
+            yields[(row[0], row[1])] = SearchYield(*row[:7], _timestamp(row[7]))
+        self.yields = yields
+        return yields
+
+    def plan(self, searches, now=None):
+        """Heap of (not overdue, -priority, job_title, city, expected new) over (job_title, city, weight) searches.
+
+        Pop it in order: searches past MIN_REVISIT first, then the most new
+        jobs per request.
+        """
+        now = now or datetime.now()
+        yields = self.load()
+        heap = []
+        for job_title, city, weight in searches:
+            search = yields.get((job_title, city)) or SearchYield(job_title, city)
+            overdue = search.last_crawled is None or now - search.last_crawled >= MIN_REVISIT
+            heap.append((not overdue, -search.priority(now, weight), job_title, city,
+                         search.expected_new(now, weight)))
+        heapq.heapify(heap)
+        return heap
+
+    def record(self, job_title, city, new_jobs, cards, requests, crawled_at=None):
+        """Fold one crawl of a search into its totals."""
+        crawled_at = crawled_at or datetime.now()
+        if self.yields is None:
+            self.load()
+        search = self.yields.setdefault((job_title, city), SearchYield(job_title, city))
+        days = ((crawled_at - search.last_crawled).total_seconds() / 86400 if search.last_crawled
+                else BACKLOG_DAYS)
+        search.new_jobs = DECAY * search.new_jobs + new_jobs
+        search.days = DECAY * search.days + max(0.0, days)
+        search.cards = DECAY * search.cards + cards
+        search.requests = DECAY * search.requests + requests
+        search.crawls = DECAY * search.crawls + 1
+        search.last_crawled = crawled_at
+        with self.conn:
+            self.conn.execute('''
+                INSERT INTO search_yield (job_title, city, new_jobs, days, cards, requests, crawls, last_crawled)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(job_title, city) DO UPDATE SET
+                    new_jobs = excluded.new_jobs, days = excluded.days, cards = excluded.cards,
+                    requests = excluded.requests, crawls = excluded.crawls, last_crawled = excluded.last_crawled
+            ''', (job_title, city, search.new_jobs, search.days, search.cards, search.requests, search.crawls,
+                  crawled_at.isoformat(" ")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show which searches a yield-driven recrawl would visit first "
+                                                 "(every title weighted alike).")
+    parser.add_argument("--db", default=DB_NAME)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    table = YieldTable(conn)
+    yields = table.load()
+    now = datetime.now()
+    heap = table.plan([(job_title, city, 1.0) for job_title, city in yields], now)
+    print(f"{'search':<48}{'new/day':>9}{'changed':>9}{'expected':>10}{'per req':>9}  last crawled")
+    for _ in range(min(args.top, len(heap))):
+        not_overdue, priority, job_title, city, expected = heapq.heappop(heap)
+        search = yields[(job_title, city)]
+        change_rate = search.change_rate()
+        print(f"{job_title + ' in ' + city:<48}{search.velocity():>9.2f}"
+              f"{f'{change_rate:.0%}' if change_rate is not None else '-':>9}{expected:>10.1f}{-priority:>9.2f}"
+              f"  {f'{search.last_crawled:%Y-%m-%d %H:%M}' if search.last_crawled else 'never'}"
+              f"{'' if not_overdue else ' (overdue)'}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""Local stand-in for LinkedIn's public job pages, for running the scraper offline.
+
+Serves the recorded fixtures the way LinkedIn serves the real pages:
+
+    /jobs/search/?keywords=...&location=...&start=N   a page of 25 job cards
+    /jobs/view/<slug>-<posting number>                 a job's detail page
+
+Every (keywords, location) search has --pages full pages of results and
+then the recorded short last page; past it the search is empty. Each card
+links to a posting number of its own, and each detail page has a
+description of its own, drawn from a Zipf-like vocabulary, so the
+scraper's near-duplicate detection and description store see realistic
+input. Links point back at this server.
+
+Faults, all off unless asked for:
+
+    --latency, --jitter    seconds added to every response: latency plus an
+                           exponentially distributed extra averaging jitter
+    --burst-every, --burst-seconds
+                           every burst-every seconds, answer everything with
+                           429 and a Retry-After of --retry-after seconds for
+                           burst-seconds
+    --malformed            share of 200 responses cut off at a random point
+
+bench_crawl.py starts one in a child process; on its own it serves until
+interrupted.
+
+Usage:
+    python replay_server.py [--port 8765] [--pages 3] [--latency 0.05] [--jitter 0.05]
+                            [--burst-every 0] [--burst-seconds 2] [--retry-after 1] [--malformed 0]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import re
+import socket
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from itertools import accumulate
+
+from aiohttp import web
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+SEARCH_PAGE = "search_results.html"
+LAST_SEARCH_PAGE = "search_results_last_page.html"
+DETAIL_PAGE = "job_detail.html"
+
+PAGE_SIZE = 25
+FIRST_POSTING = 3900000000
+# Posting numbers reserved for each search
+POSTINGS_PER_SEARCH = 100000
+
+_JOB_LINK_RE = re.compile(rb'https://[a-z.]*linkedin\.com/jobs/view/([a-z0-9-]+?)-\d+')
+_DESCRIPTION_RE = re.compile(rb'(show-more-less-html__markup[^>]*>)(.*?)(</div>)', re.S)
+_WORD_RE = re.compile(r"[A-Za-z][A-Za-z+#'-]*")
+_EMPTY_SEARCH_PAGE = b"<!DOCTYPE html><html><body><ul class=\"jobs-search__results-list\"></ul></body></html>"
+
+
+@dataclass
+class Faults:
+    latency: float = 0.0
+    jitter: float = 0.0
+    burst_every: float = 0.0
+    burst_seconds: float = 0.0
+    retry_after: float = 1.0
+    malformed: float = 0.0
+
+
+def _load(name):
+    with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+        return f.read()
+
+
+class ReplayPages:
+    """Builds pages from the fixtures: the recorded markup with fresh job links and descriptions."""
+
+    def __init__(self, base_url, pages=3):
+        self.base_url = base_url.rstrip("/").encode()
+        self.pages = pages
+        self._searches = {}
+        # Each template split around its job links: [markup, slug, markup, slug, ..., markup]
+        self._full = _JOB_LINK_RE.split(_load(SEARCH_PAGE))
+        self._last = _JOB_LINK_RE.split(_load(LAST_SEARCH_PAGE))
+        detail = _load(DETAIL_PAGE)
+        match = _DESCRIPTION_RE.search(detail)
+        self._detail_head = detail[:match.end(1)]
+        self._detail_tail = detail[match.start(3):]
+        # The recorded description's words, most frequent first, then made-up ones
+        recorded = Counter(_WORD_RE.findall(re.sub(r"<[^>]*>", " ", match.group(2).decode())))
+        rng = random.Random(0)
+        made_up = ("".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(4, 10))) for _ in range(5000))
+        self._vocabulary = [word for word, _ in recorded.most_common()] + list(made_up)
+        self._cum_weights = list(accumulate(1 / (rank + 1) for rank in range(len(self._vocabulary))))
+
+    def search_page(self, keywords, location, start):
+        page, offset = divmod(start, PAGE_SIZE)
+        if offset or page > self.pages:
+            return _EMPTY_SEARCH_PAGE
+        parts = self._full if page < self.pages else self._last
+        search = self._searches.setdefault((keywords, location), len(self._searches))
+        first = FIRST_POSTING + search * POSTINGS_PER_SEARCH + start
+        out = [parts[0]]
+        for i, (slug, markup) in enumerate(zip(parts[1::2], parts[2::2])):
+            out += [self.base_url, b"/jobs/view/", slug, b"-%d" % (first + i), markup]
+        return b"".join(out)
+
+    def job_page(self, posting):
+        rng = random.Random(posting)
+        sections = []
+        for heading in ("About the role", "What you'll do", "What you'll bring"):
+            items = ("<li>" + " ".join(rng.choices(self._vocabulary, cum_weights=self._cum_weights,
+                                                   k=rng.randint(8, 20))) + "</li>"
+                     for _ in range(rng.randint(3, 6)))
+            sections.append(f"<strong>{heading}</strong><ul>{''.join(items)}</ul>")
+        return self._detail_head + "<br>".join(sections).encode() + self._detail_tail
+
+
+class ReplayServer:
+    """The aiohttp app serving ReplayPages, with faults and request counts."""
+
+    def __init__(self, pages, faults=None, seed=0):
+        self.pages = pages
+        self.faults = faults or Faults()
+        self.rng = random.Random(seed)
+        self.started = time.monotonic()
+        self.counts = Counter()
+        self.app = web.Application()
+        self.app.add_routes([web.get("/jobs/search/", self.search), web.get("/jobs/view/{slug}", self.view)])
+
+    def _in_burst(self):
+        faults = self.faults
+        if not faults.burst_every:
+            return False
+        return (time.monotonic() - self.started) % faults.burst_every < faults.burst_seconds
+
+    async def _respond(self, kind, build):
+        faults = self.faults
+        self.counts[kind] += 1
+        delay = faults.latency + (self.rng.expovariate(1 / faults.jitter) if faults.jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        if self._in_burst():
+            self.counts["429"] += 1
+            return web.Response(status=429, headers={"Retry-After": f"{faults.retry_after:g}"})
+        body = build()
+        if faults.malformed and self.rng.random() < faults.malformed:
+            self.counts["malformed"] += 1
+            body = body[:int(len(body) * self.rng.uniform(0.2, 0.8))]
+        self.counts["200"] += 1
+        return web.Response(body=body, content_type="text/html")
+
+    async def search(self, request):
+        query = request.query
+        try:
+            start = int(query.get("start", 0))
+        except ValueError:
+            return web.Response(status=400)
+        return await self._respond("search", lambda: self.pages.search_page(query.get("keywords", ""),
+                                                                             query.get("location", ""), start))
+
+    async def view(self, request):
+        slug = request.match_info["slug"]
+        posting = slug.rsplit("-", 1)[-1]
+        # A link that didn't come from a search page still gets a page
+        seed = int(posting) if posting.isdigit() else zlib.crc32(slug.encode())
+        return await self._respond("detail", lambda: self.pages.job_page(seed))
+
+    def report(self):
+        elapsed = time.monotonic() - self.started
+        total = self.counts["search"] + self.counts["detail"]
+        return (f"Served {total} requests ({total / elapsed if elapsed else 0:.1f} req/s): "
+                f"{self.counts['search']} search, {self.counts['detail']} detail, "
+                f"{self.counts['429']} throttled (429), {self.counts['malformed']} malformed")
+
+
+async def start(port=0, host="127.0.0.1", pages=3, faults=None):
+    """Start a replay server; returns (ReplayServer, web.AppRunner, base URL)."""
+    # Bound first, so the pages know the port their links point at
+    sock = socket.socket()
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    base_url = f"http://{host}:{sock.getsockname()[1]}"
+    server = ReplayServer(ReplayPages(base_url, pages), faults)
+    runner = web.AppRunner(server.app, access_log=None)
+    await runner.setup()
+    await web.SockSite(runner, sock).start()
+    return server, runner, base_url
+
+
+def serve_in_child(conn, pages, faults):
+    """multiprocessing target: serve until conn receives anything, then send back the report."""
+
+    async def run():
+        server, runner, base_url = await start(pages=pages, faults=faults)
+        conn.send(base_url)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, conn.recv)
+        conn.send((dict(server.counts), server.report()))
+        await runner.cleanup()
+
+    asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded LinkedIn pages locally.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pages", type=int, default=3, help="full pages of results per search")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="mean of an exponential extra delay")
+    parser.add_argument("--burst-every", type=float, default=0.0, help="seconds between 429 bursts; 0 for none")
+    parser.add_argument("--burst-seconds", type=float, default=2.0)
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--malformed", type=float, default=0.0, help="share of pages cut short")
+    args = parser.parse_args()
+    faults = Faults(args.latency, args.jitter, args.burst_every, args.burst_seconds, args.retry_after,
+                    args.malformed)
+
+    async def run():
+        server, runner, base_url = await start(args.port, pages=args.pages, faults=faults)
+        print(f"Serving {base_url}/jobs/search/?keywords=Data%20Analyst&location=Sydney")
+        try:
+            while True:
+                await asyncio.sleep(60)
+                print(server.report())
+        finally:
+            print(server.report())
+            await runner.cleanup()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Retry policy and per-host circuit breaker shared by every fetch.
+
+RetryPolicy decides whether a failed request is worth repeating and how
+long to wait first: exponential backoff with full jitter, or the server's
+Retry-After if that is longer. It also caps the number of attempts.
+CircuitBreaker watches the recent outcomes for one host. When too many of
+them fail, it stops every request to that host for a cool-down instead of
+letting each coroutine back off on its own. After the cool-down a single
+probe request goes through. If it succeeds the breaker closes again; if it
+fails the breaker opens for another cool-down.
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# Statuses that mean "try again later" rather than "this URL is bad"
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class FetchError(Exception):
+    """A URL could not be fetched: a permanent error, or every attempt failed."""
+
+    def __init__(self, url, status, reason):
+        super().__init__(f"{reason} for {url}")
+        self.url = url
+        self.status = status
+
+
+def parse_retry_after(value, now=None):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - (now or datetime.now(timezone.utc))).total_seconds())
+
+
+class RetryPolicy:
+    """Attempt cap and backoff schedule for transient failures."""
+
+    def __init__(self, max_attempts=4, base_delay=2.0, max_delay=60.0, max_retry_after=300.0,
+                 retry_statuses=RETRY_STATUSES, rng=random):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.retry_statuses = retry_statuses
+        self.rng = rng
+
+    def should_retry(self, status):
+        """True for network errors (status None) and transient HTTP statuses."""
+        return status is None or status in self.retry_statuses
+
+    def backoff(self, attempt, retry_after=None):
+        """Delay before retry number attempt (1-based).
+
+        The server's Retry-After wins when it asks for longer than the
+        jittered backoff, up to max_retry_after.
+        """
+        delay = self.rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        seconds = parse_retry_after(retry_after)
+        if seconds is not None:
+            delay = max(delay, min(seconds, self.max_retry_after))
+        return delay
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker over a sliding window of outcomes for one host."""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, host, window=20, min_requests=10, failure_threshold=0.5, cooldown=30.0,
+                 clock=time.monotonic):
+        self.host = host
+        self.min_requests = min_requests
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.state = self.CLOSED
+        self.trips = 0
+        self._outcomes = deque(maxlen=window)
+        self._open_until = 0.0
+        self._probing = False
+        self._probe_started = 0.0
+
+    async def wait(self):
+        """Return once a request to this host may go out."""
+        while True:
+            if self.state == self.OPEN:
+                remaining = self._open_until - self.clock()
+                if remaining > 0:
+                    await asyncio.sleep(remaining)
+                    continue
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN:
+                # Someone else's probe is out; check back shortly. A probe that
+                # never reported back (cancelled) stops blocking after a cool-down
+                if self._probing and self.clock() - self._probe_started < self.cooldown:
+                    await asyncio.sleep(min(1.0, self.cooldown / 10))
+                    continue
+                self._probing = True
+                self._probe_started = self.clock()
+            return
+
+    def record(self, ok):
+        """Feed in whether a request succeeded (False for network errors and transient statuses)."""
+        if self.state == self.HALF_OPEN:
+            self._probing = False
+            if ok:
+                self.state = self.CLOSED
+                self._outcomes.clear()
+                print(f"[breaker] {self.host}: probe succeeded, resuming requests")
+            else:
+                self._open()
+            return
+        if self.state == self.OPEN:
+            return  # late result from a request sent before the breaker opened
+
+        self._outcomes.append(ok)
+        failures = self._outcomes.count(False)
+        if len(self._outcomes) >= self.min_requests and failures / len(self._outcomes) >= self.failure_threshold:
+            self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self.trips += 1
+        # Jitter so the probes of several hosts (or processes) don't line up
+        self._open_until = self.clock() + self.cooldown * random.uniform(1.0, 1.2)
+        self._outcomes.clear()
+        print(f"[breaker] {self.host}: too many failures, pausing requests for {self.cooldown:.0f}s")
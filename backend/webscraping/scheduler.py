@@ -0,0 +1,146 @@
+"""Per-host request scheduling for the async scraper.
+
+Each host gets a token bucket (how fast we may start requests) and a
+semaphore (how many may be in flight at once). The bucket rate adapts
+AIMD-style: it creeps up while responses are clean and is cut back
+multiplicatively as soon as the host starts answering 429.
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """Async token bucket with an adjustable refill rate (tokens/second)."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        # The lock makes waiters queue up in FIFO order instead of all
+        # waking at once and racing for the same token.
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def set_rate(self, rate):
+        self._refill()
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self._tokens = min(self._tokens, self.capacity)
+
+
+class HostScheduler:
+    """Rate limit, concurrency cap and AIMD adaptation for a single host."""
+
+    def __init__(self, host, rate=2.0, max_concurrency=8, min_rate=0.2, max_rate=20.0,
+                 increase_step=0.25, decrease_factor=0.5, clean_window=20):
+        self.host = host
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.clean_window = clean_window
+        self.bucket = TokenBucket(rate)
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+        self._clean_streak = 0
+        self._last_decrease = float("-inf")
+        self._started = time.monotonic()
+
+    @property
+    def rate(self):
+        return self.bucket.rate
+
+    @asynccontextmanager
+    async def slot(self):
+        """Wait for a token and a free concurrency slot, then hold the slot."""
+        async with self.semaphore:
+            await self.bucket.acquire()
+            self.requests += 1
+            yield
+
+    def record(self, status, sent=None):
+        """Feed a response status (or None for a network error) into AIMD.
+
+        sent is the time.monotonic() at which the request went out; it
+        defaults to now.
+        """
+        if status == 429:
+            self.throttled += 1
+            self._clean_streak = 0
+            # Requests already in flight will report their 429s together.
+            # A 429 for a request sent before the last cut says nothing about
+            # the new rate, so the rate is cut at most once per round trip
+            # however long the burst lasts.
+            now = time.monotonic()
+            if (sent if sent is not None else now) > self._last_decrease:
+                self._last_decrease = now
+                self.bucket.set_rate(max(self.min_rate, self.rate * self.decrease_factor))
+                print(f"[scheduler] {self.host}: 429 received, rate lowered to {self.rate:.2f} req/s")
+            return
+
+        if status is None or status >= 500:
+            self.errors += 1
+            self._clean_streak = 0
+            return
+
+        self._clean_streak += 1
+        if self._clean_streak >= self.clean_window:
+            self._clean_streak = 0
+            self.bucket.set_rate(min(self.max_rate, self.rate + self.increase_step))
+
+    def throughput(self):
+        elapsed = time.monotonic() - self._started
+        return self.requests / elapsed if elapsed > 0 else 0.0
+
+
+class RequestScheduler:
+    """Hands out a HostScheduler per host, created lazily with shared settings."""
+
+    def __init__(self, rate=2.0, max_concurrency=8, **host_options):
+        self.rate = rate
+        self.max_concurrency = max_concurrency
+        self.host_options = host_options
+        self._hosts = {}
+
+    def for_url(self, url):
+        host = urlparse(url).hostname or ""
+        if host not in self._hosts:
+            self._hosts[host] = HostScheduler(host, rate=self.rate,
+                                              max_concurrency=self.max_concurrency,
+                                              **self.host_options)
+        return self._hosts[host]
+
+    def hosts(self):
+        """The HostScheduler of every host requested so far."""
+        return list(self._hosts.values())
+
+    def report(self):
+        """Return a short multi-line summary of the throughput each host sustained."""
+        lines = []
+        for host, sched in self._hosts.items():
+            lines.append(
+                f"{host}: {sched.requests} requests, {sched.throughput():.2f} req/s sustained, "
+                f"{sched.throttled} throttled (429), {sched.errors} errors, "
+                f"final rate {sched.rate:.2f} req/s"
+            )
+        return "\n".join(lines) or "No requests made."
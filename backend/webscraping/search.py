@@ -0,0 +1,165 @@
+"""Full-text index of the scraped jobs (SQLite FTS5).
+
+jobs_fts holds one row per job with its title, company and description,
+plus city and country so that location filters can be answered from the
+index too. The API's /api/jobs/search endpoint queries it; see
+backend/api/job_search.py.
+
+Descriptions live compressed in the descriptions table, which SQL triggers
+can't read, so JobWriter keeps the index in sync instead: in the same
+transaction as each chunk it re-indexes the jobs that are new or whose
+indexed fields changed.
+
+A job's FTS rowid is stored in jobs.search_rowid and handed out in the
+order jobs are first seen, so a higher rowid is a newer job. Unlike
+jobs.rowid, which VACUUM may renumber (jobs has a TEXT primary key), a job
+keeps its search_rowid for good, so the API's match indexes use it as the
+job's key too. Jobs stored without one are numbered when an older database
+is upgraded (see jobstore.ensure_schema), and by "rebuild". FTS5 walks
+the matches of a query in rowid order for free, while ranking them by
+bm25 costs time for every match. The API uses this to rank only the
+newest matches of very common words; see job_search.py.
+
+Usage:
+    python search.py rebuild [--db linkedin_jobs.db]
+    python search.py optimize
+    python search.py query "data engineer" [--city Sydney]
+
+"rebuild" indexes every stored job again from scratch, under the
+search_rowid it already has. Run it once on a database
+written before the index existed. "optimize" merges the index segments
+into one, which makes queries on a large table faster after a big crawl.
+"""
+
+import argparse
+import time
+
+# Columns of jobs_fts after the rowid; job_id is stored but not tokenized
+FTS_COLUMNS = ("title", "company", "description", "city", "country", "job_id")
+
+# Porter stemming so "engineers" finds "engineer"; prefix indexes make
+# "dev*" queries an index range scan
+_CREATE_SQL = '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+        title, company, description, city, country, job_id UNINDEXED,
+        tokenize = 'porter unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+'''
+
+# bm25 weights per column: a match in the title counts most, city and
+# country are only used as filters
+RANK = "bm25(10.0, 4.0, 1.0, 0.0, 0.0, 0.0)"
+
+REBUILD_BATCH_SIZE = 2000
+
+
+def ensure_schema(conn):
+    existing = {row[1] for row in conn.execute('PRAGMA table_info(jobs)')}
+    if "search_rowid" not in existing:
+        conn.execute('ALTER TABLE jobs ADD COLUMN search_rowid INTEGER')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_search_rowid ON jobs (search_rowid)')
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'jobs_fts'").fetchone()
+    conn.execute(_CREATE_SQL)
+    if not exists:
+        # Stored in the index's config table, so ORDER BY rank uses the weights
+        conn.execute("INSERT INTO jobs_fts (jobs_fts, rank) VALUES ('rank', ?)", (RANK,))
+    _number_jobs(conn)
+
+
+def _number_jobs(conn):
+    """Give the jobs without a search_rowid the next ones, oldest first; they are indexed by a rebuild."""
+    if conn.execute('SELECT 1 FROM jobs WHERE search_rowid IS NULL LIMIT 1').fetchone() is None:
+        return
+    with conn:
+        # Under the write lock, so two processes opening the database can't number the same jobs
+        if not conn.in_transaction:
+            conn.execute('BEGIN IMMEDIATE')
+        job_ids = [row[0] for row in conn.execute(
+            'SELECT job_id FROM jobs WHERE search_rowid IS NULL ORDER BY date_added, job_id')]
+        first = last_rowid(conn) + 1
+        conn.executemany('UPDATE jobs SET search_rowid = ? WHERE job_id = ?',
+                         [(first + n, job_id) for n, job_id in enumerate(job_ids)])
+
+
+def last_rowid(conn):
+    # From the end of idx_jobs_search_rowid, without a scan
+    (rowid,) = conn.execute('SELECT MAX(search_rowid) FROM jobs').fetchone()
+    return rowid or 0
+
+
+def index_jobs(conn, entries):
+    """(Re-)index jobs given as (rowid, title, company, description, city, country, job_id).
+
+    Runs on conn without committing, like DuplicateDetector.add(). The
+    caller records the rowids in jobs.search_rowid.
+    """
+    conn.executemany('DELETE FROM jobs_fts WHERE rowid = ?', [(entry[0],) for entry in entries])
+    conn.executemany(
+        f'INSERT INTO jobs_fts (rowid, {", ".join(FTS_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)',
+        entries
+    )
+
+
+def optimize(conn):
+    with conn:
+        conn.execute("INSERT INTO jobs_fts (jobs_fts) VALUES ('optimize')")
+
+
+def rebuild(conn, batch_size=REBUILD_BATCH_SIZE):
+    """Index every stored job from scratch, oldest first. Returns the number indexed."""
+    _number_jobs(conn)
+    with conn:
+        conn.execute('DELETE FROM jobs_fts')
+    rowids = {row[0]: row[1] for row in conn.execute('SELECT job_id, search_rowid FROM jobs ORDER BY search_rowid')}
+    job_ids = list(rowids)
+    for start in range(0, len(job_ids), batch_size):
+        batch = job_ids[start:start + batch_size]
+        placeholders = ",".join("?" * len(batch))
+        # The job_descriptions view decompresses transparently
+        rows = {row[0]: row[1:] for row in conn.execute(f'''
+            SELECT jobs.job_id, title, company, job_descriptions.description, city, country
+            FROM jobs JOIN job_descriptions USING (job_id)
+            WHERE jobs.job_id IN ({placeholders})
+        ''', batch)}
+        with conn:
+            index_jobs(conn, [(rowids[job_id], *rows[job_id], job_id) for job_id in batch])
+        print(f"Indexed {start + len(batch)} of {len(job_ids)} jobs")
+    optimize(conn)
+    return len(job_ids)
+
+
+def main():
+    from jobstore import DB_NAME, connect
+
+    parser = argparse.ArgumentParser(description="Full-text index of the scraped jobs.")
+    parser.add_argument("command", choices=["rebuild", "optimize", "query"])
+    parser.add_argument("text", nargs="?", help="query: FTS5 match expression")
+    parser.add_argument("--db", default=DB_NAME)
+    parser.add_argument("--city")
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+    if args.command == "query" and not args.text:
+        parser.error("query needs the text to search for")
+
+    conn = connect(args.db)
+    if args.command == "rebuild":
+        print(f"Indexed {rebuild(conn)} jobs")
+    elif args.command == "optimize":
+        optimize(conn)
+    else:
+        match = args.text if not args.city else f'({args.text}) AND city : "{args.city}"'
+        started = time.perf_counter()
+        rows = conn.execute('''
+            SELECT job_id, title, company, city, snippet(jobs_fts, 2, '[', ']', '...', 12)
+            FROM jobs_fts WHERE jobs_fts MATCH ? ORDER BY rank LIMIT ?
+        ''', (match, args.limit)).fetchall()
+        elapsed = time.perf_counter() - started
+        for job_id, title, company, city, snippet in rows:
+            print(f"{title} | {company} | {city} ({job_id})\n    {snippet}")
+        print(f"{len(rows)} results in {elapsed * 1000:.1f} ms")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
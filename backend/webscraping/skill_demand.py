@@ -0,0 +1,187 @@
+"""Skill demand rollups, kept up to date by triggers as jobs are written.
+
+Two tables count tagged jobs:
+
+    skill_demand_weekly    skill x city x country x ISO week, by date_added
+    skill_demand_by_title  skill x search_title (the query the job was found by)
+
+SQL triggers apply each change as a +1/-1 delta: a row inserted into or
+deleted from job_skills, and a job whose city, country or search_title
+changes. Refreshing after a crawl therefore costs time proportional to
+the skill tags written in that crawl, whether they come from JobWriter
+or from "skill_tagger.py backfill". Nothing has to rescan the history.
+A week is stored as its Monday (week_start), which sorts and compares
+like a date; the API turns it into an ISO week label.
+
+The tables are filled from the existing job_skills once, when they are
+first created.
+
+Usage:
+    python skill_demand.py check [--db linkedin_jobs.db]
+    python skill_demand.py rebuild
+    python skill_demand.py top [--city Sydney] [--since 2026-01-01] [--limit 20]
+
+"check" recomputes both rollups from scratch and reports any row that
+differs from the maintained tables. "rebuild" replaces them with that
+recomputation.
+"""
+
+import argparse
+
+# Monday of the ISO week of a timestamp: 'weekday 0' moves to the Sunday
+# ending the week (or stays on it), then back six days
+_WEEK_START = "date({}, 'weekday 0', '-6 days')"
+
+_TABLES = '''
+    CREATE TABLE IF NOT EXISTS skill_demand_weekly (
+        skill_id INTEGER NOT NULL,
+        city TEXT NOT NULL,
+        country TEXT NOT NULL,
+        week_start TEXT NOT NULL,
+        jobs INTEGER NOT NULL,
+        PRIMARY KEY (skill_id, city, country, week_start)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_skill_demand_weekly_week ON skill_demand_weekly (week_start);
+    CREATE TABLE IF NOT EXISTS skill_demand_by_title (
+        skill_id INTEGER NOT NULL,
+        search_title TEXT NOT NULL,
+        jobs INTEGER NOT NULL,
+        PRIMARY KEY (skill_id, search_title)
+    ) WITHOUT ROWID;
+'''
+
+# The rollup keys of one job, as expressions over a jobs row named j
+_WEEKLY_KEY = f"COALESCE(j.city, ''), COALESCE(j.country, ''), {_WEEK_START.format('j.date_added')}"
+
+_TRIGGERS = f'''
+    CREATE TRIGGER IF NOT EXISTS skill_demand_tag_added AFTER INSERT ON job_skills
+    BEGIN
+        INSERT INTO skill_demand_weekly (skill_id, city, country, week_start, jobs)
+        SELECT NEW.skill_id, {_WEEKLY_KEY}, 1 FROM jobs j WHERE j.job_id = NEW.job_id
+        ON CONFLICT (skill_id, city, country, week_start) DO UPDATE SET jobs = jobs + 1;
+        INSERT INTO skill_demand_by_title (skill_id, search_title, jobs)
+        SELECT NEW.skill_id, j.search_title, 1 FROM jobs j WHERE j.job_id = NEW.job_id AND j.search_title IS NOT NULL
+        ON CONFLICT (skill_id, search_title) DO UPDATE SET jobs = jobs + 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS skill_demand_tag_removed AFTER DELETE ON job_skills
+    BEGIN
+        UPDATE skill_demand_weekly SET jobs = jobs - 1
+        WHERE (skill_id, city, country, week_start) =
+              (SELECT OLD.skill_id, {_WEEKLY_KEY} FROM jobs j WHERE j.job_id = OLD.job_id);
+        DELETE FROM skill_demand_weekly
+        WHERE (skill_id, city, country, week_start) =
+              (SELECT OLD.skill_id, {_WEEKLY_KEY} FROM jobs j WHERE j.job_id = OLD.job_id)
+          AND jobs <= 0;
+        UPDATE skill_demand_by_title SET jobs = jobs - 1
+        WHERE (skill_id, search_title) = (SELECT OLD.skill_id, j.search_title FROM jobs j WHERE j.job_id = OLD.job_id);
+        DELETE FROM skill_demand_by_title
+        WHERE (skill_id, search_title) = (SELECT OLD.skill_id, j.search_title FROM jobs j WHERE j.job_id = OLD.job_id)
+          AND jobs <= 0;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS skill_demand_job_moved AFTER UPDATE OF city, country, search_title ON jobs
+    WHEN OLD.city IS NOT NEW.city OR OLD.country IS NOT NEW.country OR OLD.search_title IS NOT NEW.search_title
+    BEGIN
+        UPDATE skill_demand_weekly SET jobs = jobs - 1
+        WHERE city = COALESCE(OLD.city, '') AND country = COALESCE(OLD.country, '')
+          AND week_start = {_WEEK_START.format('OLD.date_added')}
+          AND skill_id IN (SELECT skill_id FROM job_skills WHERE job_id = OLD.job_id);
+        INSERT INTO skill_demand_weekly (skill_id, city, country, week_start, jobs)
+        SELECT skill_id, COALESCE(NEW.city, ''), COALESCE(NEW.country, ''), {_WEEK_START.format('NEW.date_added')}, 1
+        FROM job_skills WHERE job_id = NEW.job_id
+        ON CONFLICT (skill_id, city, country, week_start) DO UPDATE SET jobs = jobs + 1;
+        UPDATE skill_demand_by_title SET jobs = jobs - 1
+        WHERE search_title = OLD.search_title
+          AND skill_id IN (SELECT skill_id FROM job_skills WHERE job_id = OLD.job_id);
+        INSERT INTO skill_demand_by_title (skill_id, search_title, jobs)
+        SELECT skill_id, NEW.search_title, 1 FROM job_skills WHERE job_id = NEW.job_id AND NEW.search_title IS NOT NULL
+        ON CONFLICT (skill_id, search_title) DO UPDATE SET jobs = jobs + 1;
+        DELETE FROM skill_demand_weekly
+        WHERE city = COALESCE(OLD.city, '') AND country = COALESCE(OLD.country, '')
+          AND week_start = {_WEEK_START.format('OLD.date_added')} AND jobs <= 0
+          AND skill_id IN (SELECT skill_id FROM job_skills WHERE job_id = OLD.job_id);
+        DELETE FROM skill_demand_by_title WHERE search_title = OLD.search_title AND jobs <= 0
+          AND skill_id IN (SELECT skill_id FROM job_skills WHERE job_id = OLD.job_id);
+    END;
+'''
+
+# The same counts computed from scratch
+_WEEKLY_FROM_SCRATCH = f'''
+    SELECT js.skill_id, {_WEEKLY_KEY}, COUNT(*)
+    FROM job_skills js JOIN jobs j ON j.job_id = js.job_id
+    GROUP BY 1, 2, 3, 4
+'''
+_BY_TITLE_FROM_SCRATCH = '''
+    SELECT js.skill_id, j.search_title, COUNT(*)
+    FROM job_skills js JOIN jobs j ON j.job_id = js.job_id
+    WHERE j.search_title IS NOT NULL
+    GROUP BY 1, 2
+'''
+
+
+def ensure_schema(conn):
+    """Create the rollups and their triggers; a new rollup starts from the current tags."""
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'skill_demand_weekly'").fetchone()
+    conn.executescript(_TABLES)
+    conn.executescript(_TRIGGERS)
+    if not exists:
+        rebuild(conn)
+
+
+def rebuild(conn):
+    with conn:
+        conn.execute('DELETE FROM skill_demand_weekly')
+        conn.execute('DELETE FROM skill_demand_by_title')
+        conn.execute(f'INSERT INTO skill_demand_weekly (skill_id, city, country, week_start, jobs) {_WEEKLY_FROM_SCRATCH}')
+        conn.execute(f'INSERT INTO skill_demand_by_title (skill_id, search_title, jobs) {_BY_TITLE_FROM_SCRATCH}')
+
+
+def check(conn):
+    """Differences between the maintained rollups and a recomputation, as report lines."""
+    problems = []
+    for table, key_columns, scratch_sql in (
+        ("skill_demand_weekly", "skill_id, city, country, week_start", _WEEKLY_FROM_SCRATCH),
+        ("skill_demand_by_title", "skill_id, search_title", _BY_TITLE_FROM_SCRATCH),
+    ):
+        stored = {row[:-1]: row[-1] for row in conn.execute(f'SELECT {key_columns}, jobs FROM {table}')}
+        expected = {row[:-1]: row[-1] for row in conn.execute(scratch_sql)}
+        for key in sorted(stored.keys() | expected.keys(), key=repr):
+            if stored.get(key) != expected.get(key):
+                problems.append(f"{table} {key}: stored {stored.get(key)}, expected {expected.get(key)}")
+    return problems
+
+
+def main():
+    from jobstore import DB_NAME, connect
+
+    parser = argparse.ArgumentParser(description="Skill demand rollups.")
+    parser.add_argument("command", choices=["check", "rebuild", "top"])
+    parser.add_argument("--db", default=DB_NAME)
+    parser.add_argument("--city")
+    parser.add_argument("--since", help="top: first day to count, YYYY-MM-DD")
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    if args.command == "check":
+        problems = check(conn)
+        print("\n".join(problems[:50]) or "Rollups match a full recomputation")
+        if len(problems) > 50:
+            print(f"... {len(problems) - 50} more")
+    elif args.command == "rebuild":
+        rebuild(conn)
+        print("Rebuilt the skill demand rollups")
+    else:
+        rows = conn.execute(f'''
+            SELECT skills.name, SUM(jobs) FROM skill_demand_weekly JOIN skills USING (skill_id)
+            WHERE week_start >= {_WEEK_START.format('?')} AND (? IS NULL OR city = ?)
+            GROUP BY skill_id ORDER BY 2 DESC LIMIT ?
+        ''', (args.since or "0001-01-01", args.city, args.city, args.limit)).fetchall()
+        for name, jobs in rows:
+            print(f"{jobs:8}  {name}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""Tag job descriptions with the skills of the taxonomy in backend/api/skills_500.csv.
+
+All skill names are compiled once into one Aho-Corasick automaton over
+words, so a description is tokenized and walked once however many skills
+there are. The rules:
+
+- Matching is on whole words. "Java" doesn't match inside "Javanese", and
+  "Node.js", "C++" and "R&D" are single words.
+- Case is ignored, except for skills of three characters or fewer ("R",
+  "Go", "SQL", "ML") and the ordinary English words listed in
+  skill_rules.json ("Excel", "Swift"), which must match exactly.
+- Descriptions are stored after normalizer.py split camelCase words, so
+  "JavaScript" is also looked for as "Java Script".
+- When one match lies inside another, only the longer one counts:
+  "Java Script" is JavaScript, not Java as well.
+- skill_rules.json also lists extra spellings of a skill ("K8s" for
+  Kubernetes).
+
+Results go into job_skills(job_id, skill_id). jobs.skills_version records
+which version of the taxonomy and rules a job was tagged with, so editing
+either makes the backfill tag every job again. jobs.skills_seq grows with
+every batch of jobs tagged, so a reader that remembers the highest value it
+has seen (the résumé match index, backend/api/job_match.py) can pick up
+just the jobs tagged since.
+
+Usage:
+    python skill_tagger.py backfill [--db linkedin_jobs.db] [--workers 4] [--chunk-size 500]
+    python skill_tagger.py tag "Python and SQL, some Excel"
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from normalizer import DescriptionNormalizer
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+SKILLS_PATH = os.path.join(_HERE, "..", "api", "skills_500.csv")
+RULES_PATH = os.path.join(_HERE, "skill_rules.json")
+
+# Spellings this short are matched case-sensitively
+CASE_SENSITIVE_MAX_LENGTH = 3
+
+BACKFILL_CHUNK_SIZE = 500
+
+# Letters and digits, joined by . or & (Node.js, R&D), then any + or # (C++, C#)
+_TOKEN_RE = re.compile(r'\w+(?:[.&]\w+)*[+#]*')
+
+# skills.py pads the list to 500 with these
+_PLACEHOLDER_RE = re.compile(r'Skill_\d+')
+
+_split_words = DescriptionNormalizer()
+
+
+def load_taxonomy(path=SKILLS_PATH):
+    with open(path, newline="", encoding="utf-8") as f:
+        return [row["skill_name"].strip() for row in csv.DictReader(f)
+                if row["skill_name"].strip() and not _PLACEHOLDER_RE.fullmatch(row["skill_name"].strip())]
+
+
+def load_rules(path=RULES_PATH):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def ensure_schema(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS skills (
+            skill_id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS job_skills (
+            job_id TEXT NOT NULL,
+            skill_id INTEGER NOT NULL,
+            PRIMARY KEY (job_id, skill_id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_job_skills_skill ON job_skills (skill_id)')
+    existing = {row[1] for row in conn.execute('PRAGMA table_info(jobs)')}
+    if "skills_version" not in existing:
+        conn.execute('ALTER TABLE jobs ADD COLUMN skills_version INTEGER')
+    if "skills_seq" not in existing:
+        conn.execute('ALTER TABLE jobs ADD COLUMN skills_seq INTEGER')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_skills_seq ON jobs (skills_seq)')
+
+
+def sync_skills(conn, names):
+    """Add taxonomy names missing from the skills table; returns {name: skill_id}.
+
+    IDs of existing names never change, so job_skills stays valid when the
+    taxonomy grows.
+    """
+    with conn:
+        conn.executemany('INSERT OR IGNORE INTO skills (name) VALUES (?)', [(name,) for name in names])
+    ids = dict(conn.execute('SELECT name, skill_id FROM skills'))
+    return {name: ids[name] for name in names}
+
+
+class SkillTagger:
+    """Finds the skills mentioned in a text; build it once and reuse it."""
+
+    def __init__(self, skills, rules=None):
+        """skills maps skill_id -> name; rules is the content of skill_rules.json."""
+        rules = rules or {}
+        case_sensitive = set(rules.get("case_sensitive", ()))
+        aliases = rules.get("aliases", {})
+        names = {name: skill_id for skill_id, name in skills.items()}
+
+        # (lowercased words, skill_id, exact words or None)
+        patterns = set()
+        for name, skill_id in names.items():
+            for spelling in [name, *aliases.get(name, ())]:
+                exact = spelling in case_sensitive or len(spelling) <= CASE_SENSITIVE_MAX_LENGTH
+                for variant in {spelling, _split_words(spelling)}:
+                    words = tuple(_TOKEN_RE.findall(variant))
+                    if words:
+                        patterns.add((tuple(word.lower() for word in words), skill_id, words if exact else None))
+        self.patterns = sorted(patterns, key=repr)
+        # Changes whenever a skill, spelling or rule does
+        self.version = zlib.crc32(repr(self.patterns).encode())
+        self._build()
+
+    @classmethod
+    def from_database(cls, conn, skills_path=SKILLS_PATH, rules_path=RULES_PATH):
+        ids = sync_skills(conn, load_taxonomy(skills_path))
+        return cls({skill_id: name for name, skill_id in ids.items()}, load_rules(rules_path))
+
+    def _build(self):
+        # State 0 is the root; each state has its word transitions, its
+        # failure link and the patterns that end there
+        self._goto, self._fail, self._out = [{}], [0], [[]]
+        for words, skill_id, exact in self.patterns:
+            state = 0
+            for word in words:
+                if word not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[state][word] = len(self._goto) - 1
+                state = self._goto[state][word]
+            self._out[state].append((skill_id, len(words), exact))
+        # Breadth first, so a state's failure link is always done before its children's
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and word not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(word, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+        # Words that start no transition send the walk straight back to the root
+        self._vocabulary = frozenset(word for words, _, _ in self.patterns for word in words)
+
+    def matches(self, text):
+        """(first word, last word, skill_id) of every match, before overlaps are resolved."""
+        words = _TOKEN_RE.findall(text)
+        goto, fail, out, vocabulary = self._goto, self._fail, self._out, self._vocabulary
+        found = []
+        state = 0
+        for end, word in enumerate(words):
+            key = word.lower()
+            if key not in vocabulary:
+                state = 0
+                continue
+            while state and key not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(key, 0)
+            for skill_id, length, exact in out[state]:
+                start = end - length + 1
+                if exact is None or tuple(words[start:end + 1]) == exact:
+                    found.append((start, end, skill_id))
+        return found
+
+    def tag(self, text):
+        """Skill IDs mentioned in text, ignoring matches inside a longer match."""
+        if not text:
+            return set()
+        found = self.matches(text)
+        return {skill_id for start, end, skill_id in found
+                if not any(s <= start and end <= e and (s, e) != (start, end) for s, e, _ in found)}
+
+
+def store_tags(conn, tagged, version):
+    """Replace the skills of each (job_id, skill_ids) and mark the jobs tagged.
+
+    The jobs all get the next skills_seq. Runs on conn without committing,
+    like DuplicateDetector.add().
+    """
+    if not tagged:
+        return
+    job_ids = [(job_id,) for job_id, _ in tagged]
+    conn.executemany('DELETE FROM job_skills WHERE job_id = ?', job_ids)
+    conn.executemany('INSERT INTO job_skills (job_id, skill_id) VALUES (?, ?)',
+                     [(job_id, skill_id) for job_id, skill_ids in tagged for skill_id in skill_ids])
+    # The end of idx_jobs_skills_seq, so no scan
+    seq = conn.execute('SELECT COALESCE(MAX(skills_seq), 0) + 1 FROM jobs').fetchone()[0]
+    conn.executemany('UPDATE jobs SET skills_version = ?, skills_seq = ? WHERE job_id = ?',
+                     [(version, seq, job_id) for job_id, _ in tagged])
+
+
+# Backfill worker state, set up once per process by _init_worker
+_worker_tagger = None
+_worker_conn = None
+
+
+def _init_worker(db_name, skills, rules):
+    global _worker_tagger, _worker_conn
+    from jobstore import connect
+
+    _worker_tagger = SkillTagger(skills, rules)
+    _worker_conn = connect(db_name)
+
+
+def _tag_chunk(job_ids):
+    placeholders = ",".join("?" * len(job_ids))
+    # The job_descriptions view decompresses transparently
+    texts = dict(_worker_conn.execute(
+        f'SELECT job_id, description FROM job_descriptions WHERE job_id IN ({placeholders})', job_ids
+    ))
+    return [(job_id, sorted(_worker_tagger.tag(texts.get(job_id)))) for job_id in job_ids]
+
+
+def backfill(conn, db_name, workers=None, chunk_size=BACKFILL_CHUNK_SIZE):
+    """Tag every job not yet tagged with the current taxonomy. Returns (jobs, seconds).
+
+    Chunks of job IDs are tagged in a process pool, each worker reading the
+    descriptions on its own connection; this process writes the results, a
+    chunk per transaction, so an interrupted backfill resumes. workers=0
+    tags in this process.
+    """
+    skills = {skill_id: name for name, skill_id in sync_skills(conn, load_taxonomy()).items()}
+    rules = load_rules()
+    tagger = SkillTagger(skills, rules)
+    job_ids = [row[0] for row in conn.execute(
+        'SELECT job_id FROM jobs WHERE skills_version IS NOT ?', (tagger.version,)
+    )]
+    chunks = [job_ids[start:start + chunk_size] for start in range(0, len(job_ids), chunk_size)]
+    workers = os.cpu_count() if workers is None else workers
+    started = time.perf_counter()
+    done = 0
+    if workers > 0:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(db_name, skills, rules))
+        results = pool.map(_tag_chunk, chunks)
+    else:
+        pool = None
+        _init_worker(db_name, skills, rules)
+        results = map(_tag_chunk, chunks)
+    try:
+        for tagged in results:
+            with conn:
+                store_tags(conn, tagged, tagger.version)
+            done += len(tagged)
+            elapsed = time.perf_counter() - started
+            print(f"Tagged {done} of {len(job_ids)} jobs ({done / elapsed:.0f} jobs/s)")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return len(job_ids), time.perf_counter() - started
+
+
+def main():
+    from jobstore import DB_NAME, connect
+
+    parser = argparse.ArgumentParser(description="Tag job descriptions with taxonomy skills.")
+    parser.add_argument("command", choices=["backfill", "tag"])
+    parser.add_argument("text", nargs="?", help="tag: text to tag")
+    parser.add_argument("--db", default=DB_NAME)
+    parser.add_argument("--workers", type=int, default=None, help="backfill: worker processes (0 = inline)")
+    parser.add_argument("--chunk-size", type=int, default=BACKFILL_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    if args.command == "backfill":
+        done, elapsed = backfill(conn, args.db, args.workers, args.chunk_size)
+        print(f"Tagged {done} jobs in {elapsed:.1f} s")
+    else:
+        if not args.text:
+            parser.error("tag needs the text to tag")
+        tagger = SkillTagger.from_database(conn)
+        names = {skill_id: name for name, skill_id in conn.execute('SELECT name, skill_id FROM skills')}
+        print(", ".join(sorted(names[skill_id] for skill_id in tagger.tag(args.text))) or "(no skills)")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()